@@ -1,2 +1,3 @@
 # Agents module
-from .prompts import *
\ No newline at end of file
+from .prompts import *
+from .chief_justice import *
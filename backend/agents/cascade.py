@@ -0,0 +1,197 @@
+"""Confidence-based model cascade for the agents
+
+With MODEL_CASCADE each agent runs on the first model in CASCADE_MODELS
+(smallest first) and MODEL_NAME is the last tier. An opinion is kept at the
+first tier that raises no doubt about it. It is re-run on the next tier for
+any CASCADE_ESCALATE_ON reason:
+- invalid: fails validation after local repair. Lower tiers get no repair
+  retry, the next tier is the retry.
+- borderline: the score is within CASCADE_SCORE_MARGIN of a decision-matrix
+  boundary, where a few points move the verdict band.
+- rule_conflict: the opinion approves (or scores in the APPROVE band) while
+  a deterministic rule check flagged a high or critical issue for that agent.
+
+Tiers that no available backend serves are skipped, and the last tier's
+opinion is always kept. cascade_report() gives the escalation rate and an
+estimate of the latency saved: every opinion would otherwise have been one
+MODEL_NAME call, priced at the mean MODEL_NAME call seen by the cascade.
+"""
+
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from rag.rule_engine import CHECK_AGENT
+from utils.backends import get_router, model_tag
+from utils.metrics import Counter
+from .chief_justice import DECISION_MATRIX, decide
+
+REASONS = ("invalid", "borderline", "rule_conflict")
+CONFLICT_SEVERITIES = ("high", "critical")
+# Scores where the verdict band changes (80, 60, 40)
+BOUNDARIES = tuple(minimum for minimum, _ in DECISION_MATRIX if minimum > 0)
+
+CASCADE_OPINIONS = Counter("nyaya_cascade_opinions_total", "Agent opinions by the cascade tier that produced them", ("agent", "model"))
+CASCADE_ESCALATIONS = Counter("nyaya_cascade_escalations_total", "Agent opinions re-run on the next cascade tier", ("agent", "reason"))
+
+# attempt(model, retries) -> validated opinion, or a failed_opinion dict
+Attempt = Callable[[str, Optional[int]], Awaitable[dict]]
+
+def cascade_models() -> List[str]:
+    """Model tiers, smallest first, ending at MODEL_NAME"""
+    tiers = settings.CASCADE_MODELS if settings.MODEL_CASCADE else []
+    return list(dict.fromkeys(model_tag(m) for m in [*tiers, settings.MODEL_NAME]))
+
+def cascade_fingerprint() -> str:
+    """What the cascade contributes to the verdict cache key ("" when off)"""
+    if not settings.MODEL_CASCADE:
+        return ""
+    return f"cascade:{cascade_models()}:{settings.CASCADE_SCORE_MARGIN}:{sorted(settings.CASCADE_ESCALATE_ON)}"
+
+def escalation_reason(name: str, opinion: dict, findings: list) -> Optional[str]:
+    """Why this opinion should go to the next tier, or None to keep it"""
+    enabled = settings.CASCADE_ESCALATE_ON
+    if "error" in opinion:
+        return "invalid" if "invalid" in enabled else None
+    score = opinion["score"]
+    if "rule_conflict" in enabled and (opinion["stance"] == "approve" or decide(score) == "APPROVE"):
+        for f in findings:
+            f = f if isinstance(f, dict) else f.model_dump()
+            if CHECK_AGENT.get(f["check"]) == name and f["severity"] in CONFLICT_SEVERITIES:
+                return "rule_conflict"
+    if "borderline" in enabled and any(abs(score - b) < settings.CASCADE_SCORE_MARGIN for b in BOUNDARIES):
+        return "borderline"
+    return None
+
+class CascadeStats:
+    """Opinions, escalations and per-tier call time since startup"""
+
+    def __init__(self):
+        self.opinions = 0
+        self.escalated = 0  # opinions escalated at least once
+        self.reasons = {reason: 0 for reason in REASONS}
+        self.skipped = 0  # tiers passed over because no backend served them
+        self.agents: Dict[str, dict] = {}
+        self.models: Dict[str, dict] = {}
+        self.timed_opinions = 0
+        self.timed_ms = 0.0
+
+    def _model(self, model: str) -> dict:
+        return self.models.setdefault(model, {"calls": 0, "accepted": 0, "total_ms": 0.0})
+
+    def record_call(self, model: str, ms: float) -> None:
+        bucket = self._model(model)
+        bucket["calls"] += 1
+        bucket["total_ms"] += ms
+
+    def record_opinion(self, name: str, model: str, reasons: List[str], spent_ms: Optional[float]) -> None:
+        """One finished opinion; spent_ms is None when its first attempt was not timed alone (full_bench)"""
+        self.opinions += 1
+        self._model(model)["accepted"] += 1
+        agent = self.agents.setdefault(name, {"opinions": 0, "escalated": 0})
+        agent["opinions"] += 1
+        if reasons:
+            self.escalated += 1
+            agent["escalated"] += 1
+        for reason in reasons:
+            self.reasons[reason] += 1
+        if spent_ms is not None:
+            self.timed_opinions += 1
+            self.timed_ms += spent_ms
+
+    def report(self) -> dict:
+        final = self.models.get(model_tag(settings.MODEL_NAME), {})
+        final_mean = final["total_ms"] / final["calls"] if final.get("calls") else None
+        latency = {
+            "timed_opinions": self.timed_opinions,
+            "actual_ms": round(self.timed_ms, 1),
+            "final_tier_mean_ms": round(final_mean, 1) if final_mean is not None else None,
+            "baseline_ms": None,
+            "saved_ms": None,
+            "saved_pct": None
+        }
+        # Needs at least one MODEL_NAME call to price the baseline
+        if final_mean is not None and self.timed_opinions:
+            baseline = final_mean * self.timed_opinions
+            latency.update(
+                baseline_ms=round(baseline, 1),
+                saved_ms=round(baseline - self.timed_ms, 1),
+                saved_pct=round((baseline - self.timed_ms) / baseline * 100, 1) if baseline else None
+            )
+        return {
+            "enabled": settings.MODEL_CASCADE,
+            "tiers": cascade_models(),
+            "score_margin": settings.CASCADE_SCORE_MARGIN,
+            "escalate_on": settings.CASCADE_ESCALATE_ON,
+            "opinions": self.opinions,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.opinions, 4) if self.opinions else None,
+            "reasons": self.reasons,
+            "skipped_tiers": self.skipped,
+            "agents": {
+                name: {**a, "escalation_rate": round(a["escalated"] / a["opinions"], 4)}
+                for name, a in sorted(self.agents.items())
+            },
+            "models": {
+                model: {
+                    "calls": m["calls"],
+                    "accepted": m["accepted"],
+                    "mean_ms": round(m["total_ms"] / m["calls"], 1) if m["calls"] else None
+                }
+                for model, m in self.models.items()
+            },
+            "latency": latency
+        }
+
+cascade_stats = CascadeStats()
+
+def cascade_report() -> dict:
+    return cascade_stats.report()
+
+async def run_cascade(name: str, attempt: Attempt, findings: list = (), first: Optional[Tuple[str, dict]] = None, on_escalate=None) -> dict:
+    """Run `attempt` tier by tier until an opinion needs no escalation
+
+    `first` is a (model, opinion) pair already in hand, e.g. a full_bench
+    section; the cascade then continues from the tier after that model.
+    on_escalate(model, reason), if given, is awaited before each re-run.
+    """
+    models = cascade_models()
+    reasons: List[str] = []
+    spent_ms: Optional[float] = 0.0
+    start = 0
+    opinion = None
+    model = models[-1]
+    if first is not None:
+        model, opinion = first
+        start = models.index(model) + 1 if model in models else len(models)
+        spent_ms = None
+        reason = escalation_reason(name, opinion, findings) if start < len(models) else None
+        if reason is None:
+            start = len(models)
+        else:
+            reasons.append(reason)
+            CASCADE_ESCALATIONS.inc(name, reason)
+    router = get_router()
+    for tier in range(start, len(models)):
+        final = tier == len(models) - 1
+        if not final and not router.serves(models[tier]):
+            cascade_stats.skipped += 1
+            continue
+        if opinion is not None and on_escalate is not None:
+            await on_escalate(models[tier], reasons[-1])
+        model = models[tier]
+        started = time.perf_counter()
+        # A lower tier's invalid output escalates instead of spending a repair retry
+        opinion = await attempt(model, None if final else 0)
+        ms = (time.perf_counter() - started) * 1000
+        cascade_stats.record_call(model, ms)
+        if spent_ms is not None:
+            spent_ms += ms
+        reason = None if final else escalation_reason(name, opinion, findings)
+        if reason is None:
+            break
+        reasons.append(reason)
+        CASCADE_ESCALATIONS.inc(name, reason)
+    cascade_stats.record_opinion(name, model, reasons, spent_ms)
+    CASCADE_OPINIONS.inc(name, model)
+    return opinion
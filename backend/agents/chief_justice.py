@@ -0,0 +1,121 @@
+"""Deterministic Chief Justice: verdict, score and breakdown computed locally
+
+Applies the fixed weights, decision matrix and auto-reject rules from
+CHIEF_JUSTICE_PROMPT to the agents' score/stance values, so the verdict
+needs no LLM round-trip. Only the citizen-facing prose may still be
+written by the model (see VERDICT_MODE).
+"""
+
+from typing import List
+
+# Same weights as CHIEF_JUSTICE_PROMPT
+SCORE_WEIGHTS = {
+    "legality": 0.30,
+    "transparency": 0.20,
+    "equity": 0.20,
+    "accountability": 0.15,
+    "social_justice": 0.15
+}
+
+# (minimum score, verdict) from the decision matrix, highest band first
+DECISION_MATRIX = [
+    (80, "APPROVE"),
+    (60, "CONDITIONAL"),
+    (40, "REVIEW"),
+    (0, "REJECT")
+]
+
+VERDICT_ACTIONS = {
+    "APPROVE": "Proceed with procurement",
+    "CONDITIONAL": "Fix the issues listed within 7 days",
+    "REVIEW": "Send back to the department for revision",
+    "REJECT": "Cancel the tender and restart procurement"
+}
+
+# Critical agent findings about these subjects trigger AUTO-REJECT
+AUTO_REJECT_TOPICS = (
+    "procurement method",
+    "open tender",
+    "msme",
+    "rule 161",
+    "bid rigging",
+    "cartel",
+    "conflict of interest",
+    "labor",
+    "labour",
+    "minimum wage",
+    "environment"
+)
+
+def _valid(opinion) -> bool:
+    return isinstance(opinion, dict) and "error" not in opinion and isinstance(opinion.get("score"), (int, float))
+
+def decide(score: float) -> str:
+    for minimum, verdict in DECISION_MATRIX:
+        if score >= minimum:
+            return verdict
+    return "REJECT"
+
+def _auto_reject_reasons(opinions: dict, rule_findings: list) -> List[str]:
+    reasons = [f["message"] for f in rule_findings if f.get("auto_reject")]
+    for opinion in opinions.values():
+        if not _valid(opinion) or opinion.get("stance") != "reject":
+            continue
+        for finding in opinion.get("findings", []):
+            text = " ".join(str(finding.get(k, "")) for k in ("issue", "rule_violated")).lower()
+            if finding.get("severity") == "critical" and any(t in text for t in AUTO_REJECT_TOPICS):
+                reasons.append(str(finding.get("issue", "")))
+    return reasons
+
+def _critical_issues(opinions: dict, rule_findings: list) -> List[str]:
+    issues = [f["message"] for f in rule_findings if f.get("severity") in ("high", "critical")]
+    for opinion in opinions.values():
+        if not _valid(opinion):
+            continue
+        for finding in opinion.get("findings", []):
+            if finding.get("severity") in ("high", "critical") and finding.get("issue"):
+                issues.append(str(finding["issue"]))
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(issues))
+
+def _mandatory_actions(verdict: str, opinions: dict) -> List[str]:
+    actions = [VERDICT_ACTIONS[verdict]]
+    for name in SCORE_WEIGHTS:
+        opinion = opinions.get(name)
+        if _valid(opinion) and opinion.get("stance") != "approve" and opinion.get("recommendation"):
+            actions.append(str(opinion["recommendation"]))
+    return list(dict.fromkeys(actions))
+
+def _citizen_summary(verdict: str, score: float, critical: List[str], auto_reject: List[str]) -> str:
+    summary = f"The Constitutional Bench scored this procurement {score:.0f}/100 and the verdict is {verdict}."
+    if auto_reject:
+        summary += f" It breaks a mandatory rule: {auto_reject[0]}."
+    elif critical:
+        summary += f" The main concern is: {critical[0]}."
+    return summary + f" Next step: {VERDICT_ACTIONS[verdict].lower()}."
+
+def synthesize_verdict(opinions: dict, rule_findings: list = ()) -> dict:
+    """CourtVerdict-shaped dict from agent opinions and rule-engine findings
+
+    Agents that failed to produce a valid opinion are left out and the
+    remaining weights renormalized.
+    """
+    rule_findings = [f if isinstance(f, dict) else f.model_dump() for f in rule_findings]
+    breakdown = {name: opinions[name]["score"] for name in SCORE_WEIGHTS if _valid(opinions.get(name))}
+    if not breakdown:
+        raise ValueError("No valid agent opinions to synthesize a verdict from")
+
+    total_weight = sum(SCORE_WEIGHTS[name] for name in breakdown)
+    score = round(sum(SCORE_WEIGHTS[name] * breakdown[name] for name in breakdown) / total_weight, 1)
+    auto_reject = _auto_reject_reasons(opinions, rule_findings)
+    verdict = "REJECT" if auto_reject else decide(score)
+    critical = _critical_issues(opinions, rule_findings)
+
+    return {
+        "verdict": verdict,
+        "constitutional_score": score,
+        "score_breakdown": breakdown,
+        "critical_issues": critical,
+        "mandatory_actions": _mandatory_actions(verdict, opinions),
+        "citizen_summary": _citizen_summary(verdict, score, critical, auto_reject)
+    }
@@ -0,0 +1,475 @@
+"""Cross-tender collusion signals over the historical bid corpus
+
+Every past VendorBid is held in columnar NumPy arrays (tender, vendor,
+amount, won), sorted by tender then amount, and every signal is computed for
+all tenders and vendors at once with bincount/unique/searchsorted:
+
+- price clustering: coefficient of variation of the bids in a tender
+- cover bidding: vendors that keep losing by a small, steady margin over
+  the winning bid (mean and spread of their losing margins)
+- bid rotation: vendor pairs that mostly bid together and take turns
+  winning (between them they win most of the tenders they both bid in)
+- co-bidding graph: how often each pair of vendors bid in the same tender
+- department win share: how often a vendor wins in one department
+
+History comes from the review store (latest version of each reviewed case)
+plus BID_HISTORY_PATH (*.jsonl of ProcurementCase objects). The snapshot is
+rebuilt in a background thread every COLLUSION_REFRESH_SECONDS and swapped
+in whole, so readers never see a half-built one.
+"""
+
+import glob
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from config import settings
+from utils.tender_chunks import vendor_key
+from utils.verdict_store import get_verdict_store
+
+MIN_SHARED_TENDERS = 3  # tenders a pair must meet in before rotation is judged
+ROTATION_MIN_AFFINITY = 0.5  # ...most of the rarer bidder's tenders are with the other
+ROTATION_MIN_SHARE = 0.5  # ...and between them they win at least this share of those
+ROTATION_MIN_BALANCE = 0.25  # ...taking turns: the lesser winner has a quarter of the other's wins
+COVER_MIN_LOSSES = 3
+COVER_MAX_MARGIN = 0.15  # loses by at most 15% over the winning bid
+COVER_MAX_MARGIN_STD = 0.02  # ...by a nearly constant margin
+COVER_MAX_WIN_RATE = 0.2
+CLUSTER_MAX_CV = 0.02  # bids within about 2% of each other
+CLUSTER_MIN_BIDS = 3
+MAX_PAIR_DISTANCE = 64  # bidders per tender paired up for the co-bidding graph
+DEPARTMENT_MIN_TENDERS = 5
+
+def history_files(path: str) -> List[str]:
+    if not path:
+        return []
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.jsonl")))
+    return [path] if os.path.exists(path) else []
+
+def history_cases() -> Iterator[dict]:
+    """Reviewed cases, then the bulk history files; one dict per ProcurementCase"""
+    store = get_verdict_store()
+    if store is not None:
+        yield from store.latest_cases()
+    for path in history_files(settings.BID_HISTORY_PATH):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"[Analytics] Skipping {path}:{line_no}: {e}")
+
+def _cv(amounts: np.ndarray) -> Optional[float]:
+    if len(amounts) < 2 or amounts.mean() <= 0:
+        return None
+    return float(amounts.std() / amounts.mean())
+
+class BidHistory:
+    """Immutable snapshot of the bid corpus with per-tender, per-vendor and per-pair signals"""
+
+    def __init__(self, tender_ids: List[str], departments: np.ndarray, department_names: List[str],
+                 vendor_names: List[str], vendor_index: Dict[str, int],
+                 tender: np.ndarray, vendor: np.ndarray, amount: np.ndarray, won: np.ndarray):
+        self.built_at = time.time()
+        self.tender_ids = tender_ids
+        self.tender_index = {t: i for i, t in enumerate(tender_ids)}  # later duplicates win
+        self.department_names = department_names
+        self.department_index = {d: i for i, d in enumerate(department_names)}
+        self.vendor_names = vendor_names
+        self.vendor_index = vendor_index
+        n_tenders, n_vendors = len(tender_ids), len(vendor_names)
+
+        # Bid columns sorted by tender, then amount
+        order = np.lexsort((amount, tender))
+        self.tender, self.vendor = tender[order], vendor[order]
+        self.amount, self.won = amount[order], won[order]
+        self.starts = np.searchsorted(self.tender, np.arange(n_tenders + 1))
+
+        # Per tender: bid count, price spread, winning amount
+        self.n_bids = np.bincount(self.tender, minlength=n_tenders)
+        mean = np.bincount(self.tender, self.amount, minlength=n_tenders) / np.maximum(self.n_bids, 1)
+        var = np.bincount(self.tender, (self.amount - mean[self.tender]) ** 2, minlength=n_tenders) / np.maximum(self.n_bids, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.cv = np.where((self.n_bids >= 2) & (mean > 0), np.sqrt(var) / mean, np.nan)
+        self.clustered = (self.n_bids >= CLUSTER_MIN_BIDS) & (self.cv < CLUSTER_MAX_CV)
+        self.win_amount = np.full(n_tenders, np.nan)
+        self.win_amount[self.tender[self.won]] = self.amount[self.won]
+        self.winner = np.full(n_tenders, -1, dtype=np.int64)
+        self.winner[self.tender[self.won]] = self.vendor[self.won]
+        self.department = departments
+
+        # Per vendor: participation, wins, losing margins over the winner
+        self.bids = np.bincount(self.vendor, minlength=n_vendors)
+        self.wins = np.bincount(self.vendor, self.won, minlength=n_vendors)
+        losing = ~self.won & (self.winner[self.tender] >= 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = (self.amount[losing] - self.win_amount[self.tender[losing]]) / self.win_amount[self.tender[losing]]
+        margin = np.nan_to_num(margin, nan=0.0, posinf=0.0, neginf=0.0)
+        self.losses = np.bincount(self.vendor[losing], minlength=n_vendors)
+        self.margin_sum = np.bincount(self.vendor[losing], margin, minlength=n_vendors)
+        self.margin_sumsq = np.bincount(self.vendor[losing], margin ** 2, minlength=n_vendors)
+        self.clustered_bids = np.bincount(self.vendor, self.clustered[self.tender], minlength=n_vendors)
+
+        # Department x vendor wins, as a sorted key array (dense would be departments x vendors)
+        n_departments = max(len(department_names), 1)
+        self.department_tenders = np.bincount(departments[departments >= 0], minlength=n_departments)
+        decided = self.winner >= 0
+        dv = departments[decided] * np.int64(n_vendors) + self.winner[decided]
+        self.dv_keys, self.dv_wins = np.unique(dv, return_counts=True)
+
+        self._build_pairs(n_vendors)
+
+    def _build_pairs(self, n_vendors: int) -> None:
+        """Co-bidding graph: every pair of vendors in the same tender, with who won"""
+        keys, won_lo, won_hi = [], [], []
+        max_distance = min(int(self.n_bids.max(initial=0)), MAX_PAIR_DISTANCE)
+        for k in range(1, max_distance):
+            i = np.flatnonzero(self.tender[:-k] == self.tender[k:])
+            if not i.size:
+                break
+            j = i + k
+            a, b = self.vendor[i], self.vendor[j]
+            keep = a != b
+            i, j, a, b = i[keep], j[keep], a[keep], b[keep]
+            swap = a > b
+            keys.append(np.where(swap, b, a).astype(np.int64) * n_vendors + np.where(swap, a, b))
+            won_lo.append(np.where(swap, self.won[j], self.won[i]))
+            won_hi.append(np.where(swap, self.won[i], self.won[j]))
+        if keys:
+            all_keys = np.concatenate(keys)
+            self.pair_keys, inverse, self.pair_shared = np.unique(all_keys, return_inverse=True, return_counts=True)
+            self.pair_wins_lo = np.bincount(inverse, np.concatenate(won_lo), minlength=len(self.pair_keys)).astype(np.int64)
+            self.pair_wins_hi = np.bincount(inverse, np.concatenate(won_hi), minlength=len(self.pair_keys)).astype(np.int64)
+        else:
+            self.pair_keys = np.zeros(0, dtype=np.int64)
+            self.pair_shared = self.pair_wins_lo = self.pair_wins_hi = np.zeros(0, dtype=np.int64)
+        self.pair_lo = self.pair_keys // max(n_vendors, 1)
+        self.pair_hi = self.pair_keys % max(n_vendors, 1)
+        # Pairs by their higher vendor, for neighbour lookups from either side
+        hi_keys = self.pair_hi * max(n_vendors, 1) + self.pair_lo
+        self.by_hi = np.argsort(hi_keys, kind="stable")
+        self.hi_keys = hi_keys[self.by_hi]
+        self.rotation = rotation_flags(
+            self.pair_shared, self.pair_wins_lo, self.pair_wins_hi,
+            self.bids[self.pair_lo], self.bids[self.pair_hi]
+        )
+        self.cobidders = np.bincount(self.pair_lo, minlength=n_vendors) + np.bincount(self.pair_hi, minlength=n_vendors)
+        self.rotation_partners = (
+            np.bincount(self.pair_lo[self.rotation], minlength=n_vendors)
+            + np.bincount(self.pair_hi[self.rotation], minlength=n_vendors)
+        )
+
+    @classmethod
+    def from_cases(cls, cases: Iterable[dict]) -> "BidHistory":
+        """Columnar snapshot of the given cases (a later copy of a tender_id replaces the earlier)"""
+        latest: Dict[str, dict] = {}
+        for case in cases:
+            if case.get("bids"):
+                latest[str(case.get("tender_id", ""))] = case
+        vendor_index: Dict[str, int] = {}
+        vendor_names: List[str] = []
+        department_index: Dict[str, int] = {}
+        tender_ids: List[str] = []
+        departments: List[int] = []
+        tender, vendor, amount, won = [], [], [], []
+        keys: Dict[str, str] = {}  # raw name -> vendor_key; names repeat far more than they vary
+
+        def key_of(name: str) -> str:
+            key = keys.get(name)
+            if key is None:
+                key = keys[name] = vendor_key(name)
+            return key
+
+        for tender_id, case in latest.items():
+            t = len(tender_ids)
+            tender_ids.append(tender_id)
+            department = " ".join(str(case.get("department") or "").lower().split())
+            departments.append(department_index.setdefault(department, len(department_index)) if department else -1)
+            winner = key_of(str(case.get("selected_vendor") or ""))
+            seen = set()
+            for bid in case["bids"]:
+                name = str(bid.get("vendor_name") or "").strip()
+                key = key_of(name)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                v = vendor_index.get(key)
+                if v is None:
+                    v = vendor_index[key] = len(vendor_names)
+                    vendor_names.append(name)
+                tender.append(t)
+                vendor.append(v)
+                amount.append(float(bid.get("bid_amount") or 0.0))
+                won.append(key == winner)
+        return cls(
+            tender_ids,
+            np.array(departments, dtype=np.int64),
+            list(department_index),
+            vendor_names,
+            vendor_index,
+            np.array(tender, dtype=np.int64),
+            np.array(vendor, dtype=np.int64),
+            np.array(amount, dtype=np.float64),
+            np.array(won, dtype=bool)
+        )
+
+    @property
+    def size(self) -> dict:
+        return {
+            "tenders": len(self.tender_ids),
+            "bids": int(len(self.tender)),
+            "vendors": len(self.vendor_names),
+            "vendor_pairs": int(len(self.pair_keys)),
+            "built_at": self.built_at
+        }
+
+    def _pair(self, a: int, b: int) -> Optional[int]:
+        lo, hi = min(a, b), max(a, b)
+        key = lo * len(self.vendor_names) + hi
+        i = int(np.searchsorted(self.pair_keys, key))
+        return i if i < len(self.pair_keys) and self.pair_keys[i] == key else None
+
+    def _neighbours(self, v: int) -> np.ndarray:
+        """Indices into the pair arrays of every pair that includes vendor v"""
+        n = len(self.vendor_names)
+        lo = np.arange(*np.searchsorted(self.pair_keys, [v * n, (v + 1) * n]))
+        hi = self.by_hi[np.arange(*np.searchsorted(self.hi_keys, [v * n, (v + 1) * n]))]
+        return np.concatenate([lo, hi])
+
+    def vendor_stats(self, v: int, exclude: Optional[int] = None) -> dict:
+        """Participation, wins and losing-margin stats; `exclude` leaves one tender out"""
+        bids, wins, losses = int(self.bids[v]), float(self.wins[v]), int(self.losses[v])
+        margin_sum, margin_sumsq = float(self.margin_sum[v]), float(self.margin_sumsq[v])
+        if exclude is not None:
+            rows = np.arange(self.starts[exclude], self.starts[exclude + 1])
+            mine = rows[self.vendor[rows] == v]
+            for r in mine:
+                bids -= 1
+                wins -= float(self.won[r])
+                if not self.won[r] and self.winner[exclude] >= 0 and self.win_amount[exclude] > 0:
+                    m = (self.amount[r] - self.win_amount[exclude]) / self.win_amount[exclude]
+                    losses -= 1
+                    margin_sum -= m
+                    margin_sumsq -= m * m
+        mean = margin_sum / losses if losses else None
+        std = float(np.sqrt(max(margin_sumsq / losses - mean * mean, 0.0))) if losses else None
+        win_rate = wins / bids if bids else 0.0
+        cover = (
+            losses >= COVER_MIN_LOSSES
+            and 0 < mean <= COVER_MAX_MARGIN
+            and std <= COVER_MAX_MARGIN_STD
+            and win_rate <= COVER_MAX_WIN_RATE
+        )
+        return {
+            "vendor": self.vendor_names[v],
+            "bids": bids,
+            "wins": int(wins),
+            "win_rate": round(win_rate, 3),
+            "losses": losses,
+            "losing_margin_mean": round(mean, 4) if mean is not None else None,
+            "losing_margin_std": round(std, 4) if std is not None else None,
+            "cover_bidding": bool(cover),
+            "clustered_tenders": int(self.clustered_bids[v]),
+            "cobidders": int(self.cobidders[v]),
+            "rotation_partners": int(self.rotation_partners[v])
+        }
+
+    def vendor_signals(self, name: str, top: int = 5) -> Optional[dict]:
+        v = self.vendor_index.get(vendor_key(name))
+        if v is None:
+            return None
+        stats = self.vendor_stats(v)
+        pairs = self._neighbours(v)
+        pairs = pairs[np.argsort(-self.pair_shared[pairs], kind="stable")][:top]
+        stats["top_cobidders"] = [self._pair_info(p, v) for p in pairs]
+        return stats
+
+    def _pair_info(self, p: int, v: int) -> dict:
+        lo, hi = int(self.pair_lo[p]), int(self.pair_hi[p])
+        other = hi if lo == v else lo
+        wins_v, wins_other = (self.pair_wins_lo[p], self.pair_wins_hi[p]) if lo == v else (self.pair_wins_hi[p], self.pair_wins_lo[p])
+        return {
+            "vendor": self.vendor_names[other],
+            "shared_tenders": int(self.pair_shared[p]),
+            "wins": int(wins_v),
+            "partner_wins": int(wins_other),
+            "rotation": bool(self.rotation[p])
+        }
+
+    def department_share(self, department: str, v: int, exclude: Optional[int] = None) -> Optional[dict]:
+        d = self.department_index.get(" ".join(department.lower().split()))
+        if d is None:
+            return None
+        tenders = int(self.department_tenders[d])
+        key = d * len(self.vendor_names) + v
+        i = int(np.searchsorted(self.dv_keys, key))
+        wins = int(self.dv_wins[i]) if i < len(self.dv_keys) and self.dv_keys[i] == key else 0
+        if exclude is not None and self.department[exclude] == d:
+            tenders -= 1
+            wins -= int(self.winner[exclude] == v)
+        return {"tenders": tenders, "wins": wins, "share": round(wins / tenders, 3) if tenders else 0.0}
+
+    def case_signals(self, case) -> dict:
+        """Signals for one ProcurementCase against history (its own past copy left out)"""
+        bids = [(b.vendor_name, b.bid_amount) for b in case.bids]
+        amounts = np.array([a for _, a in bids], dtype=np.float64)
+        cv = _cv(amounts)
+        exclude = self.tender_index.get(case.tender_id)
+        known = []
+        for name, _ in bids:
+            v = self.vendor_index.get(vendor_key(name))
+            if v is not None and v not in [k for _, k in known]:
+                known.append((name, v))
+
+        stats = {v: self.vendor_stats(v, exclude) for _, v in known}
+        vendors = [stats[v] for _, v in known if stats[v]["bids"] > 0]
+
+        rotation = []
+        for i, (_, a) in enumerate(known):
+            for _, b in known[i + 1:]:
+                p = self._pair(a, b)
+                if p is None:
+                    continue
+                shared, wins_lo, wins_hi = int(self.pair_shared[p]), int(self.pair_wins_lo[p]), int(self.pair_wins_hi[p])
+                if exclude is not None and self.vendor_in_tender(a, exclude) and self.vendor_in_tender(b, exclude):
+                    shared -= 1
+                    winner = int(self.winner[exclude])
+                    wins_lo -= int(winner == self.pair_lo[p])
+                    wins_hi -= int(winner == self.pair_hi[p])
+                lo, hi = min(a, b), max(a, b)
+                flagged = rotation_flags(
+                    np.array([shared]), np.array([wins_lo]), np.array([wins_hi]),
+                    np.array([stats[lo]["bids"]]), np.array([stats[hi]["bids"]])
+                )[0]
+                if flagged:
+                    rotation.append({
+                        "vendors": [self.vendor_names[lo], self.vendor_names[hi]],
+                        "shared_tenders": shared,
+                        "wins": [wins_lo, wins_hi]
+                    })
+
+        selected = self.vendor_index.get(vendor_key(case.selected_vendor or ""))
+        department = self.department_share(case.department, selected, exclude) if selected is not None else None
+        return {
+            "history": self.size,
+            "price_cv": round(cv, 4) if cv is not None else None,
+            "price_clustering": cv is not None and len(bids) >= CLUSTER_MIN_BIDS and cv < CLUSTER_MAX_CV,
+            "vendors": vendors,
+            "cover_bidders": [s["vendor"] for s in vendors if s["cover_bidding"]],
+            "rotation_pairs": rotation,
+            "selected_department_share": department
+        }
+
+    def vendor_in_tender(self, v: int, t: int) -> bool:
+        return bool(np.any(self.vendor[self.starts[t]:self.starts[t + 1]] == v))
+
+    def tender_signals(self, tender_id: str) -> Optional[dict]:
+        """Signals for a tender already in history, computed from its stored bids"""
+        t = self.tender_index.get(tender_id)
+        if t is None:
+            return None
+        rows = slice(self.starts[t], self.starts[t + 1])
+        winner = int(self.winner[t])
+        return {
+            "tender_id": tender_id,
+            "bids": [
+                {"vendor": self.vendor_names[v], "amount": float(a), "won": bool(w)}
+                for v, a, w in zip(self.vendor[rows], self.amount[rows], self.won[rows])
+            ],
+            "winner": self.vendor_names[winner] if winner >= 0 else None,
+            "price_cv": None if np.isnan(self.cv[t]) else round(float(self.cv[t]), 4),
+            "price_clustering": bool(self.clustered[t])
+        }
+
+    def flagged(self, top: int = 20) -> dict:
+        """Vendors and pairs flagged across the whole corpus, strongest first"""
+        n = len(self.vendor_names)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(self.losses > 0, self.margin_sum / np.maximum(self.losses, 1), np.nan)
+            std = np.sqrt(np.maximum(self.margin_sumsq / np.maximum(self.losses, 1) - mean ** 2, 0))
+            win_rate = self.wins / np.maximum(self.bids, 1)
+        cover = (
+            (self.losses >= COVER_MIN_LOSSES) & (mean > 0) & (mean <= COVER_MAX_MARGIN)
+            & (std <= COVER_MAX_MARGIN_STD) & (win_rate <= COVER_MAX_WIN_RATE)
+        )
+        cover_ids = np.flatnonzero(cover)
+        cover_ids = cover_ids[np.argsort(-self.losses[cover_ids], kind="stable")][:top]
+        rotation_ids = np.flatnonzero(self.rotation)
+        rotation_ids = rotation_ids[np.argsort(-self.pair_shared[rotation_ids], kind="stable")][:top]
+        return {
+            "cover_bidders": [self.vendor_stats(int(v)) for v in cover_ids],
+            "rotation_pairs": [
+                {
+                    "vendors": [self.vendor_names[int(self.pair_lo[p])], self.vendor_names[int(self.pair_hi[p])]],
+                    "shared_tenders": int(self.pair_shared[p]),
+                    "wins": [int(self.pair_wins_lo[p]), int(self.pair_wins_hi[p])]
+                }
+                for p in rotation_ids
+            ],
+            "clustered_tenders": int(self.clustered.sum()),
+            "vendors": n
+        }
+
+def rotation_flags(shared: np.ndarray, wins_a: np.ndarray, wins_b: np.ndarray,
+                   bids_a: np.ndarray, bids_b: np.ndarray) -> np.ndarray:
+    """Pairs that mostly bid together, between them win most shared tenders, and take turns"""
+    shared = np.maximum(shared, 1)
+    affinity = shared / np.maximum(np.minimum(bids_a, bids_b), 1)
+    share = (wins_a + wins_b) / shared
+    balance = np.minimum(wins_a, wins_b) / np.maximum(np.maximum(wins_a, wins_b), 1)
+    return (
+        (shared >= MIN_SHARED_TENDERS) & (affinity >= ROTATION_MIN_AFFINITY)
+        & (share >= ROTATION_MIN_SHARE) & (balance >= ROTATION_MIN_BALANCE)
+    )
+
+def format_signals(signals: dict) -> str:
+    """Prompt section for the agents; empty when history says nothing about this case"""
+    lines = []
+    if signals["price_clustering"]:
+        lines.append(f"- Price clustering: bids within {signals['price_cv']:.1%} of each other (coefficient of variation)")
+    for pair in signals["rotation_pairs"]:
+        a, b = pair["vendors"]
+        lines.append(
+            f"- Possible bid rotation: {a} and {b} bid together in {pair['shared_tenders']} past tenders "
+            f"and won {pair['wins'][0]} and {pair['wins'][1]} of them"
+        )
+    for v in signals["vendors"]:
+        if v["cover_bidding"]:
+            lines.append(
+                f"- Possible cover bidding: {v['vendor']} lost {v['losses']} past tenders by "
+                f"{v['losing_margin_mean']:.1%} ± {v['losing_margin_std']:.1%} over the winning bid"
+            )
+    share = signals["selected_department_share"]
+    if share and share["tenders"] >= DEPARTMENT_MIN_TENDERS:
+        lines.append(f"- Selected vendor won {share['wins']} of {share['tenders']} past tenders in this department ({share['share']:.0%})")
+    for v in signals["vendors"]:
+        lines.append(f"- {v['vendor']}: {v['bids']} past bids, {v['wins']} wins, {v['cobidders']} distinct co-bidders")
+    if not lines:
+        return ""
+    history = signals["history"]
+    return (
+        f"BID HISTORY SIGNALS ({history['tenders']:,} past tenders, {history['bids']:,} bids; computed, not proof):\n"
+        + "\n".join(lines)
+    )
+
+_history: Optional[BidHistory] = None
+
+def get_bid_history() -> Optional[BidHistory]:
+    """Current snapshot, or None before the first build (or with analytics off)"""
+    return _history
+
+def rebuild_bid_history() -> BidHistory:
+    """Build a fresh snapshot and swap it in (blocking; run it in a worker thread)"""
+    global _history
+    started = time.perf_counter()
+    history = BidHistory.from_cases(history_cases())
+    _history = history
+    size = history.size
+    print(f"[Analytics] Bid history: {size['tenders']} tenders, {size['bids']} bids, {size['vendor_pairs']} vendor pairs in {time.perf_counter() - started:.2f}s")
+    return history
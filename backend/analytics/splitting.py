@@ -0,0 +1,255 @@
+"""Requirement splitting: sub-threshold limited tenders that add up past Rule 149
+
+A department that needs ₹60L of laptops but buys them as three ₹20L
+limited tenders avoids the open tender Rule 149 requires at ₹25L. One case
+cannot show this, so every reviewed limited tender below the threshold is
+kept in an index keyed by (department, vendor, item category), plus
+(department, any vendor, item category) for splits spread across vendors.
+
+Each key holds its tenders sorted by publication date with running totals,
+so the combined value of the tenders within TENDER_SPLIT_WINDOW_DAYS of a
+new case is two bisects and a subtraction: O(log n) per check. Tenders
+usually arrive in date order and are appended; an out-of-order one is
+inserted and the running totals after it recomputed.
+"""
+
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from models.schemas import RuleFinding
+from rag.knowledge_base import GFR_RULES
+from utils.tender_chunks import vendor_key
+from .collusion import history_cases
+
+ANY_VENDOR = ""
+MAX_LISTED_TENDERS = 10
+
+# Title keywords -> item category; titles with none of these fall back to their normalised wording
+CATEGORY_KEYWORDS = (
+    ("it_hardware", ("computer", "laptop", "desktop", "printer", "server", "ups", "projector", "tablet", "scanner")),
+    ("it_services", ("software", "website", "network", "cctv", "data entry", "cloud")),
+    ("furniture", ("furniture", "chair", "table", "almirah", "cupboard", "desk")),
+    ("stationery", ("stationery", "printing", "paper", "toner", "cartridge")),
+    ("medical", ("medical", "medicine", "drug", "surgical", "hospital", "ventilator", "oxygen", "diagnostic")),
+    ("civil_works", ("construction", "civil", "road", "building", "repair", "renovation", "painting", "plumbing")),
+    ("electrical", ("electrical", "wiring", "lighting", "led", "generator", "solar", "transformer")),
+    ("vehicles", ("vehicle", "car", "bus", "truck", "ambulance", "taxi")),
+    ("maintenance", ("maintenance", "amc", "housekeeping", "cleaning", "security guard", "manpower")),
+    ("consultancy", ("consultancy", "consultant", "survey", "audit", "training", "study")),
+)
+_KEYWORD_PATTERNS = tuple(
+    (category, re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")s?\b"))
+    for category, keywords in CATEGORY_KEYWORDS
+)
+# Lot/phase markers and filler words that differ between the pieces of one split requirement
+_TITLE_NOISE = re.compile(
+    r"\b(?:lot|phase|part|batch|package|tranche|set|no)\b\.?\s*[-:#]?\s*(?:[0-9]+|[ivx]+|[a-z])?\b"
+    r"|\b(?:supply|procurement|purchase|providing|of|for|and|the|at|in|to|with)\b|[0-9]+|[^a-z ]"
+)
+
+@lru_cache(maxsize=65536)
+def item_category(title: str) -> str:
+    """Coarse item category of a tender from its title"""
+    text = title.lower()
+    for category, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(text):
+            return category
+    words = _TITLE_NOISE.sub(" ", text).split()
+    return " ".join(words[:3])
+
+# Titles and vendor names repeat across a history load
+_vendor_key = lru_cache(maxsize=65536)(vendor_key)
+
+def _ordinal(value: str) -> Optional[int]:
+    try:
+        return date.fromisoformat(value.strip()[:10]).toordinal()
+    except (ValueError, AttributeError):
+        return None
+
+class _Series:
+    """Tenders for one key, sorted by date, with running totals of their values"""
+
+    __slots__ = ("dates", "values", "ids", "totals")
+
+    def __init__(self):
+        self.dates: List[int] = []
+        self.values: List[float] = []
+        self.ids: List[str] = []
+        self.totals: List[float] = [0.0]  # totals[i] = sum(values[:i])
+
+    def insert(self, day: int, value: float, tender_id: str) -> None:
+        pos = bisect_right(self.dates, day)
+        self.dates.insert(pos, day)
+        self.values.insert(pos, value)
+        self.ids.insert(pos, tender_id)
+        if pos == len(self.dates) - 1:
+            self.totals.append(self.totals[-1] + value)
+        else:
+            self._retotal(pos)
+
+    def remove(self, day: int, tender_id: str) -> None:
+        pos = bisect_left(self.dates, day)
+        while self.ids[pos] != tender_id:
+            pos += 1
+        del self.dates[pos], self.values[pos], self.ids[pos]
+        self.totals.pop()
+        self._retotal(pos)
+
+    def _retotal(self, start: int) -> None:
+        del self.totals[start + 1:]
+        for value in self.values[start:]:
+            self.totals.append(self.totals[-1] + value)
+
+    def window(self, first: int, last: int) -> Tuple[int, int, float]:
+        """Index range and combined value of the tenders dated first..last inclusive"""
+        i, j = bisect_left(self.dates, first), bisect_right(self.dates, last)
+        return i, j, self.totals[j] - self.totals[i]
+
+class SplitIndex:
+    """Incrementally maintained index of sub-threshold limited tenders"""
+
+    def __init__(self, window_days: int = 90):
+        self.window_days = window_days
+        self.threshold = GFR_RULES["rule_149"]["threshold"]
+        self._series: Dict[Tuple[str, str, str], _Series] = {}
+        self._entries: Dict[str, Tuple[Tuple[tuple, ...], int, float]] = {}  # tender_id -> keys, date, value
+        self._lock = threading.Lock()
+        self.stats = {"checks": 0, "clusters": 0}
+
+    def _entry(self, case: dict) -> Optional[Tuple[str, Tuple[tuple, ...], int, float]]:
+        """(tender_id, keys, date, value) for an eligible case, else None"""
+        value = case.get("estimated_value") or 0
+        if case.get("procurement_method") != "limited_tender" or not 0 < value < self.threshold:
+            return None
+        day = _ordinal(case.get("publication_date") or "")
+        if day is None or not case.get("tender_id"):
+            return None
+        department = " ".join((case.get("department") or "").lower().split())
+        category = item_category(case.get("title") or "")
+        keys = ((department, _vendor_key(case.get("selected_vendor") or ""), category), (department, ANY_VENDOR, category))
+        return case["tender_id"], keys, day, float(value)
+
+    def _series_for(self, key: tuple) -> _Series:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    def add(self, case: dict, replace: bool = True) -> bool:
+        """Index one case; a tender already indexed is updated (or kept, with replace=False)"""
+        entry = self._entry(case)
+        if entry is None:
+            return False
+        tender_id, keys, day, value = entry
+        with self._lock:
+            previous = self._entries.get(tender_id)
+            if previous is not None:
+                if not replace or previous == (keys, day, value):
+                    return False
+                for key in previous[0]:
+                    self._series[key].remove(previous[1], tender_id)
+            for key in keys:
+                self._series_for(key).insert(day, value, tender_id)
+            self._entries[tender_id] = (keys, day, value)
+        return True
+
+    def check(self, case: dict) -> Optional[dict]:
+        """Largest cluster around this case whose combined value reaches the threshold, or None
+
+        The case's own value counts once whether or not it is already indexed.
+        Windows ending and starting at its publication date are both checked.
+        """
+        entry = self._entry(case)
+        if entry is None:
+            return None
+        tender_id, keys, day, value = entry
+        best = None
+        with self._lock:
+            self.stats["checks"] += 1
+            indexed = self._entries.get(tender_id)
+            for key in keys:
+                series = self._series.get(key)
+                if series is None:
+                    continue
+                for first, last in ((day - self.window_days, day), (day, day + self.window_days)):
+                    i, j, total = series.window(first, last)
+                    others = j - i
+                    # An earlier review of this same tender must not count as a second piece
+                    if indexed is not None and key in indexed[0] and first <= indexed[1] <= last:
+                        others -= 1
+                        total -= indexed[2]
+                    combined = total + value
+                    if others and combined >= self.threshold and (best is None or combined > best["combined_value"]):
+                        best = {
+                            "department": case.get("department"),
+                            "category": key[2],
+                            "same_vendor": key[1] != ANY_VENDOR,
+                            "vendor": case.get("selected_vendor") if key[1] != ANY_VENDOR else None,
+                            "window_days": self.window_days,
+                            "from": date.fromordinal(first).isoformat(),
+                            "to": date.fromordinal(last).isoformat(),
+                            "tenders": others + 1,
+                            "combined_value": combined,
+                            "threshold": self.threshold,
+                            "tender_ids": [t for t in series.ids[i:i + MAX_LISTED_TENDERS + 1] if t != tender_id][:MAX_LISTED_TENDERS]
+                        }
+            if best is not None:
+                self.stats["clusters"] += 1
+        return best
+
+    def load(self, cases) -> int:
+        """Index historical cases without overwriting tenders recorded live meanwhile
+
+        Entries are sorted by date first so every insert is an append.
+        """
+        entries = sorted(filter(None, map(self._entry, cases)), key=lambda e: e[2])
+        loaded = 0
+        with self._lock:
+            for tender_id, keys, day, value in entries:
+                if tender_id in self._entries:
+                    continue
+                for key in keys:
+                    self._series_for(key).insert(day, value, tender_id)
+                self._entries[tender_id] = (keys, day, value)
+                loaded += 1
+        return loaded
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "tenders": len(self._entries),
+                "keys": len(self._series),
+                "window_days": self.window_days,
+                "threshold": self.threshold,
+                **self.stats
+            }
+
+def split_finding(cluster: dict) -> RuleFinding:
+    """Rule 149 finding for a cluster; not an auto-reject, since splitting needs human confirmation"""
+    who = f"awarded to {cluster['vendor']}" if cluster["same_vendor"] else "across vendors"
+    return RuleFinding(
+        rule="rule_149",
+        check="requirement_splitting",
+        severity="high" if cluster["same_vendor"] else "medium",
+        auto_reject=False,
+        message=(
+            f"Possible splitting to avoid open tender: {cluster['tenders']} limited tenders for "
+            f"{cluster['category'].replace('_', ' ')} by {cluster['department']} {who} within "
+            f"{cluster['window_days']} days total ₹{cluster['combined_value']:,.0f}, over the "
+            f"₹{cluster['threshold']:,.0f} open tender threshold"
+        ),
+        evidence={k: cluster[k] for k in ("category", "from", "to", "tenders", "combined_value", "tender_ids")}
+    )
+
+def load_split_history() -> int:
+    """Index the review store and BID_HISTORY_PATH into split_index (run once at startup)"""
+    loaded = split_index.load(history_cases())
+    print(f"[Analytics] Indexed {loaded} sub-threshold limited tenders for split detection")
+    return loaded
+
+split_index = SplitIndex(window_days=settings.TENDER_SPLIT_WINDOW_DAYS)
@@ -0,0 +1,275 @@
+"""Local stand-in for Ollama's /api/chat, /api/tags and /api/ps
+
+Answers with schema-valid JSON when the request carries a `format` schema
+(agents, verdicts, tender parsing) and with plain prose otherwise (bench
+chat). Prefill latency, token rate (per model, for cascade runs), agent
+score spread and failures are configurable so load tests can run without a
+model.
+
+Run standalone:
+    python -m benchmark.fake_ollama --port 11434 --token-rate 200 --fail-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+@dataclass
+class FakeOllamaConfig:
+    models: List[str] = field(default_factory=lambda: ["gemma3:4b"])
+    loaded: Optional[List[str]] = None  # models in memory (/api/ps); None = all of `models`
+    load_latency: float = 1.0  # first call to a model that is not loaded yet
+    prefill_latency: float = 0.05  # seconds before the first token
+    token_rate: float = 200.0  # tokens per second (0 = instant)
+    model_speed: Dict[str, float] = field(default_factory=dict)  # per-model multiplier of token rate and prefill speed
+    score_spread: int = 0  # agent scores drawn from 75 +/- this instead of a fixed 75
+    chars_per_token: int = 4
+    fail_rate: float = 0.0  # fraction of chat calls that fail
+    fail_mode: str = "error"  # error (HTTP 500) | garbage (non-JSON) | truncate (cut mid-JSON) | hang
+    max_parallel: int = 0  # like OLLAMA_NUM_PARALLEL; 0 = unlimited
+    cache_slots: int = 4  # recent prompts kept for prefix reuse (prompt_eval_count counts only the rest)
+    seed: int = 0
+
+def _resolve(schema: dict, root: dict) -> dict:
+    ref = schema.get("$ref")
+    if ref:
+        # Pydantic emits local refs like #/$defs/VendorBid
+        node = root
+        for part in ref.lstrip("#/").split("/"):
+            node = node[part]
+        return node
+    return schema
+
+def sample_from_schema(schema: dict, root: dict = None, name: str = "") -> object:
+    """Smallest plausible instance of a JSON schema (enough for Pydantic validation)"""
+    root = root or schema
+    schema = _resolve(schema, root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if _resolve(s, root).get("type") != "null"] or schema[key]
+            return sample_from_schema(options[0], root, name)
+    kind = schema.get("type", "object")
+    if kind == "object":
+        props = schema.get("properties", {})
+        if not props:
+            return {"issue": "Sample finding", "severity": "low", "rule_violated": "GFR Rule 144", "evidence": "synthetic"}
+        return {k: sample_from_schema(v, root, k) for k, v in props.items()}
+    if kind == "array":
+        return [sample_from_schema(schema.get("items", {}), root, name)]
+    if kind == "integer":
+        return 75
+    if kind == "number":
+        return 75.0 if "score" in name else 1500000.0
+    if kind == "boolean":
+        return True
+    samples = {
+        "stance": "approve",
+        "verdict": "APPROVE",
+        "procurement_method": "open_tender",
+        "publication_date": "2024-01-01",
+        "bid_opening_date": "2024-01-31"
+    }
+    return samples.get(name, f"sample {name}".strip())
+
+def _prompt_text(body: dict) -> str:
+    return "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in body.get("messages", []))
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+def create_app(config: FakeOllamaConfig = None) -> FastAPI:
+    config = config or FakeOllamaConfig()
+    rng = random.Random(config.seed)
+    slots = asyncio.Semaphore(config.max_parallel) if config.max_parallel else None
+    app = FastAPI(title="Fake Ollama")
+    app.state.config = config
+    app.state.stats = {"chat_calls": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0, "cached_chars": 0}
+    recent_prompts: List[str] = []
+    loaded = list(config.models if config.loaded is None else config.loaded)
+
+    def uncached_chars(body: dict) -> int:
+        """Like Ollama's KV cache: the longest prefix shared with a recent prompt is free"""
+        text = _prompt_text(body)
+        cached = max((_common_prefix(text, p) for p in recent_prompts), default=0)
+        if config.cache_slots:
+            recent_prompts.insert(0, text)
+            del recent_prompts[config.cache_slots:]
+        app.state.stats["cached_chars"] += cached
+        return len(text) - cached
+
+    def vary_scores(value: object) -> object:
+        """Spread every opinion's score (and matching stance) around 75"""
+        if isinstance(value, dict):
+            if isinstance(value.get("score"), int) and "stance" in value:
+                value["score"] = max(0, min(100, 75 + rng.randint(-config.score_spread, config.score_spread)))
+                value["stance"] = "approve" if value["score"] >= 80 else "conditional" if value["score"] >= 60 else "reject"
+            for item in value.values():
+                vary_scores(item)
+        return value
+
+    def completion(body: dict) -> str:
+        schema = body.get("format")
+        if isinstance(schema, dict):
+            sample = sample_from_schema(schema)
+            return json.dumps(vary_scores(sample) if config.score_spread else sample)
+        if schema == "json":
+            return json.dumps({"answer": "sample"})
+        return "The Bench holds that the procurement followed GFR 2017 Rule 149. " * 3
+
+    def tokens(text: str) -> List[str]:
+        step = config.chars_per_token
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def final_chunk(body: dict, prompt_chars: int, n_tokens: int, started: float, rate: float, prefill: float) -> dict:
+        prompt_tokens = prompt_chars // config.chars_per_token
+        eval_ns = int(n_tokens / rate * 1e9) if rate else 0
+        return {
+            "model": body.get("model"),
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": n_tokens,
+            "eval_duration": eval_ns
+        }
+
+    def pick_failure() -> str:
+        if config.fail_rate and rng.random() < config.fail_rate:
+            app.state.stats["failures"] += 1
+            return config.fail_mode
+        return ""
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": m, "model": m} for m in config.models]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": m, "model": m} for m in loaded]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        stats = app.state.stats
+        stats["chat_calls"] += 1
+        if body.get("model") not in config.models:
+            return JSONResponse(status_code=404, content={"error": f"model '{body.get('model')}' not found"})
+
+        if body.get("model") not in loaded:
+            await asyncio.sleep(config.load_latency)
+            if body.get("model") not in loaded:
+                loaded.append(body.get("model"))
+
+        if not body.get("messages"):
+            # Ollama's preload request: load the model, generate nothing
+            return {"model": body.get("model"), "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "load"}
+
+        failure = pick_failure()
+        if failure == "error":
+            return JSONResponse(status_code=500, content={"error": "injected failure"})
+        if failure == "hang":
+            await asyncio.sleep(3600)
+
+        text = completion(body)
+        prompt_chars = uncached_chars(body)
+        if failure == "garbage":
+            text = "I'm sorry, I cannot help with that."
+        elif failure == "truncate":
+            text = text[: len(text) // 2]
+        parts = tokens(text)
+        speed = config.model_speed.get(body.get("model"), 1.0)
+        rate = config.token_rate * speed
+        prefill = config.prefill_latency / speed
+        delay = 1 / rate if rate else 0
+
+        async def generate():
+            started = time.perf_counter()
+            if slots:
+                await slots.acquire()
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(prefill)
+                for part in parts:
+                    if delay:
+                        await asyncio.sleep(delay)
+                    yield {"model": body.get("model"), "message": {"role": "assistant", "content": part}, "done": False}
+                yield final_chunk(body, prompt_chars, len(parts), started, rate, prefill)
+            finally:
+                stats["in_flight"] -= 1
+                if slots:
+                    slots.release()
+
+        if body.get("stream", True):
+            async def ndjson():
+                async for chunk in generate():
+                    yield json.dumps(chunk) + "\n"
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        final = None
+        async for chunk in generate():
+            final = chunk
+        final["message"]["content"] = text
+        return final
+
+    @app.post("/fake/unload")
+    async def unload():
+        """Drop every model from memory, like an idle keep_alive expiry"""
+        loaded.clear()
+        return {"models": []}
+
+    @app.get("/fake/stats")
+    async def fake_stats():
+        return app.state.stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", default="gemma3:4b", help="Comma-separated model names to report as installed")
+    parser.add_argument("--loaded", default=None, help="Comma-separated models already in memory (default: all of --models)")
+    parser.add_argument("--load-latency", type=float, default=1.0, help="Seconds to load a model on its first call")
+    parser.add_argument("--prefill-latency", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--model-speed", default="", help="Per-model speed multipliers, e.g. gemma3:1b=3,gemma3:4b=1")
+    parser.add_argument("--score-spread", type=int, default=0, help="Draw agent scores from 75 +/- this (0 = always 75)")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-mode", default="error", choices=["error", "garbage", "truncate", "hang"])
+    parser.add_argument("--max-parallel", type=int, default=0)
+    parser.add_argument("--cache-slots", type=int, default=4, help="Recent prompts kept for prefix reuse (0 = no prompt cache)")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeOllamaConfig(
+        models=args.models.split(","),
+        loaded=[m for m in args.loaded.split(",") if m] if args.loaded is not None else None,
+        load_latency=args.load_latency,
+        prefill_latency=args.prefill_latency,
+        token_rate=args.token_rate,
+        model_speed={m: float(x) for m, x in (p.split("=") for p in args.model_speed.split(",") if p)},
+        score_spread=args.score_spread,
+        fail_rate=args.fail_rate,
+        fail_mode=args.fail_mode,
+        max_parallel=args.max_parallel,
+        cache_slots=args.cache_slots
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Offline load test for the Nyaya AI backend
+
+Starts the fake Ollama server(s) and the API as subprocesses (or targets a
+running API with --target), drives /analyze, /ws/analyze, /parse_tender and
+/ask_bench at a fixed concurrency and reports throughput, p50/p95/p99
+latency and time to first event per endpoint.
+
+Examples:
+    python -m benchmark.load_test --requests 40 --concurrency 8
+    python -m benchmark.load_test --endpoints ws --token-rate 50 --fail-rate 0.1
+    python -m benchmark.load_test --json --max-p95 analyze=2.5 --max-error-rate 0.05
+    python -m benchmark.load_test --endpoints analyze --backends 3 --max-parallel 2 --env LLM_MAX_IN_FLIGHT=2
+    python -m benchmark.load_test --endpoints analyze --cascade gemma3:1b=3 --score-spread 15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("analyze", "ws", "parse", "ask")
+WS_FIRST_EVENTS = {"token", "field", "finding", "complete"}
+CASCADE_FINAL_MODEL = "gemma3:4b"  # MODEL_NAME of the spawned API under --cascade
+
+TENDER_TEXT = """NOTICE INVITING TENDER No. {tender_id}
+Department of Health, Government of NCT. Supply of Hospital Beds.
+Estimated value Rs 45,00,000. Procurement method: open tender.
+Published 2024-02-01, bids open 2024-03-05.
+Bidders: MedEquip Pvt Ltd (Rs 42,00,000, MSME, technical 82), CareBeds Ltd (Rs 43,50,000, technical 88).
+"""
+
+@dataclass
+class Sample:
+    latency: float
+    first_event: Optional[float]
+    ok: bool
+    error: str = ""
+
+@dataclass
+class EndpointReport:
+    name: str
+    samples: List[Sample] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def summary(self) -> dict:
+        ok = [s for s in self.samples if s.ok]
+        latencies = sorted(s.latency for s in ok)
+        firsts = sorted(s.first_event for s in ok if s.first_event is not None)
+        errors = {}
+        for s in self.samples:
+            if not s.ok:
+                errors[s.error] = errors.get(s.error, 0) + 1
+        return {
+            "endpoint": self.name,
+            "requests": len(self.samples),
+            "errors": len(self.samples) - len(ok),
+            "error_rate": round((len(self.samples) - len(ok)) / len(self.samples), 4) if self.samples else 0.0,
+            "throughput_rps": round(len(ok) / self.wall_time, 2) if self.wall_time else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "ttfe_p50": percentile(firsts, 50),
+            "ttfe_p95": percentile(firsts, 95),
+            "error_kinds": errors
+        }
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return round(values[rank], 4)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def unique_case(case: dict, key: str, run_id: str) -> dict:
+    """Vary the tender id so the verdict cache doesn't turn the run into a cache benchmark"""
+    return {**case, "tender_id": f"{case['tender_id']}-{run_id}-{key}"}
+
+# ---------------------------------------------------------------------------
+# Per-endpoint clients. Each returns a Sample; time to first event is the
+# first response byte for HTTP and the first model-derived message (token,
+# field or completed result) for WebSocket; status chatter doesn't count.
+# ---------------------------------------------------------------------------
+
+async def timed_post(client: httpx.AsyncClient, path: str, payload: dict) -> Sample:
+    start = time.perf_counter()
+    first = None
+    try:
+        async with client.stream("POST", path, json=payload) as response:
+            body = b""
+            async for chunk in response.aiter_bytes():
+                if first is None:
+                    first = time.perf_counter() - start
+                body += chunk
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return Sample(latency, first, False, f"HTTP {response.status_code}")
+        json.loads(body)
+        return Sample(latency, first, True)
+    except Exception as e:
+        return Sample(time.perf_counter() - start, first, False, type(e).__name__)
+
+async def run_analyze(client, ctx, i) -> Sample:
+    return await timed_post(client, "/analyze", unique_case(ctx["case"], f"rest-{i}", ctx["run_id"]))
+
+async def run_parse(client, ctx, i) -> Sample:
+    return await timed_post(client, "/parse_tender", {"text": TENDER_TEXT.format(tender_id=f"BENCH-{i}")})
+
+async def run_ask(client, ctx, i) -> Sample:
+    payload = {"case_data": ctx["case"], "verdict_data": ctx["verdict"], "question": f"Why this score? ({i})"}
+    return await timed_post(client, "/ask_bench", payload)
+
+async def run_ws(client, ctx, i) -> Sample:
+    url = ctx["target"].replace("http", "ws", 1) + "/ws/analyze"
+    start = time.perf_counter()
+    first = None
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=ctx["timeout"]) as ws:
+            await ws.send(json.dumps(unique_case(ctx["case"], f"ws-{i}", ctx["run_id"])))
+            while True:
+                message = json.loads(await asyncio.wait_for(ws.recv(), ctx["timeout"]))
+                if first is None and message.get("status") in WS_FIRST_EVENTS:
+                    first = time.perf_counter() - start
+                if message.get("status") == "error":
+                    return Sample(time.perf_counter() - start, first, False, "ws_error")
+                if message.get("status") == "verdict_prose":
+                    break
+                if message.get("status") == "complete" and not message.get("prose_pending"):
+                    break
+        return Sample(time.perf_counter() - start, first, True)
+    except Exception as e:
+        return Sample(time.perf_counter() - start, first, False, type(e).__name__)
+
+RUNNERS = {"analyze": run_analyze, "ws": run_ws, "parse": run_parse, "ask": run_ask}
+
+async def drive(name: str, client: httpx.AsyncClient, ctx: dict, total: int, concurrency: int) -> EndpointReport:
+    """Closed-loop load: `concurrency` workers issue `total` requests back to back"""
+    report = EndpointReport(name)
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            report.samples.append(await RUNNERS[name](client, ctx, i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report.wall_time = time.perf_counter() - start
+    return report
+
+# ---------------------------------------------------------------------------
+# Process management
+# ---------------------------------------------------------------------------
+
+def spawn(args: List[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+async def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+def cascade_fake_args(args) -> List[str]:
+    """Fake Ollama flags serving the --cascade tier next to CASCADE_FINAL_MODEL"""
+    if not args.cascade:
+        return []
+    model, _, speed = args.cascade.partition("=")
+    return ["--models", f"{model},{CASCADE_FINAL_MODEL}", "--model-speed", f"{model}={speed or 1}"]
+
+def cascade_env(args) -> Dict[str, str]:
+    if not args.cascade:
+        return {}
+    model = args.cascade.partition("=")[0]
+    return {"MODEL_CASCADE": "true", "CASCADE_MODELS": json.dumps([model]), "MODEL_NAME": CASCADE_FINAL_MODEL}
+
+def start_stack(args) -> tuple:
+    """Fake Ollama backend(s) + API on free local ports; returns (api_url, processes, ollama_urls)"""
+    ollama_ports, api_port = [free_port() for _ in range(args.backends)], free_port()
+    fakes = [spawn([
+        "-m", "benchmark.fake_ollama",
+        "--port", str(port),
+        "--prefill-latency", str(args.prefill_latency),
+        "--token-rate", str(args.token_rate),
+        "--fail-rate", str(args.fail_rate),
+        "--fail-mode", args.fail_mode,
+        "--max-parallel", str(args.max_parallel),
+        "--score-spread", str(args.score_spread),
+        *cascade_fake_args(args)
+    ], {}) for port in ollama_ports]
+    ollama_urls = [f"http://127.0.0.1:{port}" for port in ollama_ports]
+    env = {
+        "OLLAMA_URLS": ",".join(ollama_urls),
+        "VERDICT_CACHE_PATH": "",
+        **cascade_env(args),
+        **dict(kv.split("=", 1) for kv in args.env)
+    }
+    api = spawn(["-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"], env)
+    return f"http://127.0.0.1:{api_port}", [*fakes, api], ollama_urls
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def fmt(value, unit="s") -> str:
+    return "-" if value is None else f"{value:.3f}{unit}"
+
+def print_table(summaries: List[dict]):
+    header = f"{'endpoint':<10}{'reqs':>6}{'errs':>6}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'ttfe p50':>11}{'ttfe p95':>11}"
+    print(header)
+    print("-" * len(header))
+    for s in summaries:
+        print(
+            f"{s['endpoint']:<10}{s['requests']:>6}{s['errors']:>6}{s['throughput_rps']:>9.2f}"
+            f"{fmt(s['p50']):>10}{fmt(s['p95']):>10}{fmt(s['p99']):>10}{fmt(s['ttfe_p50']):>11}{fmt(s['ttfe_p95']):>11}"
+        )
+        if s["error_kinds"]:
+            print(f"{'':<10}errors: {s['error_kinds']}")
+
+def check_thresholds(summaries: List[dict], max_p95: Dict[str, float], max_error_rate: Optional[float]) -> List[str]:
+    failures = []
+    for s in summaries:
+        limit = max_p95.get(s["endpoint"])
+        if limit is not None and (s["p95"] is None or s["p95"] > limit):
+            failures.append(f"{s['endpoint']}: p95 {fmt(s['p95'])} > {limit:.3f}s")
+        if max_error_rate is not None and s["error_rate"] > max_error_rate:
+            failures.append(f"{s['endpoint']}: error rate {s['error_rate']:.2%} > {max_error_rate:.2%}")
+    return failures
+
+async def run(args) -> int:
+    processes = []
+    fake_urls = []
+    target = args.target
+    if not target:
+        target, processes, fake_urls = start_stack(args)
+    try:
+        await wait_ready(f"{target}/")
+        timeout = httpx.Timeout(args.timeout)
+        limits = httpx.Limits(max_connections=args.concurrency * 2)
+        async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+            case = (await client.get(f"/{args.case}")).json()
+            ctx = {"target": target, "case": case, "run_id": f"{int(time.time())}", "timeout": args.timeout}
+            if "ask" in args.endpoints:
+                # /ask_bench needs a verdict to discuss; build one through the normal path
+                response = await client.post("/analyze", json=unique_case(case, "seed", ctx["run_id"]))
+                response.raise_for_status()
+                ctx["verdict"] = response.json()
+
+            summaries = []
+            for name in args.endpoints:
+                report = await drive(name, client, ctx, args.requests, args.concurrency)
+                summaries.append(report.summary())
+
+            extra = {}
+            for path in ("/scheduler/stats", "/llm/stats", "/llm/cascade"):
+                try:
+                    extra[path] = (await client.get(path)).json()
+                except Exception:
+                    pass
+            if fake_urls:
+                extra["fake_ollama"] = [(await client.get(f"{url}/fake/stats")).json() for url in fake_urls]
+
+        if args.json:
+            print(json.dumps({"config": vars(args), "results": summaries, "server": extra}, indent=2, default=str))
+        else:
+            print(f"\nTarget {target}  concurrency={args.concurrency}  requests/endpoint={args.requests}\n")
+            print_table(summaries)
+            for url, stats in zip(fake_urls, extra.get("fake_ollama", [])):
+                print(f"\nFake Ollama {url}: {stats}")
+            cascade = extra.get("/llm/cascade", {})
+            if cascade.get("enabled"):
+                latency = cascade["latency"]
+                print(
+                    f"\nCascade {' -> '.join(cascade['tiers'])}: escalation rate {cascade['escalation_rate']} "
+                    f"{cascade['reasons']}, est. agent time saved {latency['saved_pct']}%"
+                )
+
+        failures = check_thresholds(summaries, args.max_p95, args.max_error_rate)
+        for failure in failures:
+            print(f"THRESHOLD FAILED {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        name, _, seconds = value.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{name}' in --max-p95")
+        thresholds[name] = float(seconds)
+    return thresholds
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against a fake Ollama backend")
+    parser.add_argument("--target", default="", help="Benchmark a running API instead of spawning one")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--case", default="sample-case-compliant", help="Sample-case endpoint used as the request template")
+    parser.add_argument("--prefill-latency", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-mode", default="error", choices=["error", "garbage", "truncate", "hang"])
+    parser.add_argument("--max-parallel", type=int, default=0, help="Fake Ollama parallel slots (0 = unlimited)")
+    parser.add_argument("--backends", type=int, default=1, help="Fake Ollama instances behind the API's router")
+    parser.add_argument("--cascade", default="", metavar="MODEL=SPEED", help=f"Turn on the model cascade with MODEL (SPEED x faster) before {CASCADE_FINAL_MODEL}")
+    parser.add_argument("--score-spread", type=int, default=0, help="Fake agent scores spread around 75 (exercises borderline escalation)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra settings for the spawned API")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--max-p95", action="append", default=[], metavar="ENDPOINT=SECONDS")
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    args = parser.parse_args()
+
+    args.endpoints = [e for e in args.endpoints.split(",") if e]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    args.max_p95 = parse_thresholds(args.max_p95)
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
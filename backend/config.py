@@ -1,10 +1,125 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     APP_NAME: str = "Nyaya AI"
     OLLAMA_URL: str = "http://localhost:11434"
+    # Several Ollama backends, comma-separated (empty = OLLAMA_URL only); see utils/backends.py
+    OLLAMA_URLS: str = ""
     MODEL_NAME: str = "gemma3:4b"
+    # Vector index directory (memory-mapped embeddings, see rag/vector_index.py)
     CHROMA_PATH: str = "./chroma_db"
+    RAG_CORPUS_PATH: str = ""  # extra directory of *.jsonl passages
+    RAG_TOP_K: int = 6  # retrieved passages per case, on top of the pinned rules
+    RAG_EMBEDDING_DIM: int = 1024  # hashing embedder width
+    RAG_EMBEDDING_MODEL: str = ""  # local sentence-transformers model dir; empty = hashing
+    # Give each agent only the rules tagged for it, within a prompt-token budget
+    CONTEXT_SLICING: bool = True
+    AGENT_CONTEXT_TOKENS: int = 600
+    AGENT_CONTEXT_BUDGETS: Dict[str, int] = {}  # per-agent overrides, e.g. {"legality": 900}
+
+    # Ollama HTTP client (shared, keep-alive pooled)
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 300.0  # longest single generation
+    OLLAMA_MAX_CONNECTIONS: int = 16
+    OLLAMA_MAX_KEEPALIVE: int = 8
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0
+    # How long Ollama keeps MODEL_NAME loaded after a call ("-1" = never unload)
+    OLLAMA_KEEP_ALIVE: str = "-1"
+    # Backend routing: least_outstanding | latency; health check period (0 = off)
+    # and circuit breaker (consecutive failures to open, seconds before a retry)
+    LLM_ROUTING: str = "least_outstanding"
+    OLLAMA_HEALTH_INTERVAL: float = 10.0
+    BREAKER_FAILURES: int = 3
+    BREAKER_COOLDOWN: float = 30.0
+    # Load MODEL_NAME (and the cascade tiers) on every backend at startup and after an idle unload
+    # (checked each health interval); /health/ready stays 503 until one has it
+    OLLAMA_WARMUP: bool = True
+    OLLAMA_WARMUP_TIMEOUT: float = 600.0
+
+    # Verdict cache (empty path = memory only)
+    VERDICT_CACHE_ENABLED: bool = True
+    VERDICT_CACHE_SIZE: int = 256
+    VERDICT_CACHE_TTL: float = 3600.0
+    VERDICT_CACHE_PATH: str = ""
+    # Seconds a cache write waits before the snapshot at VERDICT_CACHE_PATH is rewritten
+    VERDICT_CACHE_FLUSH_SECONDS: float = 5.0
+
+    # Deterministic GFR pre-pass: off | advise (inject findings) | short_circuit (REJECT without LLM)
+    RULE_ENGINE_MODE: str = "advise"
+
+    # /analyze/batch: max cases per request and concurrent LLM calls across the batch
+    BATCH_MAX_CASES: int = 1000
+    BATCH_LLM_CONCURRENCY: int = 4
+
+    # Global LLM scheduler: in-flight cap per backend and queued-call limits per priority (0 = unbounded)
+    LLM_MAX_IN_FLIGHT: int = 4
+    LLM_QUEUE_LIMIT_INTERACTIVE: int = 60
+    LLM_QUEUE_LIMIT_DEFAULT: int = 60
+    LLM_QUEUE_LIMIT_BATCH: int = 0
+    LLM_QUEUE_LIMIT_TOTAL: int = 120
+
+    # Structured output: schema-constrained decoding and repair retries per failing call
+    LLM_STRUCTURED_OUTPUT: bool = True
+    LLM_MAX_REPAIR_RETRIES: int = 1
+
+    # per_agent (five calls) | full_bench (one combined call, per-agent fallback)
+    ANALYSIS_MODE: str = "per_agent"
+    FULL_BENCH_NUM_PREDICT: int = 6000
+
+    # llm (Chief Justice LLM call) | local (computed, templated prose) |
+    # local_prose (computed; LLM writes summary/actions, after 'complete' on WebSocket)
+    VERDICT_MODE: str = "local_prose"
+
+    # Model cascade (agents/cascade.py): agents run on CASCADE_MODELS first,
+    # smallest first, and MODEL_NAME is the last tier. An opinion is re-run on
+    # the next tier for each CASCADE_ESCALATE_ON reason it meets: invalid
+    # (fails validation), borderline (score within CASCADE_SCORE_MARGIN of a
+    # decision-matrix boundary), rule_conflict (approves what a rule check
+    # flagged high or critical for that agent)
+    MODEL_CASCADE: bool = False
+    CASCADE_MODELS: List[str] = ["gemma3:1b"]
+    CASCADE_SCORE_MARGIN: float = 5.0
+    CASCADE_ESCALATE_ON: List[str] = ["invalid", "borderline", "rule_conflict"]
+
+    # /parse_tender: texts longer than one chunk are split at section
+    # boundaries and the chunks extracted concurrently, then merged
+    TENDER_CHUNK_CHARS: int = 6000
+    TENDER_CHUNK_CONCURRENCY: int = 4
+    TENDER_MAX_CHARS: int = 2000000
+
+    # Regex fast path before the LLM parser (utils/tender_extract.py): fields
+    # at or above this confidence are kept as extracted and the LLM is asked
+    # only for the rest (or skipped when every required field resolves)
+    TENDER_FASTPATH: bool = True
+    TENDER_FASTPATH_CONFIDENCE: float = 0.8
+
+    # Review history (SQLite, WAL); "" disables persistence and /reviews
+    VERDICT_STORE_PATH: str = "verdicts.db"
+    REVIEWS_PAGE_MAX: int = 500
+
+    # Cross-tender collusion signals (analytics/collusion.py) for the Equity
+    # agent: history is the review store plus BID_HISTORY_PATH (*.jsonl of
+    # ProcurementCase objects, a file or a directory), rebuilt periodically
+    COLLUSION_ANALYTICS: bool = True
+    BID_HISTORY_PATH: str = ""
+    COLLUSION_REFRESH_SECONDS: float = 300.0
+
+    # Requirement splitting (analytics/splitting.py): sub-₹25L limited tenders
+    # by one department for one item category whose values add up past the
+    # Rule 149 threshold within this many days become a rule finding
+    TENDER_SPLIT_DETECTION: bool = True
+    TENDER_SPLIT_WINDOW_DAYS: int = 90
+
+    # Bench chat sessions (/bench/sessions): idle TTL in seconds, LRU size,
+    # and question/answer pairs kept in each session's history
+    BENCH_SESSION_MAX: int = 512
+    BENCH_SESSION_TTL: float = 1800.0
+    BENCH_SESSION_MAX_TURNS: int = 20
+
+    # Per-request timing breakdown in AnalysisResult.timings (also ?timings=true)
+    TIMING_BREAKDOWN: bool = False
     
     class Config:
         env_file = ".env"
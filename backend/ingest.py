@@ -0,0 +1,383 @@
+"""Resumable bulk ingestion of tender dumps (JSONL or CSV)
+
+Runs the same pipeline as the API in-process, without HTTP: records that
+are raw tender text go through parse_tender first, every case through the
+full analysis (rule pre-pass, cache, agents, verdict, review store), at
+batch priority. Records are read lazily and fed to a fixed pool of workers
+through a bounded queue, so memory stays flat however large the dump is.
+
+Each result is appended to the output as one NDJSON line (index, case_id,
+result or error) as soon as it finishes. A checkpoint next to the output
+records the lowest index below which everything is done, the few finished
+records above it, and the output size at that moment; a restarted run
+truncates the output to that size and skips finished records, so nothing
+is lost or written twice. Failed records are written with their error and
+count as done, except transient LLM failures (no healthy backend, connection
+errors): those are retried with backoff, and if they persist the run stops
+with the record left undone (exit 2) so a resumed run picks it up. The run
+also stops once more than --max-errors records have failed (exit 1).
+
+Records: a ProcurementCase object, or {"text": "..."} with raw tender text
+(an optional "id" labels it in the output). CSV columns are the
+ProcurementCase fields (bids as a JSON list, documents_available as a JSON
+list or ;-separated) or a single text column.
+
+Examples:
+    python -m ingest dump.jsonl -o results.jsonl --concurrency 8
+    python -m ingest q3.csv -o q3.results.jsonl --parse-only
+    python -m ingest dump.jsonl -o results.jsonl --restart
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Iterator, Optional, Set, Tuple
+
+import httpx
+from fastapi import HTTPException, Response
+
+import main as api
+from models.schemas import AnalysisResult, ParseTenderRequest, ProcurementCase
+from utils.scheduler import Priority, SchedulerBusy, llm_priority
+
+PROGRESS_SECONDS = 5.0
+# LLM failures that say nothing about the record; never written as its result
+TRANSIENT_ERRORS = (SchedulerBusy, httpx.TransportError)
+RETRY_BACKOFF = 5.0  # seconds before the first retry, doubled each time
+MAX_BACKOFF = 120.0
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+def input_format(path: str, requested: str) -> str:
+    if requested != "auto":
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def count_records(path: str, fmt: str) -> int:
+    """Records in the file, in one streaming pass (CSV rows may span lines)"""
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)
+    count = 0
+    with open(path, "rb") as f:
+        for line in f:
+            count += bool(line.strip())
+    return count
+
+def csv_record(row: dict) -> dict:
+    """CSV row as a ProcurementCase-shaped dict (or a raw text record)"""
+    row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+    if row.get("text") and not row.get("tender_id"):
+        return {"text": row["text"], "id": row.get("id")}
+    if row.get("bids"):
+        row["bids"] = json.loads(row["bids"])
+    documents = row.get("documents_available", "")
+    row["documents_available"] = json.loads(documents) if documents.startswith("[") else [d.strip() for d in documents.split(";") if d.strip()]
+    return row
+
+def read_records(path: str, fmt: str, skip: Set[int]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(index, record, decode error) for every record not in `skip`, without decoding skipped ones"""
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            for index, values in enumerate(reader):
+                if index in skip:
+                    continue
+                try:
+                    yield index, csv_record(dict(zip(header, values))), None
+                except (ValueError, TypeError) as e:
+                    yield index, None, f"{type(e).__name__}: {e}"
+            return
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            if index not in skip:
+                try:
+                    yield index, json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield index, None, f"JSONDecodeError: {e}"
+            index += 1
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+class Checkpoint:
+    """Finished records as a low watermark plus the finished indices above it"""
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.watermark = 0
+        self.done_above: Set[int] = set()
+        self.output_bytes = 0
+        self.counts = {"ok": 0, "errors": 0}
+
+    @classmethod
+    def load(cls, path: str, source: str) -> "Checkpoint":
+        checkpoint = cls(path, source)
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data["source"] != source:
+            raise SystemExit(f"Checkpoint {path} belongs to a different input ({data['source']}); use --restart")
+        checkpoint.watermark = data["watermark"]
+        checkpoint.done_above = set(data["done_above"])
+        checkpoint.output_bytes = data["output_bytes"]
+        checkpoint.counts = data["counts"]
+        return checkpoint
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done_above
+
+    def mark(self, index: int, ok: bool) -> None:
+        self.counts["ok" if ok else "errors"] += 1
+        self.done_above.add(index)
+        while self.watermark in self.done_above:
+            self.done_above.discard(self.watermark)
+            self.watermark += 1
+
+    def save(self, output_bytes: int) -> None:
+        """Atomically replace the checkpoint file"""
+        self.output_bytes = output_bytes
+        data = {
+            "source": self.source,
+            "watermark": self.watermark,
+            "done_above": sorted(self.done_above),
+            "output_bytes": output_bytes,
+            "counts": self.counts,
+            "saved_at": time.time()
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+class SkipSet:
+    """Membership view over a checkpoint for read_records"""
+
+    def __init__(self, checkpoint: Checkpoint):
+        self.checkpoint = checkpoint
+
+    def __contains__(self, index: int) -> bool:
+        return self.checkpoint.is_done(index)
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+async def parse_record(record: dict) -> Tuple[ProcurementCase, str]:
+    """Raw tender text through parse_tender (fast path, hybrid, chunked or LLM)"""
+    response = Response()
+    try:
+        parsed = await api.parse_tender(ParseTenderRequest(text=record["text"]), response)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+    return ProcurementCase(**parsed), response.headers.get("X-Parse-Path", "")
+
+async def process(index: int, record: dict, args) -> dict:
+    line = {"index": index, "case_id": record.get("tender_id") or record.get("id")}
+    if "text" in record and "tender_id" not in record:
+        case, path = await parse_record(record)
+        line.update({"case_id": case.tender_id, "parse_path": path})
+    else:
+        case = ProcurementCase(**record)
+    if args.parse_only:
+        line["case"] = case.model_dump(mode="json")
+        return line
+    result = await api.run_analysis(case, cache_source="ingest", mode=args.mode)
+    line["result"] = AnalysisResult(**result).model_dump(mode="json")
+    return line
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    delay = min(MAX_BACKOFF, RETRY_BACKOFF * 2 ** attempt)
+    return max(delay, error.retry_after) if isinstance(error, SchedulerBusy) else delay
+
+def fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class Progress:
+    def __init__(self, total: Optional[int], already_done: int):
+        self.total = total
+        self.already_done = already_done
+        self.processed = 0
+        self.started = time.monotonic()
+        self.last_print = self.started
+
+    def line(self, checkpoint: Checkpoint) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        done = self.already_done + self.processed
+        text = f"[Ingest] {done:,}"
+        if self.total:
+            remaining = max(0, self.total - done)
+            eta = fmt_duration(remaining / rate) if rate > 0 else "-"
+            text += f"/{self.total:,} ({done / self.total:.1%}) ETA {eta}"
+        return text + f"  {rate:.2f} rec/s  errors {checkpoint.counts['errors']:,}  elapsed {fmt_duration(elapsed)}"
+
+    def tick(self, checkpoint: Checkpoint, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self.last_print >= PROGRESS_SECONDS:
+            self.last_print = now
+            print(self.line(checkpoint), file=sys.stderr, flush=True)
+
+async def ingest(args) -> int:
+    fmt = input_format(args.input, args.format)
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    source = os.path.abspath(args.input)
+    if args.restart:
+        for path in (checkpoint_path, args.output):
+            if os.path.exists(path):
+                os.remove(path)
+    checkpoint = Checkpoint.load(checkpoint_path, source)
+
+    # Drop lines written after the last checkpoint; their records run again
+    size = os.path.getsize(args.output) if os.path.exists(args.output) else 0
+    if size < checkpoint.output_bytes:
+        raise SystemExit(f"{args.output} is shorter than its checkpoint records; use --restart")
+    out = open(args.output, "r+b" if size else "w+b")
+    out.truncate(checkpoint.output_bytes)
+    out.seek(checkpoint.output_bytes)
+
+    total = None if args.no_count else count_records(args.input, fmt)
+    if args.limit:
+        total = min(total, args.limit) if total is not None else args.limit
+    already_done = checkpoint.watermark + len(checkpoint.done_above)
+    if already_done:
+        print(f"[Ingest] Resuming: {already_done:,} records already done ({checkpoint.counts['errors']:,} errors)", file=sys.stderr)
+    progress = Progress(total, already_done)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    since_save = 0
+    stopped: Optional[str] = None
+    exit_code = 0
+
+    def stop(reason: str, code: int) -> None:
+        nonlocal stopped, exit_code
+        if stopped is None:
+            stopped, exit_code = reason, code
+            print(f"[Ingest] Stopping: {reason}", file=sys.stderr, flush=True)
+
+    def finish(index: int, line: dict) -> None:
+        nonlocal since_save
+        # Write and mark together (no await in between) so the output offset
+        # saved with the checkpoint covers exactly the records marked done
+        out.write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+        checkpoint.mark(index, "error" not in line)
+        progress.processed += 1
+        if args.max_errors is not None and checkpoint.counts["errors"] > args.max_errors:
+            stop(f"more than {args.max_errors} records failed", 1)
+        since_save += 1
+        if since_save >= args.checkpoint_every:
+            save()
+        progress.tick(checkpoint)
+
+    def save() -> None:
+        nonlocal since_save
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint.save(out.tell())
+        since_save = 0
+
+    async def producer():
+        for index, record, error in read_records(args.input, fmt, SkipSet(checkpoint)):
+            if stopped or (args.limit and index >= args.limit):
+                break
+            await pending.put((index, record, error))
+        for _ in range(args.concurrency):
+            await pending.put(None)
+
+    async def attempt(index: int, record: dict) -> Optional[dict]:
+        """Result or error line; None if transient LLM failures outlast the retries (record left undone)"""
+        for tries in range(args.retries + 1):
+            try:
+                return await process(index, record, args)
+            except TRANSIENT_ERRORS as e:
+                if stopped:
+                    return None
+                if tries == args.retries:
+                    stop(f"LLM unavailable after {tries + 1} attempts at record {index}: {type(e).__name__}: {e}", 2)
+                    return None
+                delay = retry_delay(e, tries)
+                print(f"[Ingest] Record {index}: {type(e).__name__}: {e}; retrying in {delay:.0f}s", file=sys.stderr, flush=True)
+                await asyncio.sleep(delay)
+            except Exception as e:
+                return {"index": index, "case_id": record.get("tender_id") or record.get("id"), "error": f"{type(e).__name__}: {str(e)}"}
+
+    async def worker():
+        llm_priority.set(Priority.BATCH)
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            if stopped:
+                continue  # drained unmarked: runs again on resume
+            index, record, error = item
+            if error is None:
+                line = await attempt(index, record)
+                if line is None:
+                    continue
+            else:
+                line = {"index": index, "case_id": None, "error": error}
+            finish(index, line)
+
+    async with api.lifespan(api.app):
+        tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            save()
+            out.close()
+            progress.tick(checkpoint, force=True)
+
+    summary = {
+        "input": args.input,
+        "output": args.output,
+        "processed": progress.processed,
+        "skipped": already_done,
+        **checkpoint.counts,
+        "stopped": stopped,
+        "elapsed_s": round(time.monotonic() - progress.started, 1)
+    }
+    print(json.dumps(summary))
+    return exit_code
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse and analyze a JSONL/CSV tender dump, resumably")
+    parser.add_argument("input", help="JSONL or CSV file of ProcurementCase records or raw tender text")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON results file (appended to on resume)")
+    parser.add_argument("--format", default="auto", choices=["auto", "jsonl", "csv"])
+    parser.add_argument("--concurrency", type=int, default=4, help="Records in flight at once")
+    parser.add_argument("--mode", default=None, choices=["per_agent", "full_bench"], help="Overrides ANALYSIS_MODE")
+    parser.add_argument("--parse-only", action="store_true", help="Parse tender text into cases without analyzing them")
+    parser.add_argument("--checkpoint", default="", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--checkpoint-every", type=int, default=50, help="Save the checkpoint after this many records")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and output and start over")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N records of the input")
+    parser.add_argument("--no-count", action="store_true", help="Skip the counting pass (no percentage or ETA)")
+    parser.add_argument("--max-errors", type=int, default=None, help="Stop (exit 1) once more records than this have failed")
+    parser.add_argument("--retries", type=int, default=5, help="Retries of a record on transient LLM errors before stopping (exit 2)")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.checkpoint_every < 1:
+        parser.error("--concurrency and --checkpoint-every must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries must be at least 0")
+    sys.exit(asyncio.run(ingest(args)))
+
+if __name__ == "__main__":
+    main()
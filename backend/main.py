@@ -1,34 +1,108 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Dict, List, Literal, Optional
+from contextlib import asynccontextmanager
+from functools import partial
 import asyncio
 import json
+import sqlite3
 import time
-import random
 
-from models.schemas import ProcurementCase, AnalysisResult, ParseTenderRequest, ChatRequest, ChatResponse
+from models.schemas import ProcurementCase, PartialProcurementCase, AnalysisResult, AgentOpinion, CourtVerdict, Verdict, FullBenchOpinions, VerdictProse, ParseTenderRequest, ChatRequest, ChatResponse, BenchSessionRequest, BenchSessionResponse, BenchQuestion, ReviewPage
 from agents.prompts import (
     MASTER_SYSTEM_PROMPT,
+    AGENT_SYSTEM_PROMPT,
     TRANSPARENCY_AGENT_PROMPT,
     EQUITY_AGENT_PROMPT,
     LEGALITY_AGENT_PROMPT,
     ACCOUNTABILITY_AGENT_PROMPT,
     SOCIAL_JUSTICE_AGENT_PROMPT,
     CHIEF_JUSTICE_PROMPT,
+    FULL_BENCH_PROMPT,
+    VERDICT_PROSE_PROMPT,
     TENDER_PARSER_PROMPT,
+    TENDER_CHUNK_PROMPT,
+    TENDER_FILL_PROMPT,
     BENCH_CHAT_PROMPT
 )
-from rag.knowledge_base import get_relevant_rules
-from utils.llm_client import call_ollama, parse_json_response
+from agents.chief_justice import synthesize_verdict
+from agents.cascade import run_cascade, cascade_models, cascade_fingerprint, cascade_report
+from rag.knowledge_base import get_relevant_rules, get_agent_contexts, get_index
+from rag.rule_engine import evaluate_case, has_auto_reject, format_findings, rule_based_result
+from utils.llm_client import call_ollama, stream_ollama, stream_ollama_json, init_client, close_client
+from utils.backends import get_router
+from utils.cache import verdict_cache, case_cache_key
+from utils.sessions import bench_sessions, BenchSession
+from utils.verdict_store import get_verdict_store, close_verdict_store, parse_time
+from utils.usage import usage_report
+from utils.structured import call_structured, ensure_structured, validate_output, validate_sections, schema_for, stats_report, StructuredOutputError
+from utils.scheduler import scheduler, Priority, SchedulerBusy, llm_priority, request_queue_wait, start_request_tracking
+from utils.metrics import render_metrics, start_timing, stage, agent_scope, record_analysis, record_tender_parse
+from utils.tender_chunks import split_sections, merge_partials, fields_found
+from utils.tender_extract import extract_fields, unresolved_fields, fill_case
+from analytics.collusion import get_bid_history, rebuild_bid_history, format_signals
+from analytics.splitting import split_index, split_finding, load_split_history
+from config import settings
 
-app = FastAPI(title="Nyaya AI", version="1.0.0")
+async def refresh_bid_history():
+    """Rebuild the collusion analytics snapshot off the event loop, then every COLLUSION_REFRESH_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(rebuild_bid_history)
+        except Exception as e:
+            print(f"[Analytics] Bid history rebuild failed: {type(e).__name__}: {e}")
+        await asyncio.sleep(settings.COLLUSION_REFRESH_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Ollama client for the whole app instead of one per call
+    await init_client()
+    # Map (or build once) the rule vector index before the first request
+    get_index()
+    get_verdict_store()
+    analytics = asyncio.create_task(refresh_bid_history()) if settings.COLLUSION_ANALYTICS else None
+    splitting = asyncio.create_task(asyncio.to_thread(load_split_history)) if settings.TENDER_SPLIT_DETECTION else None
+    yield
+    for task in (analytics, splitting):
+        if task is not None:
+            task.cancel()
+    await verdict_cache.close()
+    await close_client()
+    close_verdict_store()
+
+app = FastAPI(title="Nyaya AI", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Queue-Wait-Ms"],
 )
 
+@app.middleware("http")
+async def track_queue_wait(request: Request, call_next):
+    """Report time this request's LLM calls spent queued in the scheduler"""
+    stats = {"calls": 0, "queue_wait_ms": 0.0}
+    request_queue_wait.set(stats)
+    response = await call_next(request)
+    if stats["calls"]:
+        response.headers["X-Queue-Wait-Ms"] = f"{stats['queue_wait_ms']:.1f}"
+    return response
+
+@app.exception_handler(SchedulerBusy)
+async def scheduler_busy_handler(request: Request, exc: SchedulerBusy):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(StructuredOutputError)
+async def structured_output_handler(request: Request, exc: StructuredOutputError):
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
 def format_case(case: ProcurementCase) -> str:
     """Format case for LLM analysis"""
     bids = "\n".join([
@@ -54,14 +128,24 @@ REASON: {case.selection_reason}
 DOCUMENTS: {', '.join(case.documents_available)}
 """
 
-async def run_agent(case: ProcurementCase, agent_prompt: str, context: str) -> dict:
-    """Run a single agent analysis"""
+AGENT_PROMPTS = {
+    "transparency": TRANSPARENCY_AGENT_PROMPT,
+    "equity": EQUITY_AGENT_PROMPT,
+    "legality": LEGALITY_AGENT_PROMPT,
+    "accountability": ACCOUNTABILITY_AGENT_PROMPT,
+    "social_justice": SOCIAL_JUSTICE_AGENT_PROMPT
+}
+
+def build_agent_prompt(case: ProcurementCase, agent_prompt: str, context: str) -> str:
+    """User message for one agent over one case
+
+    Layout is stable-first for Ollama's prefix cache: the system prompt
+    (agent_system_prompt()) goes in the system message, then the agent's own
+    prompt, and only then the legal context and case text that vary per case.
+    """
     case_text = format_case(case)
     
-    prompt = f"""
-{MASTER_SYSTEM_PROMPT}
-
-{agent_prompt}
+    return f"""{agent_prompt}
 
 LEGAL CONTEXT:
 {context}
@@ -71,73 +155,389 @@ CASE TO ANALYZE:
 
 Analyze and respond in JSON only.
 """
-    
-    response = await call_ollama(prompt)
-    return parse_json_response(response)
 
-@app.get("/")
-def root():
-    return {"name": "Nyaya AI", "status": "running"}
+def agent_system_prompt() -> str:
+    """With sliced contexts the rules travel in each agent's context, not the system prompt"""
+    return AGENT_SYSTEM_PROMPT if settings.CONTEXT_SLICING else MASTER_SYSTEM_PROMPT
 
-@app.get("/health")
-async def health():
+def failed_opinion(e: StructuredOutputError) -> dict:
+    """Keep the other agents' work when one agent never produces valid JSON"""
+    return {"error": "Parse failed", "detail": e.detail, "raw": e.raw}
+
+async def run_agent(case: ProcurementCase, agent_prompt: str, context: str, llm=call_ollama, retries: Optional[int] = None) -> dict:
+    """Run a single agent analysis"""
     try:
-        import httpx
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            r = await client.get("http://localhost:11434/api/tags")
-            return {"status": "healthy", "llm": "connected"}
-    except:
-        return {"status": "unhealthy", "llm": "disconnected"}
+        return await call_structured(
+            AgentOpinion,
+            "agent",
+            build_agent_prompt(case, agent_prompt, context),
+            llm=llm,
+            system_prompt=agent_system_prompt(),
+            retries=retries
+        )
+    except StructuredOutputError as e:
+        return failed_opinion(e)
 
-@app.post("/analyze", response_model=AnalysisResult)
-async def analyze_case(case: ProcurementCase):
-    """Full constitutional analysis (REST)"""
-    
-    # Get relevant legal context
-    context = get_relevant_rules(case.estimated_value, case.procurement_method.value)
-    
-    # Run all agents in parallel
-    transparency, equity, legality, accountability, social_justice = await asyncio.gather(
-        run_agent(case, TRANSPARENCY_AGENT_PROMPT, context),
-        run_agent(case, EQUITY_AGENT_PROMPT, context),
-        run_agent(case, LEGALITY_AGENT_PROMPT, context),
-        run_agent(case, ACCOUNTABILITY_AGENT_PROMPT, context),
-        run_agent(case, SOCIAL_JUSTICE_AGENT_PROMPT, context)
-    )
-    
-    # Chief Justice verdict
-    verdict_prompt = f"""
-{CHIEF_JUSTICE_PROMPT}
+async def run_named_agent(name: str, case: ProcurementCase, context: str, llm=call_ollama, findings: list = (), first: Optional[tuple] = None) -> dict:
+    """run_agent with its LLM calls and parse time attributed to `name` in metrics
 
-{format_case(case)}
+    With MODEL_CASCADE the agent goes through the model tiers (see
+    agents/cascade.py); `first` is a (model, opinion) already in hand.
+    """
+    with agent_scope(name):
+        if not settings.MODEL_CASCADE:
+            return await run_agent(case, AGENT_PROMPTS[name], context, llm=llm)
+
+        async def attempt(model: str, retries: Optional[int]) -> dict:
+            return await run_agent(case, AGENT_PROMPTS[name], context, llm=partial(llm, model=model), retries=retries)
+
+        return await run_cascade(name, attempt, findings, first=first)
+
+AnalysisMode = Literal["per_agent", "full_bench"]
+
+def full_bench_options() -> dict:
+    # Five opinions in one generation need a bigger output budget
+    return {"num_predict": settings.FULL_BENCH_NUM_PREDICT}
+
+def full_bench_model() -> Optional[str]:
+    """Model for the combined call: the first cascade tier, or None for MODEL_NAME"""
+    return cascade_models()[0] if settings.MODEL_CASCADE else None
+
+async def run_full_bench(case: ProcurementCase, context: str, llm=call_ollama, findings: list = ()) -> dict:
+    """All five opinions from one combined generation; failed sections fall back to per-agent calls
+
+    With MODEL_CASCADE the combined call runs on the first tier and each
+    valid section continues through the cascade from there.
+    """
+    model = full_bench_model()
+    with agent_scope("full_bench"):
+        response = await llm(
+            build_agent_prompt(case, FULL_BENCH_PROMPT, context),
+            system_prompt=MASTER_SYSTEM_PROMPT,
+            format=schema_for(FullBenchOpinions),
+            tag="full_bench",
+            options=full_bench_options(),
+            **({"model": model} if model else {})
+        )
+        with stage("parse"):
+            opinions, failed = validate_sections(AgentOpinion, "full_bench_section", response, AGENT_PROMPTS)
+    if failed:
+        print(f"[FullBench] Falling back to per-agent calls for: {', '.join(failed)}")
+    redo = {name: run_named_agent(name, case, context, llm=llm, findings=findings) for name in failed}
+    if model is not None:
+        redo.update({
+            name: run_named_agent(name, case, context, llm=llm, findings=findings, first=(model, opinion))
+            for name, opinion in opinions.items()
+        })
+    if redo:
+        opinions.update(zip(redo, await asyncio.gather(*redo.values())))
+    return {name: opinions[name] for name in AGENT_PROMPTS}
+
+def rule_checks_block(findings: list) -> str:
+    """Prompt section with rule-engine findings (empty when the engine is off)"""
+    if settings.RULE_ENGINE_MODE == "off":
+        return ""
+    return f"DETERMINISTIC RULE CHECKS (computed exactly, treat as facts):\n{format_findings(findings)}"
+
+def case_retrieval_queries(case: ProcurementCase) -> List[str]:
+    return [f"{case.title} {case.selection_reason}"]
+
+# Agents that get the cross-tender bid history signals
+COLLUSION_AGENTS = ("equity",)
+
+def bid_history_block(case: ProcurementCase) -> str:
+    """Collusion signals for this case's bidders (empty until the first snapshot is built)"""
+    history = get_bid_history() if settings.COLLUSION_ANALYTICS else None
+    if history is None or not case.bids:
+        return ""
+    with stage("analytics"):
+        return format_signals(history.case_signals(case))
+
+def join_blocks(*blocks: str) -> str:
+    return "\n\n".join(b for b in blocks if b)
+
+def build_legal_context(case: ProcurementCase, findings: list, signals: str = "") -> str:
+    """Retrieved rules plus deterministic rule-engine findings and bid history signals"""
+    with stage("retrieval"):
+        context = get_relevant_rules(
+            case.estimated_value,
+            case.procurement_method.value,
+            queries=case_retrieval_queries(case)
+        )
+    return join_blocks(context, rule_checks_block(findings), signals)
+
+def build_agent_contexts(case: ProcurementCase, findings: list, signals: str = "") -> Dict[str, str]:
+    """Legal context per agent: sliced by relevance tags and budget, or shared (CONTEXT_SLICING off)"""
+    if not settings.CONTEXT_SLICING:
+        shared = build_legal_context(case, findings, signals)
+        return {name: shared for name in AGENT_PROMPTS}
+    with stage("retrieval"):
+        contexts = get_agent_contexts(
+            case.estimated_value,
+            case.procurement_method.value,
+            queries=case_retrieval_queries(case),
+            agents=list(AGENT_PROMPTS)
+        )
+    # Rule-engine findings are facts every agent should see; bid history only where it is judged
+    block = rule_checks_block(findings)
+    return {
+        name: join_blocks(context, block, signals if name in COLLUSION_AGENTS else "")
+        for name, context in contexts.items()
+    }
+
+def verdict_case_block(case: ProcurementCase, opinions: dict, findings: list) -> str:
+    """Case, agent opinions and rule checks as seen by the Chief Justice"""
+    return f"""{format_case(case)}
 
 AGENT OPINIONS:
-Transparency: {json.dumps(transparency)}
-Equity: {json.dumps(equity)}
-Legality: {json.dumps(legality)}
-Accountability: {json.dumps(accountability)}
-Social Justice: {json.dumps(social_justice)}
+Transparency: {json.dumps(opinions["transparency"])}
+Equity: {json.dumps(opinions["equity"])}
+Legality: {json.dumps(opinions["legality"])}
+Accountability: {json.dumps(opinions["accountability"])}
+Social Justice: {json.dumps(opinions["social_justice"])}
+
+{rule_checks_block(findings)}
+"""
 
+def build_verdict_prompt(case: ProcurementCase, opinions: dict, findings: list) -> str:
+    """Chief Justice user message (CHIEF_JUSTICE_PROMPT is the system message)"""
+    return f"""{verdict_case_block(case, opinions, findings)}
 Synthesize final verdict in JSON.
 """
+
+def build_prose_prompt(case: ProcurementCase, opinions: dict, findings: list, verdict: dict) -> str:
+    """Ask only for summary/actions prose around a locally computed verdict"""
+    computed = {k: verdict[k] for k in ("verdict", "constitutional_score", "score_breakdown", "critical_issues")}
+    return f"""{verdict_case_block(case, opinions, findings)}
+COMPUTED VERDICT:
+{json.dumps(computed)}
+{VERDICT_PROSE_PROMPT}"""
+
+def verdict_llm_calls() -> int:
+    """LLM calls the verdict stage makes under VERDICT_MODE"""
+    return 0 if settings.VERDICT_MODE == "local" else 1
+
+def local_verdict(opinions: dict, findings: list) -> dict:
+    try:
+        return synthesize_verdict(opinions, findings)
+    except ValueError as e:
+        raise StructuredOutputError("verdict", str(e))
+
+async def write_verdict_prose(case: ProcurementCase, opinions: dict, findings: list, verdict: dict, llm=call_ollama) -> dict:
+    """Replace the templated summary/actions with model-written prose; keep templates on failure"""
+    try:
+        prose = await call_structured(
+            VerdictProse,
+            "verdict_prose",
+            build_prose_prompt(case, opinions, findings, verdict),
+            llm=llm,
+            system_prompt=CHIEF_JUSTICE_PROMPT
+        )
+    except StructuredOutputError:
+        return verdict
+    return {**verdict, **prose}
+
+async def deliver_verdict(case: ProcurementCase, opinions: dict, findings: list, llm=call_ollama) -> dict:
+    """Chief Justice stage: LLM verdict, or computed locally per VERDICT_MODE"""
+    with stage("chief_justice"), agent_scope("chief_justice"):
+        return await _deliver_verdict(case, opinions, findings, llm=llm)
+
+async def _deliver_verdict(case: ProcurementCase, opinions: dict, findings: list, llm=call_ollama) -> dict:
+    if settings.VERDICT_MODE == "llm":
+        return await call_structured(
+            CourtVerdict,
+            "verdict",
+            build_verdict_prompt(case, opinions, findings),
+            llm=llm,
+            system_prompt=CHIEF_JUSTICE_PROMPT
+        )
+    verdict = local_verdict(opinions, findings)
+    if settings.VERDICT_MODE == "local_prose":
+        verdict = await write_verdict_prose(case, opinions, findings, verdict, llm=llm)
+    return verdict
+
+def splitting_findings(case: ProcurementCase) -> list:
+    """Check the case against recent limited tenders for splitting, then add it to the index"""
+    if not settings.TENDER_SPLIT_DETECTION:
+        return []
+    with stage("analytics"):
+        entry = case.model_dump(mode="json")
+        cluster = split_index.check(entry)
+        split_index.add(entry)
+    return [split_finding(cluster)] if cluster else []
+
+def rule_findings_for(case: ProcurementCase) -> list:
+    # Indexed even with the rule engine off, so later cases are still checked against it
+    split = splitting_findings(case)
+    return evaluate_case(case) + split if settings.RULE_ENGINE_MODE != "off" else []
+
+def should_short_circuit(findings: list) -> bool:
+    return settings.RULE_ENGINE_MODE == "short_circuit" and has_auto_reject(findings)
+
+def is_cacheable(result: dict) -> bool:
+    """Only cache results where every agent and the verdict parsed cleanly"""
+    parts = list(result["agent_opinions"].values()) + [result["verdict"]]
+    return all(isinstance(p, dict) and "error" not in p for p in parts)
+
+def analysis_cache_key(case: ProcurementCase, mode: str, findings: list, signals: str = "") -> str:
+    """Verdict cache key: the case plus every setting and signal that changes what the agents see
+
+    Findings are part of it because splitting findings depend on the other
+    tenders indexed so far, not only on the case.
+    """
+    slicing = f"sliced:{settings.AGENT_CONTEXT_TOKENS}:{sorted(settings.AGENT_CONTEXT_BUDGETS.items())}" if settings.CONTEXT_SLICING else "shared"
+    return case_cache_key(case, settings.RULE_ENGINE_MODE, mode, get_index().fingerprint, slicing, format_findings(findings), signals, cascade_fingerprint())
+
+async def store_review(case: ProcurementCase, result: dict, path: str, outcome: str, timings) -> None:
+    """Persist the review to the history database (off the event loop); failures are logged, never raised"""
+    store = get_verdict_store()
+    if store is None:
+        return
+    try:
+        await store.add_async(case.model_dump(mode="json"), result, path, outcome, timings.report())
+    except sqlite3.Error as e:
+        print(f"[Store] Failed to persist review of {case.tender_id}: {e}")
+
+async def finish_analysis(case: ProcurementCase, result: dict, path: str, outcome: str, timings, include_timings: bool) -> dict:
+    """Record the analysis in metrics and the review history; attach the breakdown if asked (never cached)"""
+    record_analysis(path, outcome, timings)
+    await store_review(case, result, path, outcome, timings)
+    return {**result, "timings": timings.report()} if include_timings else result
+
+@app.get("/")
+def root():
+    return {"name": "Nyaya AI", "status": "running"}
+
+@app.get("/health")
+def health():
+    """LLM status from the backend monitor's cached state (no calls to Ollama)"""
+    state = get_router().readiness()
+    llm = "connected" if state["ready"] else "loading" if state["warming"] else "disconnected"
+    return {
+        "status": "healthy" if state["ready"] else "unhealthy",
+        "llm": llm,
+        "model": state["model"],
+        "backends": f"{state['ready_backends']}/{state['total_backends']}"
+    }
+
+@app.get("/health/live")
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness: 200 once MODEL_NAME is loaded on an available backend, else 503 (cached state)"""
+    state = get_router().readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+async def run_analysis(case: ProcurementCase, llm=call_ollama, cache_source: str = "rest", mode: Optional[str] = None, timings: bool = False) -> dict:
+    """Rule pre-pass, cache lookup, five agents and the Chief Justice for one case"""
+    mode = mode or settings.ANALYSIS_MODE
+    request_timings = start_timing()
+
+    # Deterministic pre-pass: obvious rejects never reach the LLM
+    findings = rule_findings_for(case)
+    if should_short_circuit(findings):
+        return await finish_analysis(case, rule_based_result(case, findings), cache_source, "short_circuit", request_timings, timings)
+
+    signals = bid_history_block(case)
+    cache_key = analysis_cache_key(case, mode, findings, signals)
+    if settings.VERDICT_CACHE_ENABLED:
+        cached = verdict_cache.get(cache_key, source=cache_source)
+        if cached is not None:
+            return await finish_analysis(case, {**cached, "case_id": case.tender_id}, cache_source, "cached", request_timings, timings)
     
-    verdict_response = await call_ollama(verdict_prompt)
-    verdict = parse_json_response(verdict_response)
+    # Get relevant legal context (the combined full-bench call needs all of it)
+    if mode == "full_bench":
+        context = build_legal_context(case, findings, signals)
+    else:
+        contexts = build_agent_contexts(case, findings, signals)
+
+    # Agent call(s) + Chief Justice; reject now rather than after partial work
+    agent_calls = 1 if mode == "full_bench" else len(AGENT_PROMPTS)
+    with scheduler.admission(llm_priority.get(), calls=agent_calls + verdict_llm_calls()):
+        with stage("agents"):
+            if mode == "full_bench":
+                agent_opinions = await run_full_bench(case, context, llm=llm, findings=findings)
+            else:
+                # Run all agents in parallel
+                opinions = await asyncio.gather(*[
+                    run_named_agent(name, case, contexts[name], llm=llm, findings=findings) for name in AGENT_PROMPTS
+                ])
+                agent_opinions = dict(zip(AGENT_PROMPTS, opinions))
+        
+        # Chief Justice verdict
+        verdict = await deliver_verdict(case, agent_opinions, findings, llm=llm)
     
-    return {
+    result = {
         "case_id": case.tender_id,
-        "agent_opinions": {
-            "transparency": transparency,
-            "equity": equity,
-            "legality": legality,
-            "accountability": accountability,
-            "social_justice": social_justice
-        },
-        "verdict": verdict
+        "agent_opinions": agent_opinions,
+        "verdict": verdict,
+        "rule_findings": [f.model_dump() for f in findings]
     }
 
+    if settings.VERDICT_CACHE_ENABLED and is_cacheable(result):
+        verdict_cache.put(cache_key, result)
+
+    return await finish_analysis(case, result, cache_source, "llm", request_timings, timings)
+
+@app.post("/analyze", response_model=AnalysisResult)
+async def analyze_case(case: ProcurementCase, mode: Optional[AnalysisMode] = None, timings: bool = False):
+    """Full constitutional analysis (REST); ?mode= overrides ANALYSIS_MODE, ?timings=true adds a breakdown"""
+    return await run_analysis(case, mode=mode, timings=timings or settings.TIMING_BREAKDOWN)
+
+@app.post("/analyze/batch")
+async def analyze_batch(cases: List[ProcurementCase], mode: Optional[AnalysisMode] = None):
+    """Analyze many cases; results stream back as NDJSON in completion order"""
+
+    if len(cases) > settings.BATCH_MAX_CASES:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.BATCH_MAX_CASES} cases")
+
+    # Bound LLM calls across the whole batch; the global scheduler runs them
+    # at batch priority so interactive traffic always goes first
+    llm_slots = asyncio.Semaphore(settings.BATCH_LLM_CONCURRENCY)
+
+    async def limited_llm(prompt: str, **kwargs) -> str:
+        async with llm_slots:
+            return await call_ollama(prompt, **kwargs)
+
+    # Enough case workers to keep every LLM slot busy (each case fans out to 5 agents)
+    n_workers = min(len(cases), max(1, -(-settings.BATCH_LLM_CONCURRENCY // len(AGENT_PROMPTS)) + 1))
+    pending: asyncio.Queue = asyncio.Queue()
+    for item in enumerate(cases):
+        pending.put_nowait(item)
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        llm_priority.set(Priority.BATCH)
+        while True:
+            try:
+                index, case = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await run_analysis(case, llm=limited_llm, cache_source="batch", mode=mode)
+                line = {"index": index, "case_id": case.tender_id, "result": AnalysisResult(**result).model_dump(mode="json")}
+            except Exception as e:
+                line = {"index": index, "case_id": case.tender_id, "error": f"{type(e).__name__}: {str(e)}"}
+            await done.put(line)
+
+    async def stream():
+        workers = [asyncio.create_task(worker()) for _ in range(n_workers)]
+        try:
+            for _ in range(len(cases)):
+                line = await done.get()
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # Client went away or batch finished: stop any remaining work
+            for w in workers:
+                w.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.websocket("/ws/analyze")
-async def websocket_analyze(websocket: WebSocket):
+async def websocket_analyze(websocket: WebSocket, mode: Optional[AnalysisMode] = None, timings: bool = False):
     await websocket.accept()
     try:
         print("[WS] Connection accepted, waiting for data...")
@@ -147,111 +547,186 @@ async def websocket_analyze(websocket: WebSocket):
         print(f"[WS] Parsed JSON successfully, validating case...")
         case = ProcurementCase(**case_dict)
         print(f"[WS] Case validated: {case.tender_id}")
+        queue_stats = start_request_tracking(Priority.INTERACTIVE)
+        request_timings = start_timing()
+        include_timings = timings or settings.TIMING_BREAKDOWN
+        mode = mode or settings.ANALYSIS_MODE
+
+        # Deterministic pre-pass: obvious rejects never reach the LLM
+        findings = rule_findings_for(case)
+        if should_short_circuit(findings):
+            await websocket.send_json({"status": "info", "message": "Mandatory GFR rule violated. Issuing verdict without deliberation..."})
+            result = await finish_analysis(case, rule_based_result(case, findings), "ws", "short_circuit", request_timings, include_timings)
+            for name, opinion in result["agent_opinions"].items():
+                await websocket.send_json({"status": "progress", "agent": name, "state": "completed", "result": opinion})
+            await websocket.send_json({"status": "complete", "result": result})
+            return
+
+        # Replay a cached verdict instantly
+        signals = bid_history_block(case)
+        cache_key = analysis_cache_key(case, mode, findings, signals)
+        if settings.VERDICT_CACHE_ENABLED:
+            cached = verdict_cache.get(cache_key, source="ws")
+            if cached is not None:
+                cached = await finish_analysis(case, {**cached, "case_id": case.tender_id}, "ws", "cached", request_timings, include_timings)
+                await websocket.send_json({"status": "info", "message": "Verdict found in cache. Replaying..."})
+                for name, opinion in cached["agent_opinions"].items():
+                    await websocket.send_json({"status": "progress", "agent": name, "state": "completed", "result": opinion})
+                await websocket.send_json({"status": "complete", "result": cached, "cached": True})
+                return
         
         await websocket.send_json({"status": "info", "message": "Case received. Initializing Constitutional Bench..."})
-        await asyncio.sleep(1)
 
         # Get Context
         await websocket.send_json({"status": "info", "message": "Retrieving GFR 2017 Rules & Constitutional Articles..."})
-        context = get_relevant_rules(case.estimated_value, case.procurement_method.value)
-        await asyncio.sleep(1)
+        if mode == "full_bench":
+            context = build_legal_context(case, findings, signals)
+            contexts = {name: context for name in AGENT_PROMPTS}
+        else:
+            contexts = build_agent_contexts(case, findings, signals)
 
-        # Run Agents Sequentially for dramatic effect (or parallel with updates)
-        # Parallel is better for speed, but sequential is better for "progress" demo
-        # Let's do parallel but report start/finish
-        
-        await websocket.send_json({"status": "info", "message": "Summoning 4 AI Agents..."})
-        
-        # Define wrapper to report progress
-        async def run_agent_with_progress(name, prompt):
-            await websocket.send_json({"status": "progress", "agent": name, "state": "analyzing"})
-
-            # Simulated "Thinking" steps for better UX
-            thinking_steps = {
-                "transparency": [
-                    "Scanning tender document...",
-                    "Verifying publication date...",
-                    "Checking for missing evaluation reports..."
-                ],
-                "equity": [
-                    "Analyzing MSME status...",
-                    "Calculating price bands...",
-                    "Checking for bid rigging patterns..."
-                ],
-                "legality": [
-                    "Cross-referencing GFR Rule 144...",
-                    "Validating contract clauses...",
-                    "Checking procurement method thresholds..."
-                ],
-                "accountability": [
-                    "Tracing approval chain...",
-                    "Verifying signatory authority...",
-                    "Checking audit trail..."
-                ],
-                "social_justice": [
-                    "Checking Minimum Wages Act compliance...",
-                    "Reviewing environmental impact...",
-                    "Verifying SC/ST sub-quota..."
-                ]
-            }
+        async def stream_to_client(name: str, prompt: str, system_prompt: str, tag: str, format=None, model: Optional[str] = None) -> dict:
+            """Forward tokens and each completed field/finding as they arrive"""
+            async def on_token(token):
+                await websocket.send_json({"status": "token", "agent": name, "token": token})
+
+            async def on_event(kind, key, value):
+                if kind == "item":
+                    await websocket.send_json({"status": "finding", "agent": name, "finding": value})
+                else:
+                    await websocket.send_json({"status": "field", "agent": name, "field": key, "value": value})
+
+            return await stream_ollama_json(prompt, system_prompt, on_token=on_token, on_event=on_event, format=format, tag=tag, model=model)
 
-            # Send initial thought
-            steps = thinking_steps.get(name, ["Analyzing..."])
-            for step in steps:
-                await websocket.send_json({"status": "thought", "agent": name, "message": step})
-                await asyncio.sleep(random.uniform(0.5, 1.0)) # Simulate work
+        async def run_agent_with_progress(name, prompt, first=None):
+            """Stream one agent (through the model cascade, if on); `first` is a full_bench section to review"""
+            if first is None:
+                await websocket.send_json({"status": "progress", "agent": name, "state": "analyzing"})
+            agent_prompt = build_agent_prompt(case, prompt, contexts[name])
+            system_prompt = agent_system_prompt()
 
-            result = await run_agent(case, prompt, context)
-            await websocket.send_json({"status": "progress", "agent": name, "state": "completed", "result": result})
+            async def attempt(model: Optional[str], retries: Optional[int]) -> dict:
+                streamed = await stream_to_client(name, agent_prompt, system_prompt, "agent", format=schema_for(AgentOpinion), model=model)
+                try:
+                    return await ensure_structured(AgentOpinion, "agent", agent_prompt, streamed, llm=partial(call_ollama, model=model), system_prompt=system_prompt, retries=retries)
+                except StructuredOutputError as e:
+                    return failed_opinion(e)
+
+            async def on_escalate(model: str, reason: str):
+                await websocket.send_json({"status": "info", "message": f"{name.replace('_', ' ').title()} Agent: re-checking on {model} ({reason.replace('_', ' ')})..."})
+                await websocket.send_json({"status": "progress", "agent": name, "state": "analyzing", "model": model, "reason": reason})
+
+            with agent_scope(name):
+                if settings.MODEL_CASCADE:
+                    result = await run_cascade(name, attempt, findings, first=first, on_escalate=on_escalate)
+                else:
+                    result = await attempt(None, None)
+            if first is None or result is not first[1]:
+                await websocket.send_json({"status": "progress", "agent": name, "state": "completed", "result": result})
             return result
 
-        # Run agents
-        results = await asyncio.gather(
-            run_agent_with_progress("transparency", TRANSPARENCY_AGENT_PROMPT),
-            run_agent_with_progress("equity", EQUITY_AGENT_PROMPT),
-            run_agent_with_progress("legality", LEGALITY_AGENT_PROMPT),
-            run_agent_with_progress("accountability", ACCOUNTABILITY_AGENT_PROMPT),
-            run_agent_with_progress("social_justice", SOCIAL_JUSTICE_AGENT_PROMPT)
-        )
-        
-        transparency, equity, legality, accountability, social_justice = results
+        async def run_full_bench_with_progress() -> dict:
+            """One combined generation; each agent completes as soon as its section closes"""
+            for name in AGENT_PROMPTS:
+                await websocket.send_json({"status": "progress", "agent": name, "state": "analyzing"})
+            opinions = {}
 
-        # Chief Justice
-        await websocket.send_json({"status": "info", "message": "Chief Justice is deliberating on the verdict..."})
-        
-        verdict_prompt = f"""
-{CHIEF_JUSTICE_PROMPT}
+            async def on_token(token):
+                await websocket.send_json({"status": "token", "agent": "bench", "token": token})
 
-{format_case(case)}
+            async def on_event(kind, key, value):
+                if kind != "field" or key not in AGENT_PROMPTS:
+                    return
+                valid, _ = validate_sections(AgentOpinion, "full_bench_section", {key: value}, [key])
+                if key in valid:
+                    opinions[key] = valid[key]
+                    await websocket.send_json({"status": "progress", "agent": key, "state": "completed", "result": valid[key]})
 
-AGENT OPINIONS:
-Transparency: {json.dumps(transparency)}
-Equity: {json.dumps(equity)}
-Legality: {json.dumps(legality)}
-Accountability: {json.dumps(accountability)}
-Social Justice: {json.dumps(social_justice)}
+            model = full_bench_model()
+            with agent_scope("full_bench"):
+                await stream_ollama_json(
+                    build_agent_prompt(case, FULL_BENCH_PROMPT, context),
+                    MASTER_SYSTEM_PROMPT,
+                    on_token=on_token,
+                    on_event=on_event,
+                    format=schema_for(FullBenchOpinions),
+                    tag="full_bench",
+                    options=full_bench_options(),
+                    model=model
+                )
+            failed = [name for name in AGENT_PROMPTS if name not in opinions]
+            if failed:
+                await websocket.send_json({"status": "info", "message": f"Re-running {', '.join(failed)} individually..."})
+            redo = {name: run_agent_with_progress(name, AGENT_PROMPTS[name]) for name in failed}
+            if model is not None:
+                redo.update({
+                    name: run_agent_with_progress(name, AGENT_PROMPTS[name], first=(model, opinion))
+                    for name, opinion in opinions.items()
+                })
+            if redo:
+                opinions.update(zip(redo, await asyncio.gather(*redo.values())))
+            return {name: opinions[name] for name in AGENT_PROMPTS}
 
-Synthesize final verdict in JSON.
-"""
-        verdict_response = await call_ollama(verdict_prompt)
-        verdict = parse_json_response(verdict_response)
+        # Agent call(s) + Chief Justice; reject now rather than after partial work
+        agent_calls = 1 if mode == "full_bench" else len(AGENT_PROMPTS)
+        with scheduler.admission(Priority.INTERACTIVE, calls=agent_calls + verdict_llm_calls()):
+            await websocket.send_json({"status": "info", "message": "Summoning 5 AI Agents..."})
+
+            with stage("agents"):
+                if mode == "full_bench":
+                    agent_opinions = await run_full_bench_with_progress()
+                else:
+                    # Run agents in parallel, streaming each one's tokens
+                    results = await asyncio.gather(*[
+                        run_agent_with_progress(name, prompt) for name, prompt in AGENT_PROMPTS.items()
+                    ])
+                    agent_opinions = dict(zip(AGENT_PROMPTS, results))
+
+            # Chief Justice
+            await websocket.send_json({"status": "info", "message": "Chief Justice is deliberating on the verdict..."})
+            with stage("chief_justice"), agent_scope("chief_justice"):
+                if settings.VERDICT_MODE == "llm":
+                    verdict_prompt = build_verdict_prompt(case, agent_opinions, findings)
+                    streamed = await stream_to_client("chief_justice", verdict_prompt, CHIEF_JUSTICE_PROMPT, "verdict", format=schema_for(CourtVerdict))
+                    verdict = await ensure_structured(CourtVerdict, "verdict", verdict_prompt, streamed, system_prompt=CHIEF_JUSTICE_PROMPT)
+                else:
+                    verdict = local_verdict(agent_opinions, findings)
         
-        final_result = {
-            "case_id": case.tender_id,
-            "agent_opinions": {
-                "transparency": transparency,
-                "equity": equity,
-                "legality": legality,
-                "accountability": accountability,
-                "social_justice": social_justice
-            },
-            "verdict": verdict
-        }
+            final_result = {
+                "case_id": case.tender_id,
+                "agent_opinions": agent_opinions,
+                "verdict": verdict,
+                "rule_findings": [f.model_dump() for f in findings]
+            }
+            prose_pending = settings.VERDICT_MODE == "local_prose"
+
+            if settings.VERDICT_CACHE_ENABLED and is_cacheable(final_result) and not prose_pending:
+                verdict_cache.put(cache_key, final_result)
         
-        await websocket.send_json({"status": "complete", "result": final_result})
+            await websocket.send_json({
+                "status": "complete",
+                "result": {**final_result, "timings": request_timings.report()} if include_timings else final_result,
+                "queue_wait_ms": round(queue_stats["queue_wait_ms"], 1),
+                "prose_pending": prose_pending
+            })
+
+            # The verdict is already final; the model only polishes the public text
+            if prose_pending:
+                with stage("verdict_prose"), agent_scope("chief_justice"):
+                    final_result["verdict"] = await write_verdict_prose(case, agent_opinions, findings, verdict)
+                if settings.VERDICT_CACHE_ENABLED and is_cacheable(final_result):
+                    verdict_cache.put(cache_key, final_result)
+                message = {"status": "verdict_prose", "verdict": final_result["verdict"]}
+                if include_timings:
+                    message["timings"] = request_timings.report()
+                await websocket.send_json(message)
+            record_analysis("ws", "llm", request_timings)
+            await store_review(case, final_result, "ws", "llm", request_timings)
         
     except WebSocketDisconnect:
         print("Client disconnected")
+    except SchedulerBusy as e:
+        await websocket.send_json({"status": "error", "message": str(e), "retry_after": e.retry_after})
     except Exception as e:
         import traceback
         error_msg = f"{type(e).__name__}: {str(e)}"
@@ -259,6 +734,175 @@ Synthesize final verdict in JSON.
         traceback.print_exc()
         await websocket.send_json({"status": "error", "message": error_msg or "Unknown error occurred"})
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Verdict cache size and hit/miss counters per path (rest, ws)"""
+    return verdict_cache.info()
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Structured-output parse failure, repair and retry rates per output kind"""
+    return stats_report()
+
+@app.get("/llm/cascade")
+def llm_cascade():
+    """Model cascade: escalation rate by reason and agent, calls per tier, estimated latency saved"""
+    return cascade_report()
+
+@app.get("/llm/prefill")
+def llm_prefill():
+    """prompt_eval_count vs estimated cached prompt tokens, and prefill share of LLM time"""
+    return usage_report()
+
+@app.get("/llm/backends")
+def llm_backends():
+    """Per-backend state, calls in flight, latency estimate, breaker and loaded models"""
+    return get_router().info()
+
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    """LLM in-flight calls, queue depth per priority and admission counters"""
+    return scheduler.info()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: stage/agent latency, LLM tokens and durations, queue wait"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def review_store():
+    store = get_verdict_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Review history is disabled (VERDICT_STORE_PATH is empty)")
+    return store
+
+def review_filters(department, vendor, verdict, case_id, method, outcome, min_score, max_score, since, until, published_from, published_to) -> dict:
+    try:
+        return {
+            "department": department,
+            "selected_vendor": vendor,
+            "verdict": verdict,
+            "case_id": case_id,
+            "procurement_method": method,
+            "outcome": outcome,
+            "min_score": min_score,
+            "max_score": max_score,
+            "since": parse_time(since) if since else None,
+            "until": parse_time(until) if until else None,
+            "published_from": published_from,
+            "published_to": published_to
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+@app.get("/reviews", response_model=ReviewPage)
+def list_reviews(
+    department: Optional[str] = None,
+    vendor: Optional[str] = None,
+    verdict: Optional[Verdict] = None,
+    case_id: Optional[str] = None,
+    method: Optional[Literal["open_tender", "limited_tender", "single_source"]] = None,
+    outcome: Optional[Literal["llm", "cached", "short_circuit"]] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    published_from: Optional[str] = None,
+    published_to: Optional[str] = None,
+    sort: Literal["created_at", "score", "estimated_value"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    total: bool = False
+):
+    """Past reviews, filtered and paginated by cursor (since/until: ISO review time, published_*: YYYY-MM-DD)"""
+    filters = review_filters(department, vendor, verdict, case_id, method, outcome, min_score, max_score, since, until, published_from, published_to)
+    limit = max(1, min(limit, settings.REVIEWS_PAGE_MAX))
+    try:
+        return review_store().query(filters, sort=sort, descending=order == "desc", limit=limit, cursor=cursor, with_total=total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/reviews/summary")
+def reviews_summary(
+    group_by: Literal["department", "selected_vendor", "verdict", "procurement_method", "outcome"] = "department",
+    department: Optional[str] = None,
+    vendor: Optional[str] = None,
+    verdict: Optional[Verdict] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 50
+):
+    """Review count, mean score and verdict split per department, vendor, verdict, ..."""
+    filters = review_filters(department, vendor, verdict, None, None, None, None, None, since, until, None, None)
+    return {"group_by": group_by, "groups": review_store().summary(group_by, filters, max(1, min(limit, settings.REVIEWS_PAGE_MAX)))}
+
+@app.get("/reviews/{review_id}")
+def get_review(review_id: int):
+    """One stored review with the full case, agent opinions, verdict, findings and timings"""
+    review = review_store().get(review_id)
+    if review is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return review
+
+def bid_history():
+    history = get_bid_history() if settings.COLLUSION_ANALYTICS else None
+    if history is None:
+        raise HTTPException(status_code=503, detail="Bid history is not built yet (or COLLUSION_ANALYTICS is off)")
+    return history
+
+@app.get("/analytics/flags")
+def analytics_flags(top: int = 20):
+    """Likely cover bidders and rotating vendor pairs across all past tenders"""
+    history = bid_history()
+    return {"history": history.size, **history.flagged(max(1, min(top, settings.REVIEWS_PAGE_MAX)))}
+
+@app.get("/analytics/vendors/{name}")
+def analytics_vendor(name: str):
+    """One vendor's bids, wins, losing margins and most frequent co-bidders"""
+    signals = bid_history().vendor_signals(name)
+    if signals is None:
+        raise HTTPException(status_code=404, detail="Vendor not found in bid history")
+    return signals
+
+@app.get("/analytics/tenders/{tender_id}")
+def analytics_tender(tender_id: str):
+    signals = bid_history().tender_signals(tender_id)
+    if signals is None:
+        raise HTTPException(status_code=404, detail="Tender not found in bid history")
+    return signals
+
+@app.post("/analytics/signals")
+def analytics_signals(case: ProcurementCase):
+    """The collusion signals the Equity agent would see for this case"""
+    signals = bid_history().case_signals(case)
+    return {**signals, "context": format_signals(signals)}
+
+@app.post("/analytics/refresh")
+async def analytics_refresh():
+    """Rebuild the bid history snapshot now (e.g. after a bulk import)"""
+    if not settings.COLLUSION_ANALYTICS:
+        raise HTTPException(status_code=404, detail="COLLUSION_ANALYTICS is off")
+    history = await asyncio.to_thread(rebuild_bid_history)
+    return history.size
+
+@app.post("/analytics/splitting")
+def analytics_splitting(case: ProcurementCase):
+    """The splitting cluster this case would be flagged in (the case is not indexed)"""
+    if not settings.TENDER_SPLIT_DETECTION:
+        raise HTTPException(status_code=404, detail="TENDER_SPLIT_DETECTION is off")
+    cluster = split_index.check(case.model_dump(mode="json"))
+    return {
+        "index": split_index.info(),
+        "cluster": cluster,
+        "finding": split_finding(cluster).model_dump() if cluster else None
+    }
+
+@app.delete("/cache")
+def cache_clear():
+    """Drop all cached verdicts"""
+    verdict_cache.clear()
+    return {"status": "cleared"}
+
 @app.get("/sample-case-violation")
 def sample_case_violation():
     """Return sample case with violations (REJECT)"""
@@ -318,54 +962,288 @@ def sample_case_emergency():
         "documents_available": ["Emergency Declaration", "Sole Supplier Certificate", "Tender Notice"]
     }
 
+def check_tender_size(text: str) -> None:
+    if len(text) > settings.TENDER_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Tender text exceeds {settings.TENDER_MAX_CHARS} characters")
+
+def fast_path_fields(text: str) -> Optional[dict]:
+    """Regex extraction with per-field confidence; None when TENDER_FASTPATH is off"""
+    if not settings.TENDER_FASTPATH:
+        return None
+    with stage("parse"):
+        return extract_fields(text)
+
+def fast_path_resolved(fields: Optional[dict]) -> bool:
+    return fields is not None and not unresolved_fields(fields, settings.TENDER_FASTPATH_CONFIDENCE, required_only=True)
+
+def llm_fields_for(fields: Optional[dict]) -> Optional[List[str]]:
+    """Fields to ask the LLM for (None = all of them)"""
+    return None if fields is None else unresolved_fields(fields, settings.TENDER_FASTPATH_CONFIDENCE)
+
+def fields_to_fill(wanted: Optional[List[str]]) -> str:
+    return f"FIELDS TO FILL: {', '.join(wanted)}\n\n" if wanted else ""
+
+async def finish_tender(text: str, fields: Optional[dict], partial: Optional[dict], path: str, wanted: Optional[List[str]]) -> dict:
+    """Validated ProcurementCase dict from fast-path fields and/or the LLM's extraction"""
+    merged = fill_case(fields, settings.TENDER_FASTPATH_CONFIDENCE, partial) if fields is not None else partial
+    with stage("parse"):
+        case = merge_partials([merged])
+    if case["procurement_method"] is None:
+        case["procurement_method"] = await ask_procurement_method(text, case)
+        wanted = [*(wanted or []), "procurement_method"]
+    with stage("parse"):
+        case = validate_output(ProcurementCase, case)
+    record_tender_parse(path, wanted or [])
+    return case
+
+async def fill_tender_fields(text: str, fields: dict, wanted: List[str]) -> dict:
+    """Ask the LLM for just the fields the fast path could not resolve"""
+    known = {k: f["value"] for k, f in fields.items() if k not in wanted}
+    prompt = f"""KNOWN FIELDS:
+{json.dumps(known, ensure_ascii=False)}
+
+{fields_to_fill(wanted)}RAW TENDER TEXT:
+{text}
+"""
+    return await call_structured(PartialProcurementCase, "tender_fill", prompt, system_prompt=TENDER_FILL_PROMPT)
+
+async def ask_procurement_method(text: str, case: dict) -> str:
+    """Targeted follow-up when no extraction stated the procurement method
+
+    The method is never inferred from the estimated value: a limited tender
+    above the open-tender threshold is exactly what the rule engine checks for.
+    """
+    scheduler.admit(llm_priority.get())
+    # Long documents: the method is stated in the notice, at the top
+    excerpt = split_sections(text, settings.TENDER_CHUNK_CHARS)[0] if len(text) > settings.TENDER_CHUNK_CHARS else text
+    known = {k: {"value": v} for k, v in case.items()}
+    partial = await fill_tender_fields(excerpt, known, ["procurement_method"])
+    if not partial.get("procurement_method"):
+        raise StructuredOutputError("tender_fill", "the tender does not state its procurement method")
+    return partial["procurement_method"]
+
+async def extract_tender_chunk(index: int, total: int, chunk: str, wanted: Optional[List[str]] = None) -> Optional[dict]:
+    """Partial fields from one excerpt; None if it never yields valid JSON"""
+    prompt = f"""{fields_to_fill(wanted)}EXCERPT {index + 1} OF {total}:
+{chunk}
+"""
+    try:
+        return await call_structured(PartialProcurementCase, "tender_chunk", prompt, system_prompt=TENDER_CHUNK_PROMPT)
+    except StructuredOutputError as e:
+        print(f"[ParseTender] Chunk {index + 1}/{total} failed: {e.detail}")
+        return None
+
+async def parse_tender_chunks(chunks: List[str], on_progress=None, wanted: Optional[List[str]] = None) -> dict:
+    """Map: extract every chunk (TENDER_CHUNK_CONCURRENCY at a time). Reduce: merge_partials
+
+    on_progress(index, done, total, partial) is awaited as each chunk finishes.
+    """
+    slots = asyncio.Semaphore(settings.TENDER_CHUNK_CONCURRENCY)
+    partials: List[Optional[dict]] = [None] * len(chunks)
+    done = 0
+
+    async def extract(index: int, chunk: str):
+        nonlocal done
+        async with slots:
+            partials[index] = await extract_tender_chunk(index, len(chunks), chunk, wanted)
+        done += 1
+        if on_progress is not None:
+            await on_progress(index, done, len(chunks), partials[index])
+
+    await asyncio.gather(*(extract(i, chunk) for i, chunk in enumerate(chunks)))
+    parsed = [p for p in partials if p is not None]
+    if not parsed:
+        raise StructuredOutputError("tender_chunk", f"none of the {len(chunks)} chunks could be parsed")
+    return merge_partials(parsed)
+
+def tender_chunks_for(text: str) -> List[str]:
+    """Section-aligned chunks, after checking size and admitting the chunk calls"""
+    check_tender_size(text)
+    chunks = split_sections(text, settings.TENDER_CHUNK_CHARS)
+    scheduler.admit(llm_priority.get(), calls=min(len(chunks), settings.TENDER_CHUNK_CONCURRENCY))
+    return chunks
+
 @app.post("/parse_tender", response_model=ProcurementCase)
-async def parse_tender(request: ParseTenderRequest):
-    """Parse raw tender text into structured JSON"""
-    prompt = f"""
-{TENDER_PARSER_PROMPT}
+async def parse_tender(request: ParseTenderRequest, response: Response):
+    """Parse raw tender text into structured JSON
 
-RAW TENDER TEXT:
+    The regex fast path runs first; the LLM is asked only for the fields it
+    left unresolved (long documents are chunked and merged). X-Parse-Path
+    reports fast_path, hybrid, chunked or llm.
+    """
+    check_tender_size(request.text)
+    fields = fast_path_fields(request.text)
+    wanted = llm_fields_for(fields)
+    try:
+        if fast_path_resolved(fields):
+            path, partial = "fast_path", None
+        elif len(request.text) > settings.TENDER_CHUNK_CHARS:
+            path = "chunked"
+            partial = await parse_tender_chunks(tender_chunks_for(request.text), wanted=wanted)
+        elif fields is not None:
+            path = "hybrid"
+            scheduler.admit(llm_priority.get())
+            partial = await fill_tender_fields(request.text, fields, wanted)
+        else:
+            path = "llm"
+            scheduler.admit(llm_priority.get())
+            prompt = f"""RAW TENDER TEXT:
 {request.text}
 """
-    response = await call_ollama(prompt)
-    parsed = parse_json_response(response)
+            partial = await call_structured(ProcurementCase, "tender", prompt, system_prompt=TENDER_PARSER_PROMPT)
+        result = await finish_tender(request.text, fields, partial, path, wanted)
+    except StructuredOutputError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse tender text: {e.detail}")
+    response.headers["X-Parse-Path"] = path
+    return result
 
-    # Basic validation/cleanup if needed
-    if "error" in parsed:
-        raise HTTPException(status_code=400, detail="Failed to parse tender text")
+@app.post("/parse_tender/stream")
+async def parse_tender_stream(request: ParseTenderRequest):
+    """Chunked tender parsing with NDJSON progress: one line per finished chunk, then the result"""
+    check_tender_size(request.text)
+    fields = fast_path_fields(request.text)
+    confidence = {k: f["confidence"] for k, f in fields.items()} if fields else {}
 
-    return parsed
+    if fast_path_resolved(fields):
+        async def resolved():
+            yield json.dumps({"status": "info", "chunks": 0, "path": "fast_path", "confidence": confidence}) + "\n"
+            result = await finish_tender(request.text, fields, None, "fast_path", [])
+            yield json.dumps({"status": "complete", "result": result}, ensure_ascii=False) + "\n"
+        return StreamingResponse(resolved(), media_type="application/x-ndjson")
 
-@app.post("/ask_bench", response_model=ChatResponse)
-async def ask_bench(request: ChatRequest):
-    """Chat with the Constitutional Bench about a specific verdict"""
+    chunks = tender_chunks_for(request.text)
+    wanted = llm_fields_for(fields)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def on_progress(index, done, total, partial):
+        await events.put({
+            "status": "progress",
+            "chunk": index + 1,
+            "done": done,
+            "chunks": total,
+            "parsed": partial is not None,
+            "fields": fields_found(partial) if partial else []
+        })
 
-    context = f"""
-CASE ID: {request.case_data.tender_id}
-TITLE: {request.case_data.title}
-VERDICT: {request.verdict_data.verdict.verdict}
-SCORE: {request.verdict_data.verdict.constitutional_score}
+    async def run():
+        try:
+            merged = await parse_tender_chunks(chunks, on_progress=on_progress, wanted=wanted)
+            await events.put({"status": "complete", "result": await finish_tender(request.text, fields, merged, "chunked", wanted)})
+        except StructuredOutputError as e:
+            await events.put({"status": "error", "message": f"Failed to parse tender text: {e.detail}"})
+        except Exception as e:
+            await events.put({"status": "error", "message": f"{type(e).__name__}: {str(e)}"})
+
+    async def stream():
+        yield json.dumps({"status": "info", "chunks": len(chunks), "path": "chunked", "confidence": confidence, "llm_fields": wanted}) + "\n"
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                line = await events.get()
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+                if line["status"] in ("complete", "error"):
+                    break
+        finally:
+            task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def bench_system_prompt(case: ProcurementCase, verdict: AnalysisResult) -> str:
+    """Bench persona plus the case context; stable per verdict so Ollama can cache it"""
+    return f"""{BENCH_CHAT_PROMPT}
+CASE CONTEXT:
+CASE ID: {case.tender_id}
+TITLE: {case.title}
+VERDICT: {verdict.verdict.verdict}
+SCORE: {verdict.verdict.constitutional_score}
 
 AGENT OPINIONS:
-{json.dumps(request.verdict_data.agent_opinions, indent=2)}
+{json.dumps(verdict.agent_opinions, ensure_ascii=False)}
 
 CITIZEN SUMMARY:
-{request.verdict_data.verdict.citizen_summary}
+{verdict.verdict.citizen_summary}
 """
 
-    prompt = f"""
-{BENCH_CHAT_PROMPT}
+def bench_question(question: str) -> str:
+    return f"""USER QUESTION:
+{question}
+"""
 
-CASE CONTEXT:
-{context}
+@app.post("/ask_bench", response_model=ChatResponse)
+async def ask_bench(request: ChatRequest):
+    """Chat with the Constitutional Bench about a specific verdict (stateless; see /bench/sessions)"""
+    llm_priority.set(Priority.INTERACTIVE)
+    scheduler.admit(Priority.INTERACTIVE)
+    system_prompt = bench_system_prompt(request.case_data, request.verdict_data)
+    answer = await call_ollama(bench_question(request.question), system_prompt=system_prompt, tag="bench_chat")
+    return {"answer": answer}
 
-USER QUESTION:
-{request.question}
-"""
+def get_bench_session(session_id: str) -> BenchSession:
+    session = bench_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Bench session not found or expired")
+    return session
+
+@app.post("/bench/sessions", response_model=BenchSessionResponse)
+def create_bench_session(request: BenchSessionRequest):
+    """Store the case and verdict server-side; questions then send only the question"""
+    session = bench_sessions.create(request.case_data.tender_id, bench_system_prompt(request.case_data, request.verdict_data))
+    return {"session_id": session.id, "case_id": session.case_id}
+
+@app.get("/bench/sessions/{session_id}")
+def bench_session_info(session_id: str):
+    return get_bench_session(session_id).info()
 
-    answer = await call_ollama(prompt)
+@app.delete("/bench/sessions/{session_id}")
+def delete_bench_session(session_id: str):
+    if not bench_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Bench session not found or expired")
+    return {"status": "deleted"}
+
+@app.get("/bench/stats")
+def bench_stats():
+    """Session store size, TTL and created/expired/evicted counters"""
+    return bench_sessions.info()
+
+@app.post("/bench/sessions/{session_id}/ask", response_model=ChatResponse)
+async def ask_bench_session(session_id: str, request: BenchQuestion):
+    """Ask a follow-up; history is replayed verbatim so only new tokens are prefilled"""
+    session = get_bench_session(session_id)
+    llm_priority.set(Priority.INTERACTIVE)
+    scheduler.admit(Priority.INTERACTIVE)
+    async with session.lock:
+        prompt = bench_question(request.question)
+        answer = await call_ollama(prompt, system_prompt=session.system_prompt, tag="bench_session", history=session.history)
+        session.add_turn(prompt, answer, settings.BENCH_SESSION_MAX_TURNS)
+        bench_sessions.stats["turns"] += 1
     return {"answer": answer}
 
+@app.post("/bench/sessions/{session_id}/ask/stream")
+async def ask_bench_session_stream(session_id: str, request: BenchQuestion):
+    """Same as /ask, streamed as NDJSON: {"status": "token"} lines, then "complete" with the answer"""
+    session = get_bench_session(session_id)
+    llm_priority.set(Priority.INTERACTIVE)
+    scheduler.admit(Priority.INTERACTIVE)
+    prompt = bench_question(request.question)
+
+    async def stream():
+        async with session.lock:
+            parts = []
+            try:
+                async for token in stream_ollama(prompt, system_prompt=session.system_prompt, tag="bench_session", history=session.history):
+                    parts.append(token)
+                    yield json.dumps({"status": "token", "token": token}, ensure_ascii=False) + "\n"
+            except Exception as e:
+                yield json.dumps({"status": "error", "message": f"{type(e).__name__}: {str(e)}"}) + "\n"
+                return
+            answer = "".join(parts)
+            # Only completed answers join the history (a disconnect mid-answer leaves it unchanged)
+            session.add_turn(prompt, answer, settings.BENCH_SESSION_MAX_TURNS)
+            bench_sessions.stats["turns"] += 1
+            yield json.dumps({"status": "complete", "answer": answer}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from enum import Enum
 
 class ProcurementMethod(str, Enum):
@@ -26,6 +26,28 @@ class ProcurementCase(BaseModel):
     selection_reason: str
     documents_available: List[str]
 
+class PartialProcurementCase(BaseModel):
+    """Fields found in one excerpt of a long tender document, or filled in after the regex fast path"""
+    tender_id: Optional[str] = None
+    title: Optional[str] = None
+    department: Optional[str] = None
+    estimated_value: Optional[float] = None
+    procurement_method: Optional[ProcurementMethod] = None
+    publication_date: Optional[str] = None
+    bid_opening_date: Optional[str] = None
+    bids: List[VendorBid] = []
+    selected_vendor: Optional[str] = None
+    selection_reason: Optional[str] = None
+    documents_available: List[str] = []
+
+class RuleFinding(BaseModel):
+    rule: str  # e.g. rule_149
+    check: str  # procurement_method, msme_preference, bid_timeline, single_source_justification, requirement_splitting
+    severity: str  # low, medium, high, critical
+    auto_reject: bool
+    message: str
+    evidence: dict = {}
+
 class AgentOpinion(BaseModel):
     agent: str
     principle: str
@@ -35,18 +57,61 @@ class AgentOpinion(BaseModel):
     recommendation: str
     citizen_explanation: str
 
+class FullBenchOpinions(BaseModel):
+    transparency: AgentOpinion
+    equity: AgentOpinion
+    legality: AgentOpinion
+    accountability: AgentOpinion
+    social_justice: AgentOpinion
+
+# The decision matrix bands, highest first (see agents/chief_justice.py)
+Verdict = Literal["APPROVE", "CONDITIONAL", "REVIEW", "REJECT"]
+
 class CourtVerdict(BaseModel):
-    verdict: str  # APPROVE, CONDITIONAL, REJECT
+    verdict: Verdict
     constitutional_score: float
     score_breakdown: dict
     critical_issues: List[str]
     mandatory_actions: List[str]
     citizen_summary: str
 
+class VerdictProse(BaseModel):
+    mandatory_actions: List[str]
+    citizen_summary: str
+
+class TimingBreakdown(BaseModel):
+    total_ms: float
+    stages: Dict[str, float] = {}
+    llm: Dict[str, float] = {}
+    agents: Dict[str, Dict[str, float]] = {}
+
 class AnalysisResult(BaseModel):
     case_id: str
     agent_opinions: dict
     verdict: CourtVerdict
+    rule_findings: List[RuleFinding] = []
+    timings: Optional[TimingBreakdown] = None
+
+class ReviewSummary(BaseModel):
+    id: int
+    case_id: str
+    title: Optional[str] = None
+    department: Optional[str] = None
+    selected_vendor: Optional[str] = None
+    procurement_method: Optional[str] = None
+    estimated_value: Optional[float] = None
+    publication_date: Optional[str] = None
+    verdict: Optional[str] = None
+    score: Optional[float] = None
+    path: Optional[str] = None  # rest, ws, batch
+    outcome: Optional[str] = None  # llm, cached, short_circuit
+    total_ms: Optional[float] = None
+    created_at: str
+
+class ReviewPage(BaseModel):
+    items: List[ReviewSummary]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+    total: Optional[int] = None  # only with ?total=true
 
 class ParseTenderRequest(BaseModel):
     text: str
@@ -58,3 +123,14 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     answer: str
+
+class BenchSessionRequest(BaseModel):
+    case_data: ProcurementCase
+    verdict_data: AnalysisResult
+
+class BenchSessionResponse(BaseModel):
+    session_id: str
+    case_id: str
+
+class BenchQuestion(BaseModel):
+    question: str
@@ -1,2 +1,3 @@
 # RAG module
 from .knowledge_base import *
+from .rule_engine import *
@@ -0,0 +1,33 @@
+"""Build or query the rule vector index
+
+python -m rag.build_index                 # build if the corpus changed
+python -m rag.build_index --rebuild       # always re-embed
+python -m rag.build_index --query "single source emergency" -k 5
+"""
+
+import argparse
+
+from config import settings
+from .knowledge_base import corpus_passages
+from .vector_index import VectorIndex, make_embedder
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the rule vector index")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed even if the index is current")
+    parser.add_argument("--query", action="append", default=[], help="Print top hits for a query")
+    parser.add_argument("-k", type=int, default=settings.RAG_TOP_K)
+    args = parser.parse_args()
+
+    passages = corpus_passages()
+    if args.rebuild:
+        index = VectorIndex.build(passages, make_embedder(), settings.CHROMA_PATH)
+    else:
+        index = VectorIndex.load_or_build(passages, settings.CHROMA_PATH)
+    print(f"{len(index.passages)} passages, dim {index.vectors.shape[1]}, at {settings.CHROMA_PATH}")
+    for query, hits in zip(args.query, index.search(args.query, args.k)):
+        print(f"\n> {query}")
+        for score, p in hits:
+            print(f"  {score:.3f}  {p['id']}: {p['title']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 """Simple RAG Knowledge Base with GFR 2017 Rules"""
 
+from typing import Dict, List, Optional, Sequence
+
+from config import settings
+from .vector_index import CORPUS_DIR, VectorIndex, load_corpus
+
 GFR_RULES = {
     "rule_149": {
         "title": "Open Competitive Bidding",
@@ -9,7 +14,7 @@ GFR_RULES = {
     },
     "rule_150": {
         "title": "Limited Tender Inquiry",
-        "content": "Limited tender inquiry may be adopted when estimated value is less than ₹25 lakh. Should not be used to avoid open competition.",
+        "content": "Limited tender inquiry may be adopted when estimated value is less than ₹25 lakh. Minimum 14 days for bid submission. Should not be used to avoid open competition.",
         "threshold": 2500000,
         "min_days": 14
     },
@@ -21,7 +26,16 @@ GFR_RULES = {
     "rule_166": {
         "title": "Single Source Procurement",
         "content": "Single source procurement only in genuine emergency or when only one source exists. Written justification and competent authority approval mandatory.",
-        "requires_approval": True
+        "requires_approval": True,
+        # Document names (lower-case substrings) accepted as written justification
+        "justification_documents": [
+            "justification",
+            "emergency declaration",
+            "sole supplier",
+            "proprietary article",
+            "pac certificate",
+            "competent authority approval"
+        ]
     }
 }
 
@@ -38,26 +52,164 @@ CONSTITUTIONAL_ARTICLES = {
     }
 }
 
-def get_relevant_rules(estimated_value: float, procurement_method: str) -> str:
-    """Get relevant GFR rules based on case details"""
+AGENTS = ("transparency", "equity", "legality", "accountability", "social_justice")
+
+# Agents each structured entry matters to (corpus passages carry their own tags)
+RULE_TAGS = {
+    "rule_149": ["legality", "transparency"],
+    "rule_150": ["legality"],
+    "rule_161": ["equity", "social_justice"],
+    "rule_166": ["accountability", "legality"],
+    "article_14": ["equity"],
+    "article_19": ["transparency"]
+}
+
+def corpus_passages() -> List[dict]:
+    """Structured rules above plus the JSONL corpus (built-in and RAG_CORPUS_PATH)"""
+    seed = [
+        {
+            "id": key,
+            "source": "GFR 2017" if key.startswith("rule_") else "Constitution of India",
+            "title": entry["title"],
+            "text": entry["content"],
+            "tags": RULE_TAGS.get(key, [])
+        }
+        for key, entry in {**GFR_RULES, **CONSTITUTIONAL_ARTICLES}.items()
+    ]
+    return load_corpus([CORPUS_DIR, settings.RAG_CORPUS_PATH], seed=seed)
+
+_index: Optional[VectorIndex] = None
+
+def get_index() -> VectorIndex:
+    """Open (memory-map) or build the vector index once per process"""
+    global _index
+    if _index is None:
+        _index = VectorIndex.load_or_build(corpus_passages(), settings.CHROMA_PATH)
+    return _index
+
+# What each agent looks for, searched alongside the case queries
+AGENT_QUERIES = {
+    "transparency": "publication on portal disclosure of award details right to information public scrutiny",
+    "equity": "equal treatment of bidders MSME preference L1 price band restrictive eligibility criteria",
+    "legality": "tender method value threshold minimum days for bid submission mandatory procedure",
+    "accountability": "competent authority approval written justification records audit code of integrity",
+    "social_justice": "public welfare health weaker sections environment common good value for money"
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+def agent_context_budget(agent: str) -> int:
+    return settings.AGENT_CONTEXT_BUDGETS.get(agent, settings.AGENT_CONTEXT_TOKENS)
+
+def case_queries(estimated_value: float, procurement_method: str) -> List[str]:
+    """Retrieval queries implied by the case's value band and method"""
+    method = procurement_method.replace("_", " ")
+    queries = [
+        f"{method} procurement conditions approval and justification",
+        "equal treatment of bidders non-arbitrariness evaluation criteria",
+        "transparency publication disclosure of contract award public money",
+        "micro and small enterprises preference weaker sections welfare"
+    ]
+    if estimated_value >= 2500000:
+        queries.append("advertised open tender publication minimum time for bid submission high value")
+    else:
+        queries.append("low value purchase limited tender splitting of requirements")
+    return queries
+
+def _rank(hit_lists, exclude: Sequence[str] = ()) -> List[dict]:
+    """Merge per-query hits: each passage once, at its best cosine, highest first"""
+    best = {}
+    for hits in hit_lists:
+        for score, passage in hits:
+            if passage["id"] in exclude:
+                continue
+            if score > best.get(passage["id"], (-1.0, None))[0]:
+                best[passage["id"]] = (score, passage)
+    return [passage for _, passage in sorted(best.values(), key=lambda item: -item[0])]
+
+def retrieve_passages(queries: Sequence[str], k: int, exclude: Sequence[str] = ()) -> List[dict]:
+    """Best `k` passages across all queries (one batched search), highest cosine first"""
+    return _rank(get_index().search(queries, k + len(exclude)), exclude)[:k]
+
+def format_passage(passage: dict) -> str:
+    return f"{passage['source'].upper()} - {passage['title']}: {passage['text']}"
+
+def pinned_rules(estimated_value: float, procurement_method: str) -> List[dict]:
+    """Rules that apply by value and method, whatever retrieval finds"""
     
-    context_parts = []
+    def rule(key: str) -> dict:
+        return {"id": key, "text": f"GFR RULE {key.split('_')[1]}: {GFR_RULES[key]['content']}", "tags": RULE_TAGS[key]}
+
+    def article(key: str) -> dict:
+        return {"id": key, "text": f"ARTICLE {key.split('_')[1]}: {CONSTITUTIONAL_ARTICLES[key]['content']}", "tags": RULE_TAGS[key]}
+
+    pinned = []
     
     # Check value threshold
     if estimated_value >= 2500000:
-        context_parts.append(f"GFR RULE 149: {GFR_RULES['rule_149']['content']}")
+        pinned.append(rule("rule_149"))
     else:
-        context_parts.append(f"GFR RULE 150: {GFR_RULES['rule_150']['content']}")
+        pinned.append(rule("rule_150"))
     
     # Always include MSME
-    context_parts.append(f"GFR RULE 161: {GFR_RULES['rule_161']['content']}")
+    pinned.append(rule("rule_161"))
     
     # Single source
     if procurement_method == "single_source":
-        context_parts.append(f"GFR RULE 166: {GFR_RULES['rule_166']['content']}")
+        pinned.append(rule("rule_166"))
     
     # Constitutional
-    context_parts.append(f"ARTICLE 14: {CONSTITUTIONAL_ARTICLES['article_14']['content']}")
-    context_parts.append(f"ARTICLE 19: {CONSTITUTIONAL_ARTICLES['article_19']['content']}")
+    pinned.append(article("article_14"))
+    pinned.append(article("article_19"))
+    return pinned
+
+def get_relevant_rules(estimated_value: float, procurement_method: str, queries: Sequence[str] = ()) -> str:
+    """Get relevant GFR rules based on case details
+
+    The threshold/method rules are always included; the rest of the context
+    is the top RAG_TOP_K corpus passages for the case (plus any `queries`).
+    """
+    pinned = pinned_rules(estimated_value, procurement_method)
+    context_parts = [p["text"] for p in pinned]
+
+    # Retrieved guidance
+    if settings.RAG_TOP_K > 0:
+        all_queries = case_queries(estimated_value, procurement_method) + list(queries)
+        for passage in retrieve_passages(all_queries, settings.RAG_TOP_K, exclude=[p["id"] for p in pinned]):
+            context_parts.append(format_passage(passage))
     
     return "\n\n".join(context_parts)
+
+def get_agent_contexts(estimated_value: float, procurement_method: str, queries: Sequence[str] = (), agents: Sequence[str] = AGENTS) -> Dict[str, str]:
+    """A context bundle per agent: only rules tagged for it, within its token budget
+
+    Pinned rules tagged for the agent are always kept; retrieved passages
+    are added by relevance while they fit. The case
+    queries and every agent's own query run as one batched search.
+    """
+    pinned = pinned_rules(estimated_value, procurement_method)
+    pinned_ids = [p["id"] for p in pinned]
+    shared_queries = case_queries(estimated_value, procurement_method) + list(queries)
+    k = max(settings.RAG_TOP_K, 1) * 2 + len(pinned_ids)
+    hits = get_index().search(shared_queries + [AGENT_QUERIES[a] for a in agents], k)
+    shared_hits = hits[:len(shared_queries)]
+
+    contexts = {}
+    for agent, own_hits in zip(agents, hits[len(shared_queries):]):
+        # Pinned rules always go in; retrieved passages fill what's left of the budget
+        parts = [p["text"] for p in pinned if agent in p["tags"]]
+        used = sum(estimate_tokens(text) for text in parts)
+        budget = agent_context_budget(agent)
+        for passage in _rank([own_hits, *shared_hits], exclude=pinned_ids):
+            if agent not in passage["tags"]:
+                continue
+            text = format_passage(passage)
+            cost = estimate_tokens(text)
+            if used + cost > budget:
+                continue
+            parts.append(text)
+            used += cost
+        contexts[agent] = "\n\n".join(parts)
+    return contexts
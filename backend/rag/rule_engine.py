@@ -0,0 +1,214 @@
+"""Deterministic GFR 2017 checks computed directly from ProcurementCase fields
+
+These are the AUTO-REJECT conditions from CHIEF_JUSTICE_PROMPT that need no
+judgement: wrong procurement method, MSME L1+15% (Rule 161), bid timeline
+(Rules 149/150) and single source without written justification (Rule 166).
+"""
+
+from datetime import date
+from typing import List, Optional
+
+from models.schemas import ProcurementCase, RuleFinding
+from .knowledge_base import GFR_RULES
+
+SEVERITY_PENALTY = {"low": 5, "medium": 10, "high": 20, "critical": 40}
+
+# Which agent each check belongs to (used for prompts and short-circuit opinions)
+CHECK_AGENT = {
+    "procurement_method": "legality",
+    "bid_timeline": "legality",
+    "msme_preference": "equity",
+    "single_source_justification": "accountability",
+    "requirement_splitting": "legality"
+}
+
+AGENT_PRINCIPLES = {
+    "transparency": "Right to Information",
+    "equity": "Equality Before Law",
+    "legality": "Rule of Law",
+    "accountability": "Public Accountability",
+    "social_justice": "Protection of Life, Dignity & Environment"
+}
+
+# Highest score in the decision matrix's REJECT band
+REJECT_CEILING = 39
+# Short-circuit opinion for agents whose checks found nothing (they were not consulted)
+NEUTRAL_SCORE = 50
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+def _format_evidence(evidence: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in evidence.items())
+
+def check_procurement_method(case: ProcurementCase) -> List[RuleFinding]:
+    threshold = GFR_RULES["rule_149"]["threshold"]
+    if case.procurement_method.value == "limited_tender" and case.estimated_value >= threshold:
+        return [RuleFinding(
+            rule="rule_149",
+            check="procurement_method",
+            severity="critical",
+            auto_reject=True,
+            message=f"Limited tender used for ₹{case.estimated_value:,.0f}; open tender is mandatory at ₹{threshold:,.0f} and above",
+            evidence={"estimated_value": case.estimated_value, "threshold": threshold}
+        )]
+    return []
+
+def check_msme_preference(case: ProcurementCase) -> List[RuleFinding]:
+    if not case.bids:
+        return []
+    band = GFR_RULES["rule_161"]["preference_band"]
+    l1 = min(case.bids, key=lambda b: b.bid_amount)
+    limit = l1.bid_amount * (1 + band)
+    selected = next((b for b in case.bids if b.vendor_name == case.selected_vendor), None)
+    if selected is not None and selected.is_msme:
+        return []
+    # A recorded matching offer satisfies the rule even if the MSME declined
+    if "match" in case.selection_reason.lower():
+        return []
+    eligible = [b for b in case.bids if b.is_msme and b.bid_amount <= limit and b.vendor_name != case.selected_vendor]
+    if not eligible:
+        return []
+    return [RuleFinding(
+        rule="rule_161",
+        check="msme_preference",
+        severity="critical",
+        auto_reject=True,
+        message=f"MSME bid(s) within L1+{band:.0%} (₹{limit:,.0f}) were not offered to match L1 ₹{l1.bid_amount:,.0f}",
+        evidence={
+            "l1_vendor": l1.vendor_name,
+            "l1_amount": l1.bid_amount,
+            "band_limit": limit,
+            "eligible_msme": [b.vendor_name for b in eligible]
+        }
+    )]
+
+def check_bid_timeline(case: ProcurementCase) -> List[RuleFinding]:
+    method = case.procurement_method.value
+    if method == "single_source":
+        return []
+    rule = "rule_149" if method == "open_tender" else "rule_150"
+    min_days = GFR_RULES[rule]["min_days"]
+    published = _parse_date(case.publication_date)
+    opening = _parse_date(case.bid_opening_date)
+    if published is None or opening is None:
+        return [RuleFinding(
+            rule=rule,
+            check="bid_timeline",
+            severity="medium",
+            auto_reject=False,
+            message="Publication or bid opening date is not in YYYY-MM-DD format; timeline could not be verified",
+            evidence={"publication_date": case.publication_date, "bid_opening_date": case.bid_opening_date}
+        )]
+    days = (opening - published).days
+    if days >= min_days:
+        return []
+    return [RuleFinding(
+        rule=rule,
+        check="bid_timeline",
+        severity="critical",
+        auto_reject=True,
+        message=f"Only {days} days between publication and bid opening; {method.replace('_', ' ')} requires at least {min_days}",
+        evidence={"days": days, "min_days": min_days}
+    )]
+
+def check_single_source_justification(case: ProcurementCase) -> List[RuleFinding]:
+    if case.procurement_method.value != "single_source":
+        return []
+    keywords = GFR_RULES["rule_166"]["justification_documents"]
+    documents = [d.lower() for d in case.documents_available]
+    if any(k in d for d in documents for k in keywords):
+        return []
+    return [RuleFinding(
+        rule="rule_166",
+        check="single_source_justification",
+        severity="critical",
+        auto_reject=True,
+        message="Single source procurement without written justification or approval document",
+        evidence={"documents_available": case.documents_available}
+    )]
+
+RULE_CHECKS = [
+    check_procurement_method,
+    check_msme_preference,
+    check_bid_timeline,
+    check_single_source_justification
+]
+
+def evaluate_case(case: ProcurementCase) -> List[RuleFinding]:
+    """Run every deterministic check and return the findings"""
+    findings = []
+    for check in RULE_CHECKS:
+        findings.extend(check(case))
+    return findings
+
+def has_auto_reject(findings: List[RuleFinding]) -> bool:
+    return any(f.auto_reject for f in findings)
+
+def format_findings(findings: List[RuleFinding]) -> str:
+    """Render findings for injection into agent prompts"""
+    if not findings:
+        return "No deterministic GFR violations detected."
+    return "\n".join(
+        f"- [{f.severity.upper()}] {f.rule.upper().replace('_', ' ')} ({f.check}): {f.message}"
+        + (" -> AUTO-REJECT" if f.auto_reject else "")
+        for f in findings
+    )
+
+def _agent_title(agent: str) -> str:
+    return f"{agent.replace('_', ' ').title()} Agent"
+
+def rule_based_result(case: ProcurementCase, findings: List[RuleFinding]) -> dict:
+    """Build a REJECT AnalysisResult from rule findings without calling the LLM"""
+    opinions = {}
+    for f in findings:
+        agent = CHECK_AGENT[f.check]
+        opinion = opinions.setdefault(agent, {
+            "agent": _agent_title(agent),
+            "principle": AGENT_PRINCIPLES[agent],
+            "stance": "reject",
+            "score": 100,
+            "findings": [],
+            "recommendation": "Cancel and restart the procurement in compliance with GFR 2017.",
+            "citizen_explanation": ""
+        })
+        opinion["score"] = max(0, opinion["score"] - SEVERITY_PENALTY[f.severity])
+        opinion["findings"].append({
+            "issue": f.message,
+            "severity": f.severity,
+            "rule_violated": f"GFR {f.rule.upper().replace('_', ' ')}",
+            "evidence": _format_evidence(f.evidence)
+        })
+    for opinion in opinions.values():
+        # A rejecting opinion must score in the REJECT band whatever its penalties add up to
+        opinion["score"] = min(opinion["score"], REJECT_CEILING)
+        opinion["citizen_explanation"] = opinion["findings"][0]["issue"] + ". This breaks a mandatory procurement rule."
+    for agent in AGENT_PRINCIPLES:
+        opinions.setdefault(agent, {
+            "agent": _agent_title(agent),
+            "principle": AGENT_PRINCIPLES[agent],
+            "stance": "conditional",
+            "score": NEUTRAL_SCORE,
+            "findings": [],
+            "recommendation": "Not reviewed: the tender was rejected on mandatory rules first.",
+            "citizen_explanation": "This check was skipped because the tender already breaks a mandatory rule."
+        })
+
+    score = max(0, 100 - sum(SEVERITY_PENALTY[f.severity] for f in findings))
+    critical = [f.message for f in findings if f.auto_reject]
+    return {
+        "case_id": case.tender_id,
+        "agent_opinions": opinions,
+        "verdict": {
+            "verdict": "REJECT",
+            "constitutional_score": min(score, REJECT_CEILING),
+            "score_breakdown": {name: o["score"] for name, o in opinions.items()},
+            "critical_issues": critical,
+            "mandatory_actions": ["Cancel the tender and restart procurement under the correct GFR 2017 procedure"],
+            "citizen_summary": f"This tender was rejected automatically because it breaks {len(critical)} mandatory GFR 2017 rule(s): " + "; ".join(critical) + "."
+        },
+        "rule_findings": [f.model_dump() for f in findings]
+    }
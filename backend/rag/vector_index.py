@@ -0,0 +1,248 @@
+"""Local embedding index over the rule corpus (GFR 2017, CVC guidelines, Constitution)
+
+Passages come from rag/corpus/*.jsonl (plus RAG_CORPUS_PATH and the
+structured rules in knowledge_base); one JSON object per line with id,
+source, title, text and tags (the agents the passage matters to).
+
+Embeddings are a float32 matrix saved as .npy under CHROMA_PATH and opened
+with mmap_mode="r", so worker startup only maps the file; the index is
+rebuilt only when the corpus or embedder changes (manifest fingerprint).
+Search embeds all of a case's queries at once and scans the matrix in
+blocks, keeping a running top-k per query.
+
+The default embedder is feature hashing with IDF weighting: deterministic
+and needs no model download. Set RAG_EMBEDDING_MODEL to a local
+sentence-transformers model directory to use dense embeddings instead.
+
+Rebuild by hand: python -m rag.build_index --rebuild
+"""
+
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+INDEX_VERSION = "1"
+SEARCH_BLOCK_ROWS = 65536  # rows scored per matmul; bounds memory on large corpora
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and any are as at be been by for from has have in is it its may must no not of on or "
+    "shall should such that the their there this to was were which with".split()
+)
+
+def load_corpus(directories: Sequence[str], seed: Sequence[dict] = ()) -> List[dict]:
+    """Passages from every *.jsonl file in `directories`, after `seed`; later ids win"""
+    passages: Dict[str, dict] = {p["id"]: p for p in seed}
+    for directory in directories:
+        if not directory or not os.path.isdir(directory):
+            continue
+        for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        p = json.loads(line)
+                        passages[p["id"]] = {
+                            "id": p["id"],
+                            "source": p.get("source", os.path.basename(path)),
+                            "title": p.get("title", p["id"]),
+                            "text": p["text"],
+                            "tags": p.get("tags", [])
+                        }
+                    except (json.JSONDecodeError, KeyError) as e:
+                        print(f"[RAG] Skipping {path}:{line_no}: {e}")
+    return list(passages.values())
+
+def passage_text(p: dict) -> str:
+    return f"{p['title']}. {p['text']}"
+
+class HashingEmbedder:
+    """Unigram + bigram feature hashing, sublinear TF x IDF, L2-normalised"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    @property
+    def name(self) -> str:
+        return f"hashing-{self.dim}"
+
+    def _features(self, text: str) -> Dict[int, float]:
+        words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        counts: Dict[int, float] = {}
+        for gram in grams:
+            h = int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+            index = h % self.dim
+            sign = 1.0 if (h >> 63) & 1 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+        return counts
+
+    def _tf(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, count in self._features(text).items():
+                if count:
+                    matrix[row, index] = math.copysign(1.0 + math.log(abs(count)), count)
+        return matrix
+
+    def fit(self, texts: Sequence[str]) -> np.ndarray:
+        """Learn IDF from the corpus and return its embeddings"""
+        tf = self._tf(texts)
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self._normalise(tf * self.idf)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self._normalise(self._tf(texts) * self.idf)
+
+    @staticmethod
+    def _normalise(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def save(self, path: str) -> None:
+        _atomic_save(os.path.join(path, "idf.npy"), self.idf)
+
+    def load(self, path: str) -> None:
+        self.idf = np.load(os.path.join(path, "idf.npy"))
+
+class SentenceTransformerEmbedder:
+    """Dense embeddings from a sentence-transformers model already on disk"""
+
+    def __init__(self, model_path: str):
+        from sentence_transformers import SentenceTransformer
+        self.model_path = model_path
+        self.model = SentenceTransformer(model_path, device="cpu")
+
+    @property
+    def name(self) -> str:
+        return f"st-{os.path.basename(os.path.normpath(self.model_path))}"
+
+    def fit(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embed(texts)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        pass
+
+    def load(self, path: str) -> None:
+        pass
+
+def make_embedder():
+    if settings.RAG_EMBEDDING_MODEL:
+        return SentenceTransformerEmbedder(settings.RAG_EMBEDDING_MODEL)
+    return HashingEmbedder(settings.RAG_EMBEDDING_DIM)
+
+def _atomic_save(path: str, array: np.ndarray) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+def _atomic_write_json(path: str, data) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def fingerprint(passages: Sequence[dict], embedder) -> str:
+    digest = hashlib.sha256(f"{INDEX_VERSION}|{embedder.name}".encode())
+    for p in sorted(passages, key=lambda p: p["id"]):
+        digest.update(json.dumps(p, sort_keys=True, ensure_ascii=False).encode())
+    return digest.hexdigest()
+
+class VectorIndex:
+    def __init__(self, embedder, vectors: np.ndarray, passages: List[dict], fingerprint: str = ""):
+        self.embedder = embedder
+        self.vectors = vectors  # (n, dim) float32, rows L2-normalised; usually a memmap
+        self.passages = passages
+        self.fingerprint = fingerprint  # corpus + embedder identity, for cache keys
+
+    @classmethod
+    def build(cls, passages: List[dict], embedder, path: str = "") -> "VectorIndex":
+        """Embed the corpus; persist under `path` (manifest last, as the commit marker)"""
+        vectors = embedder.fit([passage_text(p) for p in passages]).astype(np.float32)
+        index = cls(embedder, vectors, passages, fingerprint(passages, embedder))
+        if path:
+            try:
+                os.makedirs(path, exist_ok=True)
+                _atomic_save(os.path.join(path, "vectors.npy"), vectors)
+                embedder.save(path)
+                _atomic_write_json(os.path.join(path, "passages.json"), passages)
+                _atomic_write_json(os.path.join(path, "manifest.json"), {
+                    "version": INDEX_VERSION,
+                    "embedder": embedder.name,
+                    "fingerprint": index.fingerprint,
+                    "count": len(passages),
+                    "dim": int(vectors.shape[1])
+                })
+            except OSError as e:
+                print(f"[RAG] Could not persist index to {path}: {e}; using it in memory")
+        return index
+
+    @classmethod
+    def load(cls, path: str, embedder, expected_fingerprint: str) -> Optional["VectorIndex"]:
+        """Memory-map a persisted index, or None if missing or stale"""
+        try:
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("fingerprint") != expected_fingerprint:
+                return None
+            with open(os.path.join(path, "passages.json"), encoding="utf-8") as f:
+                passages = json.load(f)
+            vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+            embedder.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if vectors.shape[0] != len(passages):
+            return None
+        return cls(embedder, vectors, passages, expected_fingerprint)
+
+    @classmethod
+    def load_or_build(cls, passages: List[dict], path: str = "", embedder=None) -> "VectorIndex":
+        embedder = embedder or make_embedder()
+        if path:
+            index = cls.load(path, embedder, fingerprint(passages, embedder))
+            if index is not None:
+                return index
+        print(f"[RAG] Building vector index over {len(passages)} passages ({embedder.name})")
+        return cls.build(passages, embedder, path)
+
+    def search(self, queries: Sequence[str], k: int) -> List[List[Tuple[float, dict]]]:
+        """Top-k (cosine, passage) per query; all queries scored in one pass over the matrix"""
+        n = len(self.passages)
+        if not queries or n == 0:
+            return [[] for _ in queries]
+        k = min(k, n)
+        q = self.embedder.embed(queries).T  # (dim, m)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS]) @ q  # (rows, m)
+            scores = np.concatenate([best_scores, block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + block.shape[0]), block.T.shape)], axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+        order = np.argsort(-best_scores, axis=1)
+        results = []
+        for qi in range(len(queries)):
+            results.append([
+                (float(best_scores[qi, j]), self.passages[int(best_rows[qi, j])])
+                for j in order[qi]
+            ])
+        return results
@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from config import settings
+from utils.backends import BackendRouter, model_tag
+
+def fake_ollama(url, calls):
+    """MockTransport client for one backend that has MODEL_NAME installed but not loaded"""
+    loaded = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": m} for m in loaded]})
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": model_tag(settings.MODEL_NAME)}]})
+        if request.url.path == "/api/chat":
+            loaded.append(model_tag(settings.MODEL_NAME))
+            return httpx.Response(200, json={"done": True})
+        return httpx.Response(404)
+
+    return httpx.AsyncClient(base_url=url, transport=httpx.MockTransport(handler))
+
+@pytest.mark.parametrize("interval", [0, 30])
+def test_startup_warms_whatever_the_interval(monkeypatch, interval):
+    monkeypatch.setattr(settings, "OLLAMA_HEALTH_INTERVAL", interval)
+    monkeypatch.setattr(settings, "OLLAMA_WARMUP", True)
+    monkeypatch.setattr(settings, "MODEL_CASCADE", False)
+
+    async def run():
+        router = BackendRouter(["http://ollama-a"])
+        calls = []
+        router.backends[0].client = fake_ollama("http://ollama-a", calls)
+        assert not router.readiness()["ready"]
+        router.start()
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if router.readiness()["ready"]:
+                break
+        readiness = router.readiness()
+        await router.close()
+        return readiness, calls
+
+    readiness, calls = asyncio.run(run())
+    assert readiness["ready"]
+    assert readiness["monitored"] == (interval > 0)
+    assert calls.count("/api/chat") == 1
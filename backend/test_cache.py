@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from utils.cache import VerdictCache
+
+def snapshot(path):
+    with open(path, encoding="utf-8") as f:
+        return [key for key, _, _ in json.load(f)["entries"]]
+
+def test_puts_are_debounced_into_one_write(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.json")
+
+    async def run():
+        cache = VerdictCache(path=path, flush_delay=0.05)
+        writes = []
+        save = cache._save
+        monkeypatch.setattr(cache, "_save", lambda entries: (writes.append(len(entries)), save(entries)))
+        for i in range(20):
+            cache.put(f"k{i}", {"i": i})
+        assert writes == [] and cache.info()["unsaved"]
+        await asyncio.sleep(0.2)
+        assert writes == [20]
+        assert not cache.info()["unsaved"]
+        assert len(snapshot(path)) == 20
+
+    asyncio.run(run())
+
+def test_close_flushes_pending_writes(tmp_path):
+    path = str(tmp_path / "cache.json")
+
+    async def run():
+        cache = VerdictCache(path=path, flush_delay=60)
+        cache.put("a", {"verdict": "APPROVE"})
+        await cache.close()
+        assert snapshot(path) == ["a"]
+
+    asyncio.run(run())
+    assert VerdictCache(path=path).get("a") == {"verdict": "APPROVE"}
+
+def test_lru_and_ttl():
+    cache = VerdictCache(max_size=2, ttl=0)
+    cache.put("a", {})
+    cache.put("b", {})
+    cache.get("a")
+    cache.put("c", {})
+    assert cache.get("b") is None
+    assert cache.get("a") == {} and cache.get("c") == {}
+    expired = VerdictCache(ttl=1e-9)
+    expired.put("a", {})
+    assert expired.get("a") is None
@@ -0,0 +1,63 @@
+import pytest
+
+from agents.chief_justice import SCORE_WEIGHTS, decide, synthesize_verdict
+from models.schemas import CourtVerdict
+
+def opinion(score, stance="conditional", findings=()):
+    return {
+        "agent": "Test Agent",
+        "principle": "Test",
+        "stance": stance,
+        "score": score,
+        "findings": list(findings),
+        "recommendation": "Fix it",
+        "citizen_explanation": ""
+    }
+
+def bench(score):
+    return {name: opinion(score) for name in SCORE_WEIGHTS}
+
+@pytest.mark.parametrize("score, verdict", [
+    (100, "APPROVE"), (80, "APPROVE"), (79.9, "CONDITIONAL"),
+    (60, "CONDITIONAL"), (59.9, "REVIEW"),
+    (40, "REVIEW"), (39.9, "REJECT"), (0, "REJECT")
+])
+def test_decide_boundaries(score, verdict):
+    assert decide(score) == verdict
+
+@pytest.mark.parametrize("score, verdict", [(80, "APPROVE"), (79, "CONDITIONAL"), (60, "CONDITIONAL"), (59, "REVIEW"), (40, "REVIEW"), (39, "REJECT")])
+def test_synthesize_verdict_boundaries(score, verdict):
+    result = synthesize_verdict(bench(score))
+    assert result["verdict"] == verdict
+    assert result["constitutional_score"] == score
+    # Every band is a valid CourtVerdict
+    CourtVerdict.model_validate(result)
+
+def test_weights_are_applied():
+    opinions = bench(100)
+    opinions["legality"] = opinion(0)
+    result = synthesize_verdict(opinions)
+    assert result["constitutional_score"] == 70.0
+    assert result["verdict"] == "CONDITIONAL"
+
+def test_failed_agents_are_left_out_and_weights_renormalized():
+    opinions = bench(90)
+    opinions["legality"] = {"error": "Parse failed", "detail": "", "raw": ""}
+    result = synthesize_verdict(opinions)
+    assert "legality" not in result["score_breakdown"]
+    assert result["constitutional_score"] == 90.0
+
+def test_no_valid_opinions_raises():
+    with pytest.raises(ValueError):
+        synthesize_verdict({name: {"error": "Parse failed"} for name in SCORE_WEIGHTS})
+
+def test_auto_reject_rule_finding_overrides_score():
+    finding = {"rule": "rule_149", "check": "procurement_method", "severity": "critical", "auto_reject": True, "message": "Limited tender above Rs 25L", "evidence": {}}
+    result = synthesize_verdict(bench(95), [finding])
+    assert result["verdict"] == "REJECT"
+    assert "Limited tender above Rs 25L" in result["critical_issues"]
+
+def test_critical_reject_finding_on_auto_reject_topic():
+    opinions = bench(95)
+    opinions["equity"] = opinion(95, stance="reject", findings=[{"issue": "MSME preference ignored", "severity": "critical", "rule_violated": "GFR Rule 161"}])
+    assert synthesize_verdict(opinions)["verdict"] == "REJECT"
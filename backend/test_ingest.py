@@ -0,0 +1,120 @@
+import asyncio
+import json
+from argparse import Namespace
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+import ingest
+from ingest import Checkpoint, SkipSet, read_records
+from utils.scheduler import SchedulerBusy
+
+def case(i):
+    return {
+        "tender_id": f"T-{i}", "title": "Beds", "department": "Health", "estimated_value": 100000,
+        "procurement_method": "open_tender", "publication_date": "2024-01-01", "bid_opening_date": "2024-01-31",
+        "bids": [], "selected_vendor": "", "selection_reason": "", "documents_available": []
+    }
+
+def test_checkpoint_watermark(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "c.json"), "dump.jsonl")
+    for index in (0, 2, 3):
+        checkpoint.mark(index, ok=True)
+    assert checkpoint.watermark == 1 and checkpoint.done_above == {2, 3}
+    checkpoint.mark(1, ok=False)
+    assert checkpoint.watermark == 4 and not checkpoint.done_above
+    checkpoint.save(123)
+    loaded = Checkpoint.load(checkpoint.path, "dump.jsonl")
+    assert (loaded.watermark, loaded.output_bytes, loaded.counts) == (4, 123, {"ok": 3, "errors": 1})
+    with pytest.raises(SystemExit):
+        Checkpoint.load(checkpoint.path, "other.jsonl")
+
+def test_read_records_skips_done_and_reports_bad_lines(tmp_path):
+    path = tmp_path / "dump.jsonl"
+    path.write_text('{"a": 1}\n\n{bad\n{"a": 3}\n', encoding="utf-8")
+    checkpoint = Checkpoint("", "")
+    checkpoint.mark(0, ok=True)
+    records = list(read_records(str(path), "jsonl", SkipSet(checkpoint)))
+    assert [(i, r) for i, r, _ in records] == [(1, None), (2, {"a": 3})]
+    assert records[0][2].startswith("JSONDecodeError")
+
+def args(tmp_path, **overrides):
+    values = dict(
+        input=str(tmp_path / "dump.jsonl"), output=str(tmp_path / "out.jsonl"), format="auto", concurrency=2,
+        mode=None, parse_only=True, checkpoint="", checkpoint_every=1, restart=False, limit=0, no_count=False, max_errors=None,
+        retries=2
+    )
+    values.update(overrides)
+    return Namespace(**values)
+
+@asynccontextmanager
+async def no_lifespan(app):
+    yield
+
+def test_resume_writes_every_record_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.api, "lifespan", no_lifespan)
+    (tmp_path / "dump.jsonl").write_text("".join(json.dumps(case(i)) + "\n" for i in range(6)) + "{bad\n", encoding="utf-8")
+    assert asyncio.run(ingest.ingest(args(tmp_path, limit=3))) == 0
+    # A crash after the last checkpoint leaves a partial line behind
+    with open(tmp_path / "out.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"index": 3, "case_id": "T-3", "ca')
+    assert asyncio.run(ingest.ingest(args(tmp_path, max_errors=0))) == 1
+    lines = [json.loads(l) for l in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert sorted(l["index"] for l in lines) == list(range(7))
+    by_index = {l["index"]: l for l in lines}
+    assert [by_index[i]["case"]["tender_id"] for i in range(6)] == [f"T-{i}" for i in range(6)]
+    assert by_index[6]["error"].startswith("JSONDecodeError")
+    checkpoint = Checkpoint.load(str(tmp_path / "out.jsonl.checkpoint"), str(tmp_path / "dump.jsonl"))
+    assert checkpoint.watermark == 7 and checkpoint.counts == {"ok": 6, "errors": 1}
+
+def write_dump(tmp_path, count):
+    (tmp_path / "dump.jsonl").write_text("".join(json.dumps(case(i)) + "\n" for i in range(count)), encoding="utf-8")
+
+def output_indices(tmp_path):
+    return sorted(json.loads(l)["index"] for l in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines())
+
+def test_transient_failures_stop_the_run_and_are_retried_on_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.api, "lifespan", no_lifespan)
+    monkeypatch.setattr(ingest, "RETRY_BACKOFF", 0)
+    write_dump(tmp_path, 5)
+    process = ingest.process
+
+    async def backend_down_at_2(index, record, args):
+        if index == 2:
+            raise SchedulerBusy(503, 0, "No healthy LLM backend serving gemma3:4b")
+        return await process(index, record, args)
+
+    monkeypatch.setattr(ingest, "process", backend_down_at_2)
+    assert asyncio.run(ingest.ingest(args(tmp_path, concurrency=1))) == 2
+    assert output_indices(tmp_path) == [0, 1]
+    checkpoint = Checkpoint.load(str(tmp_path / "out.jsonl.checkpoint"), str(tmp_path / "dump.jsonl"))
+    assert checkpoint.watermark == 2 and checkpoint.counts["errors"] == 0
+
+    monkeypatch.setattr(ingest, "process", process)
+    assert asyncio.run(ingest.ingest(args(tmp_path))) == 0
+    assert output_indices(tmp_path) == [0, 1, 2, 3, 4]
+
+def test_transient_failure_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.api, "lifespan", no_lifespan)
+    monkeypatch.setattr(ingest, "RETRY_BACKOFF", 0)
+    write_dump(tmp_path, 3)
+    process = ingest.process
+    failures = []
+
+    async def flaky(index, record, args):
+        if index == 1 and not failures:
+            failures.append(index)
+            raise httpx.ConnectError("connection refused")
+        return await process(index, record, args)
+
+    monkeypatch.setattr(ingest, "process", flaky)
+    assert asyncio.run(ingest.ingest(args(tmp_path, max_errors=0))) == 0
+    assert failures == [1]
+    assert output_indices(tmp_path) == [0, 1, 2]
+
+def test_max_errors_stops_the_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.api, "lifespan", no_lifespan)
+    (tmp_path / "dump.jsonl").write_text("{bad\n" * 20, encoding="utf-8")
+    assert asyncio.run(ingest.ingest(args(tmp_path, concurrency=1, max_errors=2))) == 1
+    assert output_indices(tmp_path) == [0, 1, 2]
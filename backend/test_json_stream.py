@@ -0,0 +1,50 @@
+import json
+
+from utils.json_stream import FIELD, ITEM, StreamingJSONParser
+
+OPINION = {
+    "stance": "reject",
+    "score": 35,
+    "findings": [
+        {"issue": "Bid window {too} short", "severity": "critical"},
+        {"issue": "No \"justification\" on file", "severity": "high"}
+    ],
+    "approved": False,
+    "note": None,
+    "recommendation": "Re-tender, see [clause 4]"
+}
+
+def feed_all(text, step=1):
+    parser = StreamingJSONParser()
+    events = []
+    for i in range(0, len(text), step):
+        events.extend(parser.feed(text[i:i + step]))
+    return parser, events
+
+def test_fields_and_items_arrive_in_order():
+    text = "Here is the opinion:\n```json\n" + json.dumps(OPINION, indent=2) + "\n```"
+    for step in (1, 7, len(text)):
+        parser, events = feed_all(text, step)
+        assert parser.done and parser.value == OPINION
+        assert [e[1] for e in events if e[0] == FIELD] == list(OPINION)
+        assert [e[2] for e in events if e[0] == ITEM] == OPINION["findings"]
+        assert parser.diagnose() == "OK"
+
+def test_score_is_reported_before_the_object_closes():
+    text = json.dumps(OPINION)
+    parser = StreamingJSONParser()
+    events = parser.feed(text[:text.index('"findings"')])
+    assert (FIELD, "stance", "reject") in events and (FIELD, "score", 35) in events
+    assert not parser.done
+
+def test_truncated_stream_is_diagnosed():
+    text = json.dumps(OPINION)
+    parser, _ = feed_all(text[:text.index("Re-tender") + 3])
+    assert parser.value is None
+    assert parser.in_string and parser.open_brackets == "{"
+    assert "truncated" in parser.diagnose() and "stance" in parser.diagnose()
+
+def test_no_object():
+    parser, events = feed_all("I cannot answer that.")
+    assert events == [] and not parser.done
+    assert parser.diagnose().startswith("No JSON object found")
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from utils.scheduler import LLMScheduler, Priority, SchedulerBusy
+
+def scheduler(max_in_flight=1, queue_limits=None, total=0):
+    return LLMScheduler(max_in_flight, queue_limits or {}, total)
+
+def test_cancel_then_release_in_the_same_tick():
+    async def run():
+        s = scheduler()
+        await s._acquire(Priority.DEFAULT)  # hold the only slot
+        waiter = asyncio.create_task(s._acquire(Priority.DEFAULT))
+        await asyncio.sleep(0)  # waiter is queued
+        waiter.cancel()
+        s._release()  # _dispatch pops the cancelled entry before the waiter runs
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert s._waiters == []
+        assert s._queued[Priority.DEFAULT] == 0
+        assert s.in_flight == 0
+        # The slot is still usable
+        await asyncio.wait_for(s._acquire(Priority.DEFAULT), 1)
+        assert s.in_flight == 1
+    asyncio.run(run())
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        s = scheduler()
+        await s._acquire(Priority.DEFAULT)
+        waiter = asyncio.create_task(s._acquire(Priority.BATCH))
+        await asyncio.sleep(0)
+        assert s._queued[Priority.BATCH] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert s._waiters == [] and s._queued[Priority.BATCH] == 0
+        s._release()
+        assert s.in_flight == 0
+    asyncio.run(run())
+
+def test_waiters_run_in_priority_order():
+    async def run():
+        s = scheduler()
+        order = []
+        await s._acquire(Priority.DEFAULT)
+
+        async def call(priority):
+            async with s.slot(priority):
+                order.append(priority)
+
+        tasks = [asyncio.create_task(call(p)) for p in (Priority.BATCH, Priority.DEFAULT, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        s._release()
+        await asyncio.gather(*tasks)
+        assert order == [Priority.INTERACTIVE, Priority.DEFAULT, Priority.BATCH]
+    asyncio.run(run())
+
+def test_admission_rejects_a_full_queue():
+    s = scheduler(queue_limits={Priority.DEFAULT: 1})
+    s.in_flight = 1
+    with s.admission(Priority.DEFAULT):
+        with pytest.raises(SchedulerBusy) as busy:
+            s.admit(Priority.DEFAULT)
+        assert busy.value.status_code == 429
+    # Batch work is never rejected
+    s.admit(Priority.BATCH, 100)
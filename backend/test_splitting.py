@@ -0,0 +1,61 @@
+from analytics.splitting import SplitIndex, item_category, split_finding
+
+def tender(tender_id, day, value=1000000, vendor="Acme Traders", title="Supply of laptops - Lot 1", method="limited_tender"):
+    return {
+        "tender_id": tender_id,
+        "title": title,
+        "department": "Education Dept",
+        "selected_vendor": vendor,
+        "procurement_method": method,
+        "estimated_value": value,
+        "publication_date": f"2024-03-{day:02d}"
+    }
+
+def test_item_category():
+    assert item_category("Supply of Laptops - Lot 2") == "it_hardware"
+    assert item_category("Phase II: Supply of garden benches") == item_category("Phase III supply of garden benches")
+
+def test_only_sub_threshold_limited_tenders_are_indexed():
+    index = SplitIndex()
+    assert index.add(tender("A", 1))
+    assert not index.add(tender("B", 2, value=3000000))
+    assert not index.add(tender("C", 3, method="open_tender"))
+    assert index.info()["tenders"] == 1
+
+def test_cluster_over_the_threshold():
+    index = SplitIndex(window_days=30)
+    index.add(tender("A", 1))
+    index.add(tender("B", 10, title="Supply of laptops - Lot 2"))
+    cluster = index.check(tender("C", 20, value=600000, title="Laptop supply lot 3"))
+    assert cluster["same_vendor"] and cluster["tenders"] == 3
+    assert cluster["combined_value"] == 2600000
+    assert cluster["tender_ids"] == ["A", "B"]
+    finding = split_finding(cluster)
+    assert finding.check == "requirement_splitting" and not finding.auto_reject
+
+def test_re_reviewing_a_tender_does_not_count_it_twice():
+    index = SplitIndex(window_days=30)
+    index.add(tender("A", 1, value=2000000))
+    assert index.check(tender("A", 1, value=2000000)) is None
+    index.add(tender("B", 5, value=600000))
+    assert index.check(tender("B", 5, value=600000))["tenders"] == 2
+
+def test_out_of_window_and_out_of_order():
+    index = SplitIndex(window_days=5)
+    index.add(tender("B", 20))
+    index.add(tender("A", 1))  # inserted before B: running totals recomputed
+    assert index.check(tender("C", 10, value=1500000)) is None
+    assert index.check(tender("D", 22, value=1500000))["tender_ids"] == ["B"]
+
+def test_split_across_vendors():
+    index = SplitIndex(window_days=30)
+    index.add(tender("A", 1, vendor="Acme Traders"))
+    cluster = index.check(tender("B", 3, value=1600000, vendor="Other Co"))
+    assert not cluster["same_vendor"] and cluster["vendor"] is None
+    assert split_finding(cluster).severity == "medium"
+
+def test_load_keeps_live_entries():
+    index = SplitIndex()
+    index.add(tender("A", 5, value=900000))
+    assert index.load([tender("A", 5, value=100), tender("B", 1)]) == 1
+    assert index.check(tender("C", 6, value=1000000))["combined_value"] == 2900000
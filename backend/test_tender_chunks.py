@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+import main
+from utils.structured import StructuredOutputError
+from utils.tender_chunks import merge_partials, split_sections, vendor_key
+
+def test_split_sections_keeps_sections_whole():
+    text = "1. Scope\nSupply of beds.\n\n2. Eligibility\nRegistered vendors only.\n\n3. Bids\nSealed bids by 1 March."
+    chunks = split_sections(text, 60)
+    assert all(len(c) <= 60 for c in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+    assert any(c.startswith("2. Eligibility") for c in chunks)
+
+def test_vendor_key_ignores_suffixes_and_case():
+    assert vendor_key("M/s MedEquip Pvt. Ltd.") == vendor_key("medequip private limited")
+
+def test_merge_votes_and_dedupes_bids():
+    partials = [
+        {"tender_id": "T-9", "estimated_value": 3000000, "bids": [{"vendor_name": "MedEquip Pvt Ltd", "bid_amount": 2900000, "is_msme": False}]},
+        {"tender_id": "T-9", "estimated_value": 3000000, "bids": [{"vendor_name": "MEDEQUIP PRIVATE LIMITED", "bid_amount": 2900000, "is_msme": True}]},
+        {"tender_id": "T-8", "selected_vendor": "medequip ltd", "procurement_method": "open_tender"}
+    ]
+    case = merge_partials(partials)
+    assert case["tender_id"] == "T-9"
+    assert case["procurement_method"] == "open_tender"
+    assert case["selected_vendor"] == "MedEquip Pvt Ltd"
+    assert case["bids"] == [{"vendor_name": "MedEquip Pvt Ltd", "bid_amount": 2900000, "is_msme": True, "technical_score": None}]
+
+@pytest.mark.parametrize("value", [3000000, 100000])
+def test_method_is_never_inferred_from_value(value):
+    assert merge_partials([{"estimated_value": value}])["procurement_method"] is None
+
+def tender_case(**overrides):
+    return {
+        "tender_id": "T-1", "title": "Beds", "department": "Health", "estimated_value": 3000000,
+        "procurement_method": None, "publication_date": "2024-01-01", "bid_opening_date": "2024-01-31",
+        "bids": [], "selected_vendor": "", "selection_reason": "", "documents_available": [], **overrides
+    }
+
+def test_missing_method_is_asked_for(monkeypatch):
+    asked = []
+
+    async def fill(text, fields, wanted):
+        asked.append(wanted)
+        return {"procurement_method": "limited_tender"}
+
+    monkeypatch.setattr(main, "fill_tender_fields", fill)
+    case = asyncio.run(main.finish_tender("Limited tender notice", None, tender_case(), "llm", []))
+    assert asked == [["procurement_method"]]
+    assert case["procurement_method"] == "limited_tender"
+
+def test_unstated_method_fails_the_parse(monkeypatch):
+    async def fill(text, fields, wanted):
+        return {"procurement_method": None}
+
+    monkeypatch.setattr(main, "fill_tender_fields", fill)
+    with pytest.raises(StructuredOutputError):
+        asyncio.run(main.finish_tender("Notice", None, tender_case(), "llm", []))
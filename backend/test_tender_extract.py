@@ -0,0 +1,71 @@
+from config import settings
+from utils.tender_extract import extract_fields, parse_amount, unresolved_fields
+
+def test_fiscal_year_is_not_the_estimated_value():
+    fields = extract_fields("Estimated cost for 2024-25 is Rs 30 lakh")
+    assert fields["estimated_value"] == {"value": 3000000.0, "confidence": 0.85}
+
+def test_year_alone_is_not_an_amount():
+    fields = extract_fields("Estimated cost for FY 2024-2025 as per BOQ")
+    assert fields["estimated_value"]["value"] is None
+
+def test_bare_amount_falls_through_to_the_llm():
+    fields = extract_fields("Estimated cost: 4500000")
+    assert fields["estimated_value"]["value"] == 4500000.0
+    assert fields["estimated_value"]["confidence"] < settings.TENDER_FASTPATH_CONFIDENCE
+    assert "estimated_value" in unresolved_fields(fields, settings.TENDER_FASTPATH_CONFIDENCE, required_only=True)
+
+def test_labelled_amount_with_currency():
+    fields = extract_fields("Estimated Value: Rs 45,00,000")
+    assert fields["estimated_value"] == {"value": 4500000.0, "confidence": 0.95}
+
+def test_parse_amount_units_and_currency():
+    assert parse_amount("₹1.2 Cr") == 12000000.0
+    assert parse_amount("INR 2.5 crore") == 25000000.0
+    assert parse_amount("50 Lakhs") == 5000000.0
+    assert parse_amount("Rs 2000") == 2000.0
+    assert parse_amount("clause 12") is None
+
+def test_parse_amount_prefers_explicit_over_bare():
+    assert parse_amount("Ref 10234 dated 2023, value Rs 5 lakh") == 500000.0
+
+LIMITED_45L = """Tender ID: PWD/2024/118
+Tender Type: Limited
+Estimated Value: Rs 45,00,000
+Note: open tender was not used due to urgency.
+"""
+
+def test_bare_word_in_labelled_method():
+    fields = extract_fields(LIMITED_45L)
+    assert fields["procurement_method"] == {"value": "limited_tender", "confidence": 0.9}
+
+def test_unparsed_label_does_not_trust_a_passing_mention():
+    fields = extract_fields(LIMITED_45L.replace("Tender Type: Limited", "Tender Type: LT-2"))
+    assert fields["procurement_method"]["value"] == "open_tender"
+    assert "procurement_method" in unresolved_fields(fields, settings.TENDER_FASTPATH_CONFIDENCE, required_only=True)
+
+def test_inline_method_label():
+    fields = extract_fields("Estimated value Rs 45,00,000. Procurement method: open tender.")
+    assert fields["procurement_method"] == {"value": "open_tender", "confidence": 0.95}
+
+def test_single_stage_is_not_single_source():
+    assert extract_fields("Tender Type: Limited - Single Stage")["procurement_method"]["value"] == "limited_tender"
+
+def test_bid_section_ends_before_fee_lines():
+    text = """Bids received:
+1. MedEquip Pvt Ltd - Rs 42,00,000 - MSE
+2. CareBeds Ltd - Rs 43,50,000
+
+EMD: Rs 90,000
+Performance Security: Rs 2,10,000
+"""
+    bids = extract_fields(text)["bids"]
+    assert [b["vendor_name"] for b in bids["value"]] == ["MedEquip Pvt Ltd", "CareBeds Ltd"]
+    assert bids["confidence"] == 0.85
+
+def test_bid_section_ends_at_next_label():
+    text = "Bidders: MedEquip Pvt Ltd (Rs 42,00,000, MSME)\nBid Opening Date: 2024-03-05\nTender Fee: Rs 5,000\nEMD - Rs 90,000\n"
+    assert [b["vendor_name"] for b in extract_fields(text)["bids"]["value"]] == ["MedEquip Pvt Ltd"]
+
+def test_fee_lines_are_never_bids():
+    assert extract_fields("EMD: Rs 90,000\nBid Security: Rs 1,00,000")["bids"]["value"] == []
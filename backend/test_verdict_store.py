@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import utils.verdict_store as verdict_store
+from config import settings
+from utils.verdict_store import VerdictStore
+
+def result(verdict, score):
+    return {"case_id": f"T-{verdict}", "verdict": {"verdict": verdict, "constitutional_score": score}}
+
+@pytest.fixture
+def store(tmp_path):
+    store = VerdictStore(str(tmp_path / "reviews.db"))
+    for verdict, score in (("APPROVE", 85), ("CONDITIONAL", 70), ("REVIEW", 50), ("REVIEW", 45), ("REJECT", 20)):
+        store.add({"department": "PWD"}, result(verdict, score), "fast", "llm")
+    yield store
+    store.close()
+
+def test_review_rows_are_queryable(store):
+    page = store.query({"verdict": "REVIEW"}, with_total=True)
+    assert page["total"] == 2
+    assert {item["verdict"] for item in page["items"]} == {"REVIEW"}
+
+def test_summary_counts_review(store):
+    [group] = store.summary("department", {})
+    assert group["review"] == 2
+    assert group["rejected"] + group["review"] + group["conditional"] + group["approved"] == group["reviews"]
+
+def test_reviews_endpoints_accept_review(store, monkeypatch):
+    monkeypatch.setattr(settings, "VERDICT_STORE_PATH", store.path)
+    monkeypatch.setattr(verdict_store, "_store", store)
+    client = TestClient(main.app)
+    response = client.get("/reviews", params={"verdict": "REVIEW"})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+    response = client.get("/reviews/summary", params={"group_by": "verdict", "verdict": "REVIEW"})
+    assert response.status_code == 200
+    assert response.json()["groups"][0]["review"] == 2
+
+def test_reads_do_not_wait_for_the_writer(store):
+    # A write in progress holds the writer lock; listings and summaries use their own connection
+    with store._lock:
+        assert store.query({}, with_total=True)["total"] == 5
+        assert store.summary("verdict", {})
+        assert store.info()["reviews"] == 5
+
+def test_add_async_runs_off_the_event_loop(store):
+    threads = []
+    add = store.add
+
+    def tracked(*args):
+        threads.append(threading.current_thread())
+        return add(*args)
+
+    store.add = tracked
+    review_id = asyncio.run(store.add_async({"department": "PWD"}, result("APPROVE", 90), "fast", "llm"))
+    assert threads and threads[0] is not threading.main_thread()
+    assert store.get(review_id)["verdict"] == "APPROVE"
@@ -0,0 +1,464 @@
+"""Routing LLM calls across several Ollama backends
+
+OLLAMA_URLS lists the backends (OLLAMA_URL alone when empty). Each keeps
+its own pooled client, calls in flight, a latency estimate, a circuit
+breaker, and the models it reports: loaded (/api/ps) and installed
+(/api/tags). A health check refreshes these at startup and then every
+OLLAMA_HEALTH_INTERVAL seconds (0 = at startup only).
+
+A call goes to an available backend that already has the model loaded;
+if none has, to one that has it installed (or has not reported yet).
+Among those:
+- least_outstanding: fewest calls in flight; ties take turns
+- latency: least expected wait, i.e. (calls in flight + 1) x EWMA seconds
+  per generated token
+
+Connection errors and 5xx responses count against a backend: after
+BREAKER_FAILURES in a row its breaker opens for BREAKER_COOLDOWN seconds.
+After that, one trial call or a passing health check closes it again. A
+failed call moves on to the next-best backend before failing the caller.
+The scheduler allows LLM_MAX_IN_FLIGHT calls per available backend, so
+capacity grows with the nodes.
+
+With OLLAMA_WARMUP each health check also loads MODEL_NAME (and the
+MODEL_CASCADE tiers) on every healthy backend that does not have it in memory (at startup, and again after an
+idle unload) and pins it with OLLAMA_KEEP_ALIVE. readiness() answers from
+this cached state without touching the backends.
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Set, Tuple
+
+import httpx
+
+from config import settings
+from .scheduler import scheduler, SchedulerBusy
+from .metrics import Gauge
+
+HEALTH_TIMEOUT = 5.0
+LATENCY_ALPHA = 0.2
+STALE_CHECKS = 3  # readiness ignores health data older than this many intervals
+
+def backend_urls() -> List[str]:
+    urls = [u.strip().rstrip("/") for u in settings.OLLAMA_URLS.split(",") if u.strip()]
+    return urls or [settings.OLLAMA_URL.rstrip("/")]
+
+def model_tag(name: str) -> str:
+    """Ollama's canonical name: an untagged model means :latest"""
+    return name if ":" in name else f"{name}:latest"
+
+def served_models() -> List[str]:
+    """Every model this process calls: MODEL_NAME, then the cascade tiers if MODEL_CASCADE is on"""
+    tiers = settings.CASCADE_MODELS if settings.MODEL_CASCADE else []
+    return list(dict.fromkeys(model_tag(m) for m in [settings.MODEL_NAME, *tiers]))
+
+def keep_alive():
+    """OLLAMA_KEEP_ALIVE as Ollama expects it: seconds as a number, or a duration string"""
+    value = settings.OLLAMA_KEEP_ALIVE
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def _build_client(url: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=url,
+        timeout=httpx.Timeout(
+            settings.OLLAMA_READ_TIMEOUT,
+            connect=settings.OLLAMA_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE,
+            keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+        )
+    )
+
+class Backend:
+    def __init__(self, url: str):
+        self.url = url
+        self.client = _build_client(url)
+        self.outstanding = 0
+        self.sec_per_token: Optional[float] = None  # EWMA over successful calls
+        self.failures = 0  # consecutive
+        self.state = "closed"  # closed | open | half_open
+        self.opened_at = 0.0
+        self.trial = False  # the half-open trial call is in flight
+        self.loaded: Set[str] = set()
+        self.installed: Set[str] = set()
+        self.checked_at: Optional[float] = None
+        self.last_error = ""
+        self.warming = False
+        self.warmed_at: Optional[float] = None
+        self.stats = {"calls": 0, "failures": 0, "trips": 0, "warmups": 0}
+
+    def available(self, now: float) -> bool:
+        if self.state == "open" and now - self.opened_at >= settings.BREAKER_COOLDOWN:
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self.trial
+        return self.state == "closed"
+
+    def warmth(self, model: str) -> int:
+        """2 = model loaded, 1 = installed (or not reported yet), 0 = not on this backend"""
+        if model in self.loaded:
+            return 2
+        if self.checked_at is None or model in self.installed:
+            return 1
+        return 0
+
+    def expected_wait(self) -> float:
+        # Unmeasured backends look fast so they get traffic and a measurement
+        return (self.outstanding + 1) * (self.sec_per_token or 0.0)
+
+    def close_breaker(self) -> None:
+        self.state, self.failures, self.trial = "closed", 0, False
+
+    def open_breaker(self) -> None:
+        if self.state != "open":
+            self.stats["trips"] += 1
+        self.state, self.opened_at, self.trial = "open", time.monotonic(), False
+
+    def info(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "sec_per_token": round(self.sec_per_token, 5) if self.sec_per_token is not None else None,
+            "consecutive_failures": self.failures,
+            "models_loaded": sorted(self.loaded),
+            "models_installed": sorted(self.installed),
+            "checked_at": self.checked_at,
+            "warming": self.warming,
+            "warmed_at": self.warmed_at,
+            "last_error": self.last_error,
+            **self.stats
+        }
+
+class BackendRouter:
+    def __init__(self, urls: List[str]):
+        self.backends = [Backend(u) for u in urls]
+        self._turn = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        self._warmups: Set[asyncio.Task] = set()
+        self._resize()
+
+    # -- selection -----------------------------------------------------------
+
+    def _candidates(self, model: str, exclude: Tuple[Backend, ...]) -> List[Backend]:
+        now = time.monotonic()
+        ready = [b for b in self.backends if b not in exclude and b.available(now) and b.warmth(model)]
+        if not ready:
+            return []
+        warmest = max(b.warmth(model) for b in ready)
+        return [b for b in ready if b.warmth(model) == warmest]
+
+    def choose(self, model: str, exclude: Tuple[Backend, ...] = ()) -> Optional[Backend]:
+        candidates = self._candidates(model, exclude)
+        if not candidates:
+            return None
+        # Rotate the starting point so ties spread instead of piling on the first backend
+        start = next(self._turn) % len(candidates)
+        candidates = candidates[start:] + candidates[:start]
+        if settings.LLM_ROUTING == "latency":
+            return min(candidates, key=Backend.expected_wait)
+        return min(candidates, key=lambda b: b.outstanding)
+
+    def _unavailable(self, model: str) -> SchedulerBusy:
+        waits = [settings.BREAKER_COOLDOWN - (time.monotonic() - b.opened_at) for b in self.backends if b.state == "open"]
+        retry_after = max(1, int(min(waits))) if waits else int(settings.BREAKER_COOLDOWN)
+        return SchedulerBusy(503, retry_after, f"No healthy LLM backend serving {model}")
+
+    def available_count(self) -> int:
+        now = time.monotonic()
+        return sum(b.state != "open" or b.available(now) for b in self.backends)
+
+    def _resize(self) -> None:
+        """LLM_MAX_IN_FLIGHT per available backend (at least one backend's worth)"""
+        scheduler.resize(settings.LLM_MAX_IN_FLIGHT * max(1, self.available_count()))
+
+    # -- outcomes ------------------------------------------------------------
+
+    def _begin(self, backend: Backend) -> None:
+        backend.outstanding += 1
+        backend.stats["calls"] += 1
+        if backend.state == "half_open":
+            backend.trial = True
+
+    def _succeeded(self, backend: Backend, model: str, data: Optional[dict], elapsed: float) -> None:
+        if backend.state != "closed":
+            print(f"[Router] {backend.url} recovered")
+            backend.close_breaker()
+            self._resize()
+        backend.failures = 0
+        backend.loaded.add(model)  # Ollama keeps it loaded after serving a call
+        tokens = (data or {}).get("eval_count") or 0
+        if tokens:
+            seconds = (data.get("total_duration") or 0) / 1e9 or elapsed
+            sample = seconds / tokens
+            backend.sec_per_token = sample if backend.sec_per_token is None else (1 - LATENCY_ALPHA) * backend.sec_per_token + LATENCY_ALPHA * sample
+
+    def _failed(self, backend: Backend, error: str) -> None:
+        backend.failures += 1
+        backend.stats["failures"] += 1
+        backend.last_error = error
+        if backend.state == "half_open" or backend.failures >= settings.BREAKER_FAILURES:
+            if backend.state != "open":
+                print(f"[Router] Circuit open for {backend.url} after {backend.failures} failure(s): {error}")
+            backend.open_breaker()
+            self._resize()
+        backend.trial = False
+
+    # -- calls ---------------------------------------------------------------
+
+    async def post(self, path: str, payload: dict) -> httpx.Response:
+        """POST to the best backend, moving on to the next one on connection errors and 5xx"""
+        model = model_tag(payload["model"])
+        tried: Tuple[Backend, ...] = ()
+        while True:
+            backend = self.choose(model, tried)
+            if backend is None:
+                raise self._unavailable(model)
+            tried += (backend,)
+            self._begin(backend)
+            started = time.perf_counter()
+            try:
+                response = await backend.client.post(path, json=payload)
+            except httpx.TransportError as e:
+                self._failed(backend, f"{type(e).__name__}: {e}")
+                if self.choose(model, tried) is None:
+                    raise
+                continue
+            finally:
+                backend.outstanding -= 1
+            if response.status_code >= 500:
+                self._failed(backend, f"HTTP {response.status_code}")
+                if self.choose(model, tried) is not None:
+                    continue
+            elif response.status_code == 200:
+                self._succeeded(backend, model, response.json(), time.perf_counter() - started)
+            else:
+                backend.trial = False
+            return response
+
+    @asynccontextmanager
+    async def stream(self, path: str, payload: dict):
+        """Streamed POST to the best backend as (backend, response); retried elsewhere only before the first byte
+
+        The caller reports the final chunk with observe() so latency routing learns from streams too.
+        """
+        model = model_tag(payload["model"])
+        tried: Tuple[Backend, ...] = ()
+        while True:
+            backend = self.choose(model, tried)
+            if backend is None:
+                raise self._unavailable(model)
+            tried += (backend,)
+            self._begin(backend)
+            started = time.perf_counter()
+            handed_over = False
+            try:
+                async with backend.client.stream("POST", path, json=payload) as response:
+                    if response.status_code >= 500 and self.choose(model, tried) is not None:
+                        self._failed(backend, f"HTTP {response.status_code}")
+                        continue
+                    if response.status_code >= 500:
+                        self._failed(backend, f"HTTP {response.status_code}")
+                    handed_over = True
+                    call = _StreamCall(self, backend, model, started)
+                    yield call, response
+                    if response.status_code == 200 and not call.observed:
+                        self._succeeded(backend, model, None, time.perf_counter() - started)
+                    backend.trial = False
+                    return
+            except httpx.TransportError as e:
+                self._failed(backend, f"{type(e).__name__}: {e}")
+                if handed_over or self.choose(model, tried) is None:
+                    raise
+            finally:
+                backend.outstanding -= 1
+                if handed_over:
+                    backend.trial = False
+
+    # -- health --------------------------------------------------------------
+
+    async def check(self, backend: Backend) -> bool:
+        """Refresh loaded/installed models; a failing check opens the breaker, a passing one closes it after the cooldown"""
+        sent = time.time()
+        try:
+            ps, tags = await asyncio.gather(
+                backend.client.get("/api/ps", timeout=HEALTH_TIMEOUT),
+                backend.client.get("/api/tags", timeout=HEALTH_TIMEOUT)
+            )
+            ps.raise_for_status()
+            tags.raise_for_status()
+            loaded = {model_tag(m.get("name") or m.get("model", "")) for m in ps.json().get("models", [])}
+            # A warm-up that finished while /api/ps was answering is newer than its list
+            if backend.warmed_at is not None and backend.warmed_at >= sent:
+                loaded |= backend.loaded
+            backend.loaded = loaded
+            backend.installed = {model_tag(m.get("name") or m.get("model", "")) for m in tags.json().get("models", [])}
+        except (httpx.HTTPError, ValueError) as e:
+            backend.last_error = f"health: {type(e).__name__}: {e}"
+            if backend.state != "open":
+                print(f"[Router] Health check failed for {backend.url}: {type(e).__name__}")
+                backend.open_breaker()
+                self._resize()
+            return False
+        backend.checked_at = time.time()
+        if backend.state != "closed" and backend.available(time.monotonic()):
+            print(f"[Router] {backend.url} passed its health check")
+            backend.close_breaker()
+            self._resize()
+        return True
+
+    async def check_all(self) -> List[bool]:
+        return await asyncio.gather(*[self.check(b) for b in self.backends])
+
+    async def warm(self, backend: Backend, model: str) -> bool:
+        """Load `model` on one backend and pin it: a chat with no messages only loads the model"""
+        backend.warming = True
+        started = time.perf_counter()
+        try:
+            response = await backend.client.post(
+                "/api/chat",
+                json={"model": model, "messages": [], "keep_alive": keep_alive()},
+                timeout=httpx.Timeout(settings.OLLAMA_WARMUP_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT)
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            backend.last_error = f"warmup: {type(e).__name__}: {e}"
+            print(f"[Router] Warm-up of {model} on {backend.url} failed: {type(e).__name__}")
+            return False
+        finally:
+            backend.warming = False
+        backend.loaded.add(model)
+        backend.warmed_at = time.time()
+        backend.stats["warmups"] += 1
+        print(f"[Router] {model} loaded on {backend.url} in {time.perf_counter() - started:.1f}s")
+        return True
+
+    def _warm_cold_backends(self) -> None:
+        """Start a warm-up on each healthy backend that has a served model installed but not in memory
+
+        One model at a time per backend, MODEL_NAME first so readiness comes
+        as early as it can.
+        """
+        for backend in self.backends:
+            if backend.state != "closed" or backend.warming:
+                continue
+            model = next((m for m in served_models() if backend.warmth(m) == 1), None)
+            if model is not None:
+                task = asyncio.create_task(self.warm(backend, model))
+                self._warmups.add(task)
+                task.add_done_callback(self._warmups.discard)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_all()
+            self._resize()
+            if settings.OLLAMA_WARMUP:
+                self._warm_cold_backends()
+            # The first pass (and its warm-up) runs at startup whatever the interval
+            if settings.OLLAMA_HEALTH_INTERVAL <= 0:
+                return
+            await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL)
+
+    def start(self) -> None:
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    @property
+    def monitored(self) -> bool:
+        """Whether health checks keep running (OLLAMA_HEALTH_INTERVAL > 0)"""
+        return self._health_task is not None and settings.OLLAMA_HEALTH_INTERVAL > 0
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for task in list(self._warmups):
+            task.cancel()
+        for backend in self.backends:
+            await backend.client.aclose()
+
+    def serves(self, model: str) -> bool:
+        """Whether any available backend has `model` loaded or installed (without choosing one)"""
+        model = model_tag(model)
+        now = time.monotonic()
+        return any(b.available(now) and b.warmth(model) for b in self.backends)
+
+    def primary(self) -> Backend:
+        """Best backend for MODEL_NAME right now (or the first one), for direct use"""
+        return self.choose(model_tag(settings.MODEL_NAME)) or self.backends[0]
+
+    def readiness(self) -> dict:
+        """Cached view for the health probes: ready once an available backend has MODEL_NAME in memory"""
+        model = model_tag(settings.MODEL_NAME)
+        now = time.monotonic()
+        fresh_after = time.time() - STALE_CHECKS * settings.OLLAMA_HEALTH_INTERVAL
+        monitored = self.monitored
+        backends = []
+        for b in self.backends:
+            fresh = not monitored or (b.checked_at is not None and b.checked_at >= fresh_after)
+            backends.append({
+                "url": b.url,
+                "state": b.state,
+                "model_loaded": model in b.loaded,
+                "warming": b.warming,
+                "ready": fresh and b.available(now) and model in b.loaded,
+                "checked_at": b.checked_at
+            })
+        ready = sum(b["ready"] for b in backends)
+        return {
+            "ready": ready > 0,
+            "model": model,
+            "ready_backends": ready,
+            "total_backends": len(backends),
+            "warming": any(b["warming"] for b in backends),
+            "monitored": monitored,
+            "backends": backends
+        }
+
+    def info(self) -> dict:
+        return {
+            "routing": settings.LLM_ROUTING,
+            "model": model_tag(settings.MODEL_NAME),
+            "available": self.available_count(),
+            "max_in_flight": scheduler.max_in_flight,
+            "backends": [b.info() for b in self.backends]
+        }
+
+class _StreamCall:
+    """Handle for a routed stream; observe(final_chunk) records Ollama's timing for the backend"""
+
+    def __init__(self, router: BackendRouter, backend: Backend, model: str, started: float):
+        self.router, self.backend, self.model, self.started = router, backend, model, started
+        self.observed = False
+
+    def observe(self, data: dict) -> None:
+        self.observed = True
+        self.router._succeeded(self.backend, self.model, data, time.perf_counter() - self.started)
+
+_router: Optional[BackendRouter] = None
+
+def get_router() -> BackendRouter:
+    """The process-wide router, created on first use (clients are per event loop, see llm_client)"""
+    global _router
+    if _router is None:
+        _router = BackendRouter(backend_urls())
+    return _router
+
+async def close_router() -> None:
+    global _router
+    if _router is not None:
+        await _router.close()
+        _router = None
+
+Gauge("nyaya_llm_backend_up", "1 while the backend's circuit is closed or half-open", ("backend",),
+      lambda: {(b.url,): int(b.state != "open") for b in _router.backends} if _router else {})
+Gauge("nyaya_llm_backend_outstanding", "LLM calls in flight per backend", ("backend",),
+      lambda: {(b.url,): b.outstanding for b in _router.backends} if _router else {})
@@ -0,0 +1,178 @@
+"""LRU + TTL cache for analysis results, keyed on a canonical case hash"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import settings
+from models.schemas import ProcurementCase
+import agents.prompts as prompts
+
+def _prompts_fingerprint() -> str:
+    """Hash of PROMPT_VERSION plus every prompt text, so prompt edits invalidate the cache"""
+    h = hashlib.sha256(prompts.PROMPT_VERSION.encode())
+    for name in sorted(n for n in dir(prompts) if n.endswith("_PROMPT")):
+        h.update(name.encode())
+        h.update(getattr(prompts, name).encode())
+    return h.hexdigest()[:16]
+
+def normalize_case(case: ProcurementCase) -> dict:
+    """Canonical form of a case: stripped strings, sorted bids and documents"""
+    data = case.model_dump(mode="json")
+    for key, value in data.items():
+        if isinstance(value, str):
+            data[key] = " ".join(value.split())
+    data["bids"] = sorted(
+        (
+            {**b, "vendor_name": " ".join(b["vendor_name"].split())}
+            for b in data["bids"]
+        ),
+        key=lambda b: (b["vendor_name"], b["bid_amount"])
+    )
+    data["documents_available"] = sorted({" ".join(d.split()) for d in data["documents_available"]})
+    return data
+
+def case_cache_key(case: ProcurementCase, *extra: str) -> str:
+    """sha256 over the normalized case, prompt versions and model name"""
+    payload = json.dumps(
+        {
+            "case": normalize_case(case),
+            "prompts": _prompts_fingerprint(),
+            "model": settings.MODEL_NAME,
+            "extra": list(extra)
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class VerdictCache:
+    """In-memory LRU with TTL and optional JSON snapshot on disk
+
+    Writes only mark the snapshot dirty; it is rewritten in a worker thread
+    at most once per `flush_delay` seconds, and at shutdown (flush()).
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0, path: str = "", flush_delay: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self.stats = {}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        if path:
+            self._load()
+
+    def _count(self, source: str, field: str) -> None:
+        bucket = self.stats.setdefault(source, {"hits": 0, "misses": 0})
+        bucket[field] += 1
+
+    def get(self, key: str, source: str = "rest") -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self.ttl <= 0 or time.time() - stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self._count(source, "hits")
+                return value
+            del self._entries[key]
+        self._count(source, "misses")
+        return None
+
+    def put(self, key: str, value: dict) -> None:
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._mark_dirty()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._mark_dirty()
+
+    def info(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persistent": bool(self.path),
+            "unsaved": self._dirty,
+            "counters": self.stats
+        }
+
+    def _mark_dirty(self) -> None:
+        if not self.path:
+            return
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                # No event loop (scripts, tests): nothing to debounce against
+                self._save(self._snapshot())
+                self._dirty = False
+
+    async def _flush_later(self) -> None:
+        # Loops so writes that land during a flush go out with the next one
+        while self._dirty:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the snapshot now if anything changed since the last write"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:  # one writer at a time on the .tmp file
+            if not self._dirty:
+                return
+            snapshot = self._snapshot()
+            self._dirty = False
+            await asyncio.to_thread(self._save, snapshot)
+
+    async def close(self) -> None:
+        """Write any unsaved entries and stop the debounce (shutdown)"""
+        if self.path:
+            await self.flush()
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+
+    def _snapshot(self) -> list:
+        return [[k, t, v] for k, (t, v) in self._entries.items()]
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        now = time.time()
+        for key, stored_at, value in raw.get("entries", []):
+            if self.ttl <= 0 or now - stored_at < self.ttl:
+                self._entries[key] = (stored_at, value)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _save(self, entries: list) -> None:
+        # Write-then-rename so a crash never leaves a truncated snapshot
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Cache] Failed to persist verdict cache: {e}")
+
+verdict_cache = VerdictCache(
+    max_size=settings.VERDICT_CACHE_SIZE,
+    ttl=settings.VERDICT_CACHE_TTL,
+    path=settings.VERDICT_CACHE_PATH,
+    flush_delay=settings.VERDICT_CACHE_FLUSH_SECONDS
+)
@@ -0,0 +1,166 @@
+"""Incremental JSON parser for streamed LLM completions
+
+Feeds on raw token chunks and reports each top-level field of the first
+JSON object as soon as its value closes, plus each element of the
+`findings` array as it completes. This lets callers act on `stance` and
+`score` long before the model finishes writing its explanation.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+# Event kinds returned by StreamingJSONParser.feed()
+FIELD = "field"  # (FIELD, key, value)
+ITEM = "item"  # (ITEM, array_key, element)
+
+class StreamingJSONParser:
+    def __init__(self, stream_arrays: Tuple[str, ...] = ("findings",)):
+        self.stream_arrays = stream_arrays
+        self.buffer = ""
+        self.fields: dict = {}
+        self.value: Optional[dict] = None  # complete top-level object, once closed
+        self.error: Optional[str] = None
+        self._pos = 0
+        self._start: Optional[int] = None  # index of the top-level '{'
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect = "key"  # key | colon | value | comma (at depth 1)
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self._start is not None and not self._stack
+
+    @property
+    def in_string(self) -> bool:
+        return self._in_string
+
+    @property
+    def open_brackets(self) -> str:
+        """Unclosed '{'/'[' from outermost to innermost"""
+        return "".join(self._stack)
+
+    def feed(self, chunk: str) -> List[tuple]:
+        """Consume a chunk and return the events it completed"""
+        self.buffer += chunk
+        events = []
+        buf = self.buffer
+        i = self._pos
+        n = len(buf)
+        while i < n and not self.done:
+            c = buf[i]
+            if self._start is None:
+                if c == "{":
+                    self._start = i
+                    self._stack.append("{")
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._close_depth1_string(i, events)
+                i += 1
+                continue
+
+            depth = len(self._stack)
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if depth == 1 and self._expect == "value":
+                    self._value_start = i
+                    self._expect = "comma"
+            elif c in "{[":
+                if depth == 1 and self._expect == "value":
+                    self._value_start = i
+                    self._expect = "comma"
+                if depth == 2 and c == "{" and self._stack[-1] == "[" and self._key in self.stream_arrays:
+                    self._item_start = i
+                self._stack.append(c)
+            elif c in "}]":
+                if depth == 1 and self._value_start is not None and self._expect == "comma" and buf[self._value_start] not in '"{[':
+                    self._emit_field(buf[self._value_start:i], events)
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 2 and c == "}" and self._item_start is not None:
+                    self._emit_item(buf[self._item_start:i + 1], events)
+                    self._item_start = None
+                elif depth == 1 and self._value_start is not None:
+                    self._emit_field(buf[self._value_start:i + 1], events)
+                elif depth == 0:
+                    self._finish(buf[self._start:i + 1])
+            elif depth == 1:
+                if c == ":" and self._expect == "colon":
+                    self._expect = "value"
+                elif c == ",":
+                    if self._value_start is not None:
+                        self._emit_field(buf[self._value_start:i], events)
+                    self._expect = "key"
+                elif not c.isspace() and self._expect == "value":
+                    # Number, true, false or null: ends at the next ',' or '}'
+                    self._value_start = i
+                    self._expect = "comma"
+            i += 1
+        self._pos = i
+        return events
+
+    def _close_depth1_string(self, i: int, events: list) -> None:
+        text = self.buffer[self._string_start:i + 1]
+        if self._expect == "key":
+            self._key = _loads(text)
+            self._expect = "colon"
+        elif self._value_start == self._string_start:
+            self._emit_field(text, events)
+
+    def _emit_field(self, text: str, events: list) -> None:
+        self._value_start = None
+        key = self._key
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        if key is not None and key not in self.fields:
+            self.fields[key] = value
+            events.append((FIELD, key, value))
+
+    def _emit_item(self, text: str, events: list) -> None:
+        try:
+            events.append((ITEM, self._key, json.loads(text)))
+        except json.JSONDecodeError:
+            pass
+
+    def _finish(self, text: str) -> None:
+        try:
+            self.value = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.error = f"Invalid JSON at line {e.lineno} column {e.colno}: {e.msg} (near {_snippet(text, e.pos)!r})"
+
+    def diagnose(self) -> str:
+        """Human-readable reason the stream did not yield a complete object"""
+        if self.error:
+            return self.error
+        if self._start is None:
+            return f"No JSON object found in response ({len(self.buffer)} chars)"
+        if self._stack:
+            where = "inside a string" if self._in_string else f"with {len(self._stack)} unclosed bracket(s) {''.join(self._stack)!r}"
+            fields = ", ".join(self.fields) or "none"
+            return f"Response ended {where} after {len(self.buffer)} chars (likely truncated by num_predict); complete fields: {fields}"
+        return "OK"
+
+def _loads(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text.strip('"')
+
+def _snippet(text: str, pos: int, width: int = 30) -> str:
+    return text[max(0, pos - width):pos + width]
@@ -1,36 +1,131 @@
 import httpx
 import json
+from typing import AsyncIterator, List, Optional
 from config import settings
+from .scheduler import scheduler, Priority
+from .json_stream import StreamingJSONParser
+from .usage import record_usage
+from .metrics import record_llm_call
+from .backends import BackendRouter, get_router, close_router, keep_alive
 
-async def call_ollama(prompt: str, system_prompt: str = "") -> str:
-    """Call local Ollama LLM using Chat API (Model Agnostic)"""
-    
+# Backends and their pooled clients live in the router, created/closed by
+# the FastAPI lifespan (see main.py) or lazily for scripts without one
+async def init_client() -> BackendRouter:
+    """Create the backend router and start its health checks (idempotent)"""
+    router = get_router()
+    router.start()
+    return router
+
+async def close_client() -> None:
+    """Stop health checks and release every backend's pooled connections"""
+    await close_router()
+
+def get_client() -> httpx.AsyncClient:
+    """Client of the best backend for MODEL_NAME right now"""
+    return get_router().primary().client
+
+def _chat_payload(prompt: str, system_prompt: str, stream: bool, format: Optional[dict] = None, options: Optional[dict] = None, history: Optional[List[dict]] = None, model: Optional[str] = None) -> dict:
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
-    
+    # Earlier turns of a conversation, unchanged, so the prefix stays cacheable
+    messages.extend(history or [])
     messages.append({"role": "user", "content": prompt})
+
+    payload = {
+        "model": model or settings.MODEL_NAME,
+        "messages": messages,
+        "stream": stream,
+        "keep_alive": keep_alive(),
+        "options": {
+            "temperature": 0.3,
+            "top_p": 0.9,
+            "num_predict": 2000,
+            **(options or {})
+        }
+    }
+    # Ollama structured outputs: constrain decoding to a JSON schema
+    if format is not None:
+        payload["format"] = format
+    return payload
+
+def _prompt_chars(prompt: str, system_prompt: str, history: Optional[List[dict]]) -> int:
+    return len(system_prompt) + len(prompt) + sum(len(m["content"]) for m in history or [])
+
+async def call_ollama(prompt: str, system_prompt: str = "", priority: Optional[Priority] = None, format: Optional[dict] = None, tag: str = "", options: Optional[dict] = None, history: Optional[List[dict]] = None, model: Optional[str] = None) -> str:
+    """Call local Ollama LLM using Chat API (Model Agnostic)
+
+    Waits for a slot from the global scheduler; priority defaults to the
+    current request's class (see utils.scheduler.llm_priority). Put stable
+    instructions in system_prompt and the per-case text last in prompt so
+    Ollama can reuse its prompt cache. `tag` labels the call in usage stats;
+    `history` holds earlier chat turns, sent between the two. `model`
+    overrides MODEL_NAME for this call (see agents/cascade.py).
+    """
     
-    async with httpx.AsyncClient(timeout=300.0) as client:  # 5 min timeout for slow first-load
+    async with scheduler.slot(priority) as wait_ms:
         # Use /api/chat instead of /api/generate context handling
-        response = await client.post(
-            f"{settings.OLLAMA_URL}/api/chat",
-            json={
-                "model": settings.MODEL_NAME,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "num_predict": 2000
-                }
-            }
+        response = await get_router().post(
+            "/api/chat",
+            _chat_payload(prompt, system_prompt, stream=False, format=format, options=options, history=history, model=model)
         )
-        
-        if response.status_code != 200:
-            raise Exception(f"Ollama error: {response.text}")
-        
-        return response.json()["message"]["content"]
+    
+    if response.status_code != 200:
+        raise Exception(f"Ollama error: {response.text}")
+    
+    data = response.json()
+    record_usage(tag, _prompt_chars(prompt, system_prompt, history), data)
+    record_llm_call(tag, priority, wait_ms, data)
+    return data["message"]["content"]
+
+async def stream_ollama(prompt: str, system_prompt: str = "", priority: Optional[Priority] = None, format: Optional[dict] = None, tag: str = "", options: Optional[dict] = None, history: Optional[List[dict]] = None, model: Optional[str] = None) -> AsyncIterator[str]:
+    """Stream tokens from Ollama's Chat API as they are generated
+
+    Holds one scheduler slot for the whole generation, like call_ollama().
+    """
+    async with scheduler.slot(priority) as wait_ms:
+        async with get_router().stream(
+            "/api/chat",
+            _chat_payload(prompt, system_prompt, stream=True, format=format, options=options, history=history, model=model)
+        ) as (call, response):
+            if response.status_code != 200:
+                body = await response.aread()
+                raise Exception(f"Ollama error: {body.decode(errors='replace')}")
+
+            # NDJSON: one {"message": {"content": ...}, "done": bool} object per line
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise Exception(f"Ollama error: {chunk['error']}")
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    call.observe(chunk)
+                    record_usage(tag, _prompt_chars(prompt, system_prompt, history), chunk)
+                    record_llm_call(tag, priority, wait_ms, chunk)
+                    break
+
+async def stream_ollama_json(prompt: str, system_prompt: str = "", on_token=None, on_event=None, priority: Optional[Priority] = None, format: Optional[dict] = None, tag: str = "", options: Optional[dict] = None, model: Optional[str] = None) -> dict:
+    """Stream a completion and parse it incrementally
+
+    on_token(token) is awaited for every chunk; on_event(kind, key, value)
+    for every field/finding the parser completes (see utils.json_stream).
+    Returns the parsed object, or an error dict with a diagnostic.
+    """
+    parser = StreamingJSONParser()
+    async for token in stream_ollama(prompt, system_prompt, priority=priority, format=format, tag=tag, options=options, model=model):
+        if on_token is not None:
+            await on_token(token)
+        events = parser.feed(token)
+        if on_event is not None:
+            for event in events:
+                await on_event(*event)
+    if parser.value is not None:
+        return parser.value
+    return parse_json_response(parser.buffer)
 
 def parse_json_response(response: str) -> dict:
     """Extract JSON from LLM response"""
@@ -41,4 +136,10 @@ def parse_json_response(response: str) -> dict:
             return json.loads(response[start:end])
     except json.JSONDecodeError:
         pass
-    return {"error": "Parse failed", "raw": response}
+
+    # Fall back to the first complete object (e.g. trailing prose with braces)
+    parser = StreamingJSONParser()
+    parser.feed(response)
+    if parser.value is not None:
+        return parser.value
+    return {"error": "Parse failed", "detail": parser.diagnose(), "raw": response}
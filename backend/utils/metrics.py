@@ -0,0 +1,218 @@
+"""Per-stage latency and token metrics
+
+Process-wide counters and histograms rendered in the Prometheus text
+exposition format at /metrics, plus an optional per-request breakdown
+(RequestTimings) carried in a ContextVar so parallel agent tasks add to the
+same request. Stages: retrieval, analytics, agents, chief_justice and parse; each LLM
+call adds its queue wait and Ollama's prompt/eval counters and durations.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from .scheduler import scheduler, llm_priority, Priority
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: Dict[tuple, float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _labels(self.label_names, labels, 'le="%s"' % _number(bound))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(round(series[-2], 6))}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+class Gauge:
+    """Sampled at scrape time from a callback returning {label values: value}"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], collect: Callable[[], Dict[tuple, float]]):
+        self.name, self.help, self.label_names, self.collect = name, help, labels, collect
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+REGISTRY: list = []
+
+STAGE_SECONDS = Histogram("nyaya_stage_seconds", "Time spent per analysis stage", ("stage",))
+AGENT_SECONDS = Histogram("nyaya_agent_seconds", "Wall time per agent, including queue wait and retries", ("agent",))
+ANALYSIS_SECONDS = Histogram("nyaya_analysis_seconds", "End-to-end analysis time", ("path", "outcome"))
+ANALYSES = Counter("nyaya_analyses_total", "Completed analyses", ("path", "outcome"))
+TENDER_PARSES = Counter("nyaya_tender_parses_total", "Tender parses by path (fast_path = no LLM call)", ("path",))
+TENDER_LLM_FIELDS = Counter("nyaya_tender_llm_fields_total", "Fields the regex fast path left to the LLM", ("field",))
+LLM_CALLS = Counter("nyaya_llm_calls_total", "Ollama chat calls", ("tag",))
+LLM_TOKENS = Counter("nyaya_llm_tokens_total", "Tokens reported by Ollama (prompt = prompt_eval_count, completion = eval_count)", ("tag", "kind"))
+LLM_QUEUE_WAIT = Histogram("nyaya_llm_queue_wait_seconds", "Time an LLM call waited for a scheduler slot", ("priority",))
+LLM_PROMPT_EVAL = Histogram("nyaya_llm_prompt_eval_seconds", "Ollama prompt_eval_duration (prefill)", ("tag",))
+LLM_EVAL = Histogram("nyaya_llm_eval_seconds", "Ollama eval_duration (decode)", ("tag",))
+LLM_PROMPT_TOKENS = Histogram("nyaya_llm_prompt_eval_tokens", "Ollama prompt_eval_count per call", ("tag",), buckets=TOKEN_BUCKETS)
+LLM_COMPLETION_TOKENS = Histogram("nyaya_llm_eval_tokens", "Ollama eval_count per call", ("tag",), buckets=TOKEN_BUCKETS)
+Gauge("nyaya_scheduler_in_flight", "LLM calls currently running", (), lambda: {(): scheduler.in_flight})
+Gauge("nyaya_scheduler_queued", "LLM calls waiting for a slot", ("priority",), lambda: {(p,): n for p, n in scheduler.info()["queued"].items()})
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class RequestTimings:
+    """Timing breakdown for one analysis request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.agents: Dict[str, Dict[str, float]] = {}
+
+    def add(self, bucket: Dict[str, float], key: str, value: float) -> None:
+        bucket[key] = bucket.get(key, 0) + value
+
+    def agent(self, name: str) -> Dict[str, float]:
+        return self.agents.setdefault(name, {})
+
+    def report(self) -> dict:
+        llm: Dict[str, float] = {}
+        for agent in self.agents.values():
+            for key in ("calls", "queue_wait_ms", "prompt_eval_count", "eval_count", "prompt_eval_ms", "eval_ms"):
+                if key in agent:
+                    self.add(llm, key, agent[key])
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages": {k: round(v, 1) for k, v in self.stages.items()},
+            "llm": {k: round(v, 1) for k, v in llm.items()},
+            "agents": {name: {k: round(v, 1) for k, v in a.items()} for name, a in self.agents.items()}
+        }
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+current_agent: ContextVar[Optional[str]] = ContextVar("current_agent", default=None)
+
+def start_timing() -> RequestTimings:
+    """Begin a breakdown for the current request (inherited by child tasks)"""
+    timings = RequestTimings()
+    request_timings.set(timings)
+    return timings
+
+@contextmanager
+def stage(name: str):
+    """Time a stage; inside an agent scope it is attributed to that agent"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, name)
+        timings = request_timings.get()
+        if timings is not None:
+            agent = current_agent.get()
+            bucket = timings.agent(agent) if agent else timings.stages
+            timings.add(bucket, f"{name}_ms", elapsed * 1000)
+
+@contextmanager
+def agent_scope(name: str):
+    """Attribute LLM calls and stages in this block to one agent"""
+    token = current_agent.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        current_agent.reset(token)
+        AGENT_SECONDS.observe(elapsed, name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.add(timings.agent(name), "wall_ms", elapsed * 1000)
+
+def record_llm_call(tag: str, priority: Optional[Priority], wait_ms: float, data: dict) -> None:
+    """Record one finished Ollama call (data is the final, done chunk)"""
+    tag = tag or "untagged"
+    priority = llm_priority.get() if priority is None else priority
+    LLM_CALLS.inc(tag)
+    LLM_QUEUE_WAIT.observe(wait_ms / 1000, priority.name.lower())
+    prompt_tokens = data.get("prompt_eval_count", 0)
+    completion_tokens = data.get("eval_count", 0)
+    prompt_ms = data.get("prompt_eval_duration", 0) / 1e6
+    eval_ms = data.get("eval_duration", 0) / 1e6
+    LLM_TOKENS.inc(tag, "prompt", amount=prompt_tokens)
+    LLM_TOKENS.inc(tag, "completion", amount=completion_tokens)
+    LLM_PROMPT_TOKENS.observe(prompt_tokens, tag)
+    LLM_COMPLETION_TOKENS.observe(completion_tokens, tag)
+    LLM_PROMPT_EVAL.observe(prompt_ms / 1000, tag)
+    LLM_EVAL.observe(eval_ms / 1000, tag)
+
+    timings = request_timings.get()
+    if timings is not None:
+        bucket = timings.agent(current_agent.get() or tag)
+        for key, value in (
+            ("calls", 1),
+            ("queue_wait_ms", wait_ms),
+            ("prompt_eval_count", prompt_tokens),
+            ("eval_count", completion_tokens),
+            ("prompt_eval_ms", prompt_ms),
+            ("eval_ms", eval_ms)
+        ):
+            timings.add(bucket, key, value)
+
+def record_tender_parse(path: str, llm_fields) -> None:
+    TENDER_PARSES.inc(path)
+    for field in llm_fields:
+        TENDER_LLM_FIELDS.inc(field)
+
+def record_analysis(path: str, outcome: str, timings: RequestTimings) -> None:
+    elapsed = time.perf_counter() - timings.started
+    ANALYSES.inc(path, outcome)
+    ANALYSIS_SECONDS.observe(elapsed, path, outcome)
@@ -0,0 +1,187 @@
+"""Global admission control and priority scheduling for LLM calls
+
+Every call_ollama() takes a slot from the shared scheduler. At most
+LLM_MAX_IN_FLIGHT calls per available Ollama backend (utils.backends) run
+at once; the rest wait in a priority
+queue (interactive before default before batch). Requests are admitted up
+front (scheduler.admission) against per-class and total queue-depth
+limits, reserving queue space for the whole request, so an overloaded
+server answers 429/503 with Retry-After instead of timing out.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Optional
+
+from config import settings
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # WebSocket analysis, /ask_bench
+    DEFAULT = 1  # REST /analyze, /parse_tender
+    BATCH = 2  # /analyze/batch and offline jobs
+
+class SchedulerBusy(Exception):
+    """Raised at admission when the queue for a priority class is full"""
+
+    def __init__(self, status_code: int, retry_after: float, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+# Priority and queue-wait accumulator for the current request (inherited by child tasks)
+llm_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.DEFAULT)
+request_queue_wait: ContextVar[Optional[dict]] = ContextVar("request_queue_wait", default=None)
+# Outstanding admitted-but-not-yet-started calls for the current request
+_admission_ticket: ContextVar[Optional[dict]] = ContextVar("admission_ticket", default=None)
+
+def start_request_tracking(priority: Priority) -> dict:
+    """Set the priority for this request and return its queue-wait accumulator"""
+    stats = {"calls": 0, "queue_wait_ms": 0.0}
+    llm_priority.set(priority)
+    request_queue_wait.set(stats)
+    return stats
+
+class LLMScheduler:
+    def __init__(self, max_in_flight: int, queue_limits: dict, total_queue_limit: int):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_limits = queue_limits  # 0 = unbounded
+        self.total_queue_limit = total_queue_limit
+        self.in_flight = 0
+        self._waiters: list = []  # heap of (priority, seq, future)
+        self._queued = {p: 0 for p in Priority}
+        self._reserved = {p: 0 for p in Priority}
+        self._seq = itertools.count()
+        self._avg_service = 5.0  # seconds, EWMA of call duration
+        self.stats = {"admitted": 0, "rejected_429": 0, "rejected_503": 0, "completed": 0}
+
+    def queue_depth(self, up_to: Priority = Priority.BATCH) -> int:
+        """Calls queued or admitted at `up_to` priority or higher (ahead of or level with it)"""
+        return sum(self._queued[p] + self._reserved[p] for p in Priority if p <= up_to)
+
+    def retry_after(self, priority: Priority = Priority.BATCH) -> int:
+        """Rough seconds until the queue ahead of `priority` drains"""
+        backlog = self.queue_depth(priority) + self.in_flight
+        return max(1, math.ceil(self._avg_service * backlog / self.max_in_flight))
+
+    def admit(self, priority: Priority, calls: int = 1) -> None:
+        """Reject up front if adding `calls` would overflow the queue limits
+
+        Batch work is never rejected (it is bounded by its own pool) and does
+        not count against the total limit, since everything else jumps it.
+        """
+        if priority == Priority.BATCH:
+            return
+        free = max(0, self.max_in_flight - self.in_flight)
+        total = self.queue_depth(Priority.DEFAULT) + calls
+        if self.total_queue_limit and total > self.total_queue_limit + free:
+            self.stats["rejected_503"] += 1
+            raise SchedulerBusy(503, self.retry_after(priority), "LLM backend saturated, retry later")
+        limit = self.queue_limits.get(priority, 0)
+        if limit and self._queued[priority] + self._reserved[priority] + calls > limit + free:
+            self.stats["rejected_429"] += 1
+            raise SchedulerBusy(429, self.retry_after(priority), f"Too many queued {priority.name.lower()} requests, retry later")
+        self.stats["admitted"] += 1
+
+    @contextmanager
+    def admission(self, priority: Priority, calls: int = 1):
+        """Admit `calls` LLM calls for this request and hold their queue space until used"""
+        self.admit(priority, calls)
+        if priority == Priority.BATCH:
+            yield
+            return
+        ticket = {"priority": priority, "left": calls}
+        self._reserved[priority] += calls
+        token = _admission_ticket.set(ticket)
+        try:
+            yield
+        finally:
+            self._reserved[priority] -= ticket["left"]
+            ticket["left"] = 0
+            _admission_ticket.reset(token)
+
+    async def _acquire(self, priority: Priority) -> None:
+        ticket = _admission_ticket.get()
+        if ticket is not None and ticket["left"] > 0:
+            ticket["left"] -= 1
+            self._reserved[ticket["priority"]] -= 1
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self._queued[priority] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we were cancelled: pass it on
+                self._release()
+            elif entry in self._waiters:
+                # Not yet popped; a cancelled entry _dispatch already popped is accounted for
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._queued[priority] -= 1
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def resize(self, max_in_flight: int) -> None:
+        """Change the in-flight cap (LLM backends coming and going); waiters fill new slots at once"""
+        self.max_in_flight = max(1, max_in_flight)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.in_flight < self.max_in_flight:
+            priority, _, future = heapq.heappop(self._waiters)
+            self._queued[priority] -= 1
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None):
+        """Hold one in-flight LLM slot; records queue wait on the current request"""
+        priority = llm_priority.get() if priority is None else priority
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        started = time.perf_counter()
+        wait_ms = (started - queued_at) * 1000
+        stats = request_queue_wait.get()
+        if stats is not None:
+            stats["calls"] += 1
+            stats["queue_wait_ms"] += wait_ms
+        try:
+            yield wait_ms
+        finally:
+            self._avg_service = 0.8 * self._avg_service + 0.2 * (time.perf_counter() - started)
+            self.stats["completed"] += 1
+            self._release()
+
+    def info(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": {p.name.lower(): n for p, n in self._queued.items()},
+            "reserved": {p.name.lower(): n for p, n in self._reserved.items()},
+            "avg_service_s": round(self._avg_service, 3),
+            **self.stats
+        }
+
+scheduler = LLMScheduler(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    queue_limits={
+        Priority.INTERACTIVE: settings.LLM_QUEUE_LIMIT_INTERACTIVE,
+        Priority.DEFAULT: settings.LLM_QUEUE_LIMIT_DEFAULT,
+        Priority.BATCH: settings.LLM_QUEUE_LIMIT_BATCH
+    },
+    total_queue_limit=settings.LLM_QUEUE_LIMIT_TOTAL
+)
@@ -0,0 +1,100 @@
+"""Server-side Bench chat sessions
+
+A session stores the case/verdict context once and the chat history since.
+Every turn sends the same system message (persona + case context) followed
+by the history verbatim, so the message prefix matches the previous call and
+Ollama's prompt cache only has to evaluate the new question (plus the last
+answer). Sessions live in memory with LRU + TTL eviction, like the verdict
+cache; history beyond BENCH_SESSION_MAX_TURNS drops the oldest turns.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import settings
+
+class BenchSession:
+    def __init__(self, case_id: str, system_prompt: str):
+        self.id = uuid.uuid4().hex
+        self.case_id = case_id
+        self.system_prompt = system_prompt  # persona + case context, fixed for the session
+        self.history: List[Dict[str, str]] = []  # alternating user/assistant messages
+        self.created = self.last_used = time.time()
+        self.lock = asyncio.Lock()  # one question at a time keeps history ordered
+
+    def add_turn(self, question: str, answer: str, max_turns: int) -> None:
+        self.history.append({"role": "user", "content": question})
+        self.history.append({"role": "assistant", "content": answer})
+        if max_turns > 0 and len(self.history) > 2 * max_turns:
+            del self.history[:len(self.history) - 2 * max_turns]
+
+    def info(self) -> dict:
+        return {
+            "session_id": self.id,
+            "case_id": self.case_id,
+            "turns": len(self.history) // 2,
+            "created": self.created,
+            "last_used": self.last_used,
+            "history": self.history
+        }
+
+class SessionStore:
+    """In-memory LRU with TTL (idle time) over BenchSession objects"""
+
+    def __init__(self, max_size: int = 512, ttl: float = 1800.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, BenchSession]" = OrderedDict()
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "turns": 0}
+
+    def _expired(self, session: BenchSession, now: float) -> bool:
+        return self.ttl > 0 and now - session.last_used >= self.ttl
+
+    def _sweep(self) -> None:
+        """Drop idle sessions; the LRU order puts the oldest first"""
+        now = time.time()
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if not self._expired(oldest, now):
+                break
+            self._sessions.popitem(last=False)
+            self.stats["expired"] += 1
+
+    def create(self, case_id: str, system_prompt: str) -> BenchSession:
+        self._sweep()
+        session = BenchSession(case_id, system_prompt)
+        self._sessions[session.id] = session
+        self.stats["created"] += 1
+        while len(self._sessions) > self.max_size:
+            self._sessions.popitem(last=False)
+            self.stats["evicted"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[BenchSession]:
+        self._sweep()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.time()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def info(self) -> dict:
+        self._sweep()
+        return {
+            "size": len(self._sessions),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "max_turns": settings.BENCH_SESSION_MAX_TURNS,
+            "counters": self.stats
+        }
+
+bench_sessions = SessionStore(
+    max_size=settings.BENCH_SESSION_MAX,
+    ttl=settings.BENCH_SESSION_TTL
+)
@@ -0,0 +1,202 @@
+"""Schema-constrained LLM output with local repair and bounded retries
+
+Responses are decoded against a JSON schema generated from the Pydantic
+models in models/schemas.py (Ollama's `format` parameter). Anything that
+still fails validation goes through a cheap local repair (code fences,
+trailing commas, truncated brackets, enum casing) and only then is the
+failing call retried, at most LLM_MAX_REPAIR_RETRIES times.
+"""
+
+import json
+import re
+from typing import Optional, Type, Union
+
+from pydantic import BaseModel, ValidationError
+
+from config import settings
+from models.schemas import AgentOpinion, CourtVerdict, FullBenchOpinions, PartialProcurementCase, ProcurementCase, VerdictProse
+from .json_stream import StreamingJSONParser
+from .llm_client import call_ollama, parse_json_response
+from .metrics import stage
+
+# JSON schemas handed to Ollama's structured output `format`
+SCHEMAS = {
+    AgentOpinion: AgentOpinion.model_json_schema(),
+    CourtVerdict: CourtVerdict.model_json_schema(),
+    FullBenchOpinions: FullBenchOpinions.model_json_schema(),
+    ProcurementCase: ProcurementCase.model_json_schema(),
+    PartialProcurementCase: PartialProcurementCase.model_json_schema(),
+    VerdictProse: VerdictProse.model_json_schema()
+}
+
+# Parse/repair/retry counters per output kind (agent, verdict, tender)
+structured_stats: dict = {}
+
+class StructuredOutputError(Exception):
+    """Model output still invalid after repair and all retries"""
+
+    def __init__(self, kind: str, detail: str, raw: str = ""):
+        super().__init__(f"Invalid {kind} output from LLM: {detail}")
+        self.kind = kind
+        self.detail = detail
+        self.raw = raw
+
+def _count(kind: str, field: str) -> None:
+    bucket = structured_stats.setdefault(kind, {
+        "calls": 0,
+        "parse_failures": 0,
+        "repaired": 0,
+        "retries": 0,
+        "retry_successes": 0,
+        "exhausted": 0
+    })
+    bucket[field] += 1
+
+def stats_report() -> dict:
+    """Counters plus parse-failure and retry rates per kind"""
+    report = {}
+    for kind, c in structured_stats.items():
+        calls = c["calls"] or 1
+        report[kind] = {
+            **c,
+            "parse_failure_rate": round(c["parse_failures"] / calls, 4),
+            "retry_rate": round(c["retries"] / calls, 4)
+        }
+    return report
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+def repair_json(text: str) -> Optional[dict]:
+    """Best-effort local fix of near-valid JSON; None if beyond repair"""
+    text = _FENCE.sub("", text)
+    start = text.find("{")
+    if start == -1:
+        return None
+    text = _TRAILING_COMMA.sub(r"\1", text[start:])
+
+    parser = StreamingJSONParser(stream_arrays=())
+    parser.feed(text)
+    if parser.value is not None:
+        return parser.value
+    if parser.done:
+        return None
+
+    # Truncated output: close the open string and brackets
+    text = parser.buffer.rstrip()
+    if parser.in_string:
+        text += '"'
+    text = _TRAILING_COMMA.sub(r"\1", text.rstrip().rstrip(",").rstrip(":"))
+    closers = {"{": "}", "[": "]"}
+    text += "".join(closers[c] for c in reversed(parser.open_brackets))
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+def _normalize(model: Type[BaseModel], data: dict) -> dict:
+    """Fix common near-misses before validation (casing, score ranges)"""
+    data = dict(data)
+    if model is AgentOpinion:
+        if isinstance(data.get("stance"), str):
+            data["stance"] = data["stance"].strip().lower()
+        if isinstance(data.get("score"), (int, float)):
+            data["score"] = int(round(min(100, max(0, data["score"]))))
+    elif model is CourtVerdict:
+        if isinstance(data.get("verdict"), str):
+            data["verdict"] = data["verdict"].strip().upper()
+    return data
+
+def validate_output(model: Type[BaseModel], data: dict) -> dict:
+    """Validate against the model and return its plain-dict form"""
+    return model.model_validate(_normalize(model, data)).model_dump(mode="json")
+
+def _check(model: Type[BaseModel], response: Union[str, dict]) -> tuple:
+    """Return (validated dict or None, diagnostic, repaired?)
+
+    `response` is raw completion text, or an already-parsed dict (possibly
+    a parse_json_response error dict carrying the raw text).
+    """
+    if isinstance(response, dict):
+        data = response
+        text = response.get("raw", "")
+    else:
+        data = parse_json_response(response)
+        text = response
+    repaired = False
+    if "error" in data and "raw" in data:
+        fixed = repair_json(text)
+        if fixed is None:
+            return None, data.get("detail", "Parse failed"), False
+        data, repaired = fixed, True
+    try:
+        return validate_output(model, data), "", repaired
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()[:5])
+        return None, f"Schema validation failed: {errors}", repaired
+
+def validate_sections(model: Type[BaseModel], kind: str, response: Union[str, dict], names) -> tuple:
+    """Validate each named section of a combined response on its own
+
+    Returns (valid sections by name, names that failed) so callers can
+    redo only the failing sections.
+    """
+    data = response
+    if isinstance(response, str):
+        data = parse_json_response(response)
+    if "error" in data and "raw" in data:
+        data = repair_json(data["raw"]) or {}
+    valid, failed = {}, []
+    for name in names:
+        _count(kind, "calls")
+        section = data.get(name)
+        try:
+            if not isinstance(section, dict):
+                raise ValueError
+            valid[name] = validate_output(model, section)
+        except (ValueError, ValidationError):
+            _count(kind, "parse_failures")
+            failed.append(name)
+    return valid, failed
+
+def retry_prompt(prompt: str, detail: str) -> str:
+    """Targeted retry: same task, plus what was wrong last time"""
+    return f"""{prompt}
+
+YOUR PREVIOUS RESPONSE WAS INVALID: {detail}
+Respond again with ONLY a single valid JSON object matching the required schema."""
+
+def schema_for(model: Type[BaseModel]) -> Optional[dict]:
+    return SCHEMAS[model] if settings.LLM_STRUCTURED_OUTPUT else None
+
+async def ensure_structured(model: Type[BaseModel], kind: str, prompt: str, response: Union[str, dict], llm=call_ollama, system_prompt: str = "", retries: Optional[int] = None) -> dict:
+    """Validate a completion already in hand; repair, then retry only this call (retries defaults to LLM_MAX_REPAIR_RETRIES)"""
+    _count(kind, "calls")
+    text = response if isinstance(response, str) else response.get("raw", json.dumps(response))
+    with stage("parse"):
+        data, detail, repaired = _check(model, response)
+    if data is not None:
+        if repaired:
+            _count(kind, "repaired")
+        return data
+    _count(kind, "parse_failures")
+
+    for _ in range(settings.LLM_MAX_REPAIR_RETRIES if retries is None else retries):
+        _count(kind, "retries")
+        text = await llm(retry_prompt(prompt, detail), system_prompt=system_prompt, format=schema_for(model), tag=f"{kind}_retry")
+        with stage("parse"):
+            data, detail, repaired = _check(model, text)
+        if data is not None:
+            _count(kind, "retry_successes")
+            if repaired:
+                _count(kind, "repaired")
+            return data
+
+    _count(kind, "exhausted")
+    raise StructuredOutputError(kind, detail, text)
+
+async def call_structured(model: Type[BaseModel], kind: str, prompt: str, llm=call_ollama, system_prompt: str = "", retries: Optional[int] = None) -> dict:
+    """Call the LLM constrained to `model`'s schema and return a validated dict"""
+    text = await llm(prompt, system_prompt=system_prompt, format=schema_for(model), tag=kind)
+    return await ensure_structured(model, kind, prompt, text, llm=llm, system_prompt=system_prompt, retries=retries)
@@ -0,0 +1,166 @@
+"""Split long tender documents at section boundaries and merge per-chunk extractions
+
+split_sections() packs whole sections into chunks of at most `max_chars`
+(oversized sections are split at paragraphs, then sentences).
+merge_partials() combines the PartialProcurementCase dicts extracted from
+each chunk into one ProcurementCase dict, deterministically: scalar fields
+by majority vote with ties going to the earliest chunk, bids unioned with
+vendors deduplicated by normalised name, documents unioned in order.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+# Lines that start a new section: numbered clauses, SECTION/CHAPTER/PART/ANNEXURE
+# headings and roman numerals (plus short all-caps lines, _CAPS_LINE)
+_HEADING = re.compile(
+    r"^\s*(?:"
+    r"(?:section|chapter|part|annexure|appendix|schedule|form)\s*[-:.]?\s*(?:[ivxlc]+|\d+|[a-z])\b"
+    r"|\d+(?:\.\d+)*[.)]\s+\S|\d+(?:\.\d+)+\s+\S"
+    r"|[ivxlc]+[.)]\s+\S"
+    r")",
+    re.IGNORECASE
+)
+_CAPS_LINE = re.compile(r"^[A-Z][A-Z0-9 ,&/()\-]{3,80}:?$")
+_SENTENCE_END = re.compile(r"(?<=[.;:!?])\s+")
+
+_VENDOR_SUFFIXES = {"pvt", "private", "ltd", "limited", "co", "company", "inc", "llp", "corp", "corporation", "the", "m/s", "ms"}
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 120:
+        return False
+    if _CAPS_LINE.match(stripped):
+        return True
+    # Keyword/numbered patterns are case-insensitive; skip plain sentences
+    return bool(_HEADING.match(stripped)) and not stripped.endswith((",", ";"))
+
+def sections(text: str) -> List[str]:
+    """Split on heading lines; text before the first heading is its own section"""
+    parts: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _is_heading(line) and any(l.strip() for l in parts[-1]):
+            parts.append([])
+        parts[-1].append(line)
+    return ["\n".join(p).strip() for p in parts if any(l.strip() for l in p)]
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    """Paragraphs first, then sentences, then a hard cut as a last resort"""
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", section):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+    return _pack(pieces, max_chars, "\n")
+
+def _pack(pieces: Sequence[str], max_chars: int, joiner: str) -> List[str]:
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        candidate = f"{current}{joiner}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_sections(text: str, max_chars: int) -> List[str]:
+    """Chunks of at most max_chars that never cut a section unless it alone is too long"""
+    pieces: List[str] = []
+    for section in sections(text):
+        if len(section) > max_chars:
+            pieces.extend(_split_oversized(section, max_chars))
+        else:
+            pieces.append(section)
+    return _pack(pieces, max_chars, "\n\n")
+
+def vendor_key(name: str) -> str:
+    """Normalised vendor identity: case, punctuation and company suffixes ignored"""
+    words = re.findall(r"[a-z0-9/]+", name.lower())
+    return " ".join(w for w in words if w not in _VENDOR_SUFFIXES)
+
+def _present(value) -> bool:
+    return value not in (None, "", [], 0, 0.0)
+
+def _vote(values: Sequence) -> Optional[object]:
+    """Most common value; ties go to the one seen first"""
+    values = [v for v in values if _present(v)]
+    if not values:
+        return None
+    counts = Counter(values)
+    best = max(counts.values())
+    return next(v for v in values if counts[v] == best)
+
+def _first(values: Sequence) -> Optional[object]:
+    return next((v for v in values if _present(v)), None)
+
+def _merge_bids(partials: Sequence[dict]) -> List[dict]:
+    grouped: Dict[str, List[dict]] = {}
+    for partial in partials:
+        for bid in partial.get("bids") or []:
+            name = (bid.get("vendor_name") or "").strip()
+            key = vendor_key(name)
+            if key:
+                grouped.setdefault(key, []).append({**bid, "vendor_name": name})
+    merged = []
+    for bids in grouped.values():  # dicts keep first-appearance order
+        merged.append({
+            "vendor_name": _first([b["vendor_name"] for b in bids]),
+            "bid_amount": _vote([b.get("bid_amount") for b in bids]) or 0.0,
+            "is_msme": any(b.get("is_msme") for b in bids),
+            "technical_score": _first([b.get("technical_score") for b in bids])
+        })
+    return merged
+
+def merge_partials(partials: Sequence[dict]) -> dict:
+    """One ProcurementCase dict from per-chunk partial extractions (in document order)"""
+    def field(name):
+        return [p.get(name) for p in partials]
+
+    def text_field(name):
+        return [(v.strip() if isinstance(v, str) else v) for v in field(name)]
+
+    bids = _merge_bids(partials)
+    estimated_value = _vote(field("estimated_value")) or 0.0
+
+    # Vote on vendor identity, then prefer the bid list's spelling
+    names = [v for v in text_field("selected_vendor") if isinstance(v, str) and vendor_key(v)]
+    winner = _vote([vendor_key(v) for v in names])
+    selected = next((v for v in names if vendor_key(v) == winner), "")
+    selected = next((b["vendor_name"] for b in bids if vendor_key(b["vendor_name"]) == winner), selected)
+
+    documents: Dict[str, str] = {}
+    for docs in field("documents_available"):
+        for doc in docs or []:
+            if isinstance(doc, str) and doc.strip():
+                documents.setdefault(doc.strip().lower(), doc.strip())
+
+    return {
+        "tender_id": _vote(text_field("tender_id")) or "",
+        "title": _first(text_field("title")) or "",
+        "department": _vote(text_field("department")) or "",
+        "estimated_value": estimated_value,
+        # Never inferred from the value; None when no excerpt states it
+        "procurement_method": _vote(field("procurement_method")),
+        "publication_date": _vote(text_field("publication_date")) or "",
+        "bid_opening_date": _vote(text_field("bid_opening_date")) or "",
+        "bids": bids,
+        "selected_vendor": selected,
+        "selection_reason": _first(text_field("selection_reason")) or "",
+        "documents_available": list(documents.values())
+    }
+
+def fields_found(partial: dict) -> List[str]:
+    return [k for k, v in partial.items() if _present(v)]
@@ -0,0 +1,349 @@
+"""Deterministic fast-path extraction of ProcurementCase fields from tender text
+
+Portal exports (GeM, CPPP, state e-procurement) label most fields the same
+way: "Tender ID:", "Bid Opening Date:", "Estimated Value: Rs 45 Lakhs".
+extract_fields() runs precompiled patterns over the text and returns each
+field with a confidence in [0, 1]; /parse_tender asks the LLM only for the
+fields below TENDER_FASTPATH_CONFIDENCE and skips it when every field in
+REQUIRED_FIELDS resolves.
+
+Confidence guide: 0.95 labelled value that parsed cleanly, 0.8-0.9 strong
+keyword evidence, 0.5-0.7 heuristic guess, 0 not found. An amount without a
+currency sign or unit is a guess: it may be a year or a clause number.
+"""
+
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# Fields that must resolve for the fast path to skip the LLM; the rest
+# (selection_reason, documents_available) default to empty when absent
+REQUIRED_FIELDS = (
+    "tender_id",
+    "title",
+    "department",
+    "estimated_value",
+    "procurement_method",
+    "publication_date",
+    "bid_opening_date",
+    "bids",
+    "selected_vendor"
+)
+
+_MONTHS = {
+    m: i + 1 for i, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december")
+    ]) for m in names
+}
+_MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+
+_DATE = re.compile(
+    r"(?P<iso>(?P<y1>\d{4})-(?P<m1>\d{1,2})-(?P<d1>\d{1,2}))"
+    r"|(?P<dmy>(?P<d2>\d{1,2})[-/.](?P<m2>\d{1,2})[-/.](?P<y2>\d{4}))"
+    rf"|(?P<dmon>(?P<d3>\d{{1,2}})(?:st|nd|rd|th)?[\s\-]+(?P<m3>{_MONTH})\.?[\s\-,]+(?P<y3>\d{{4}}))"
+    rf"|(?P<mond>(?P<m4>{_MONTH})\.?\s+(?P<d4>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<y4>\d{{4}}))",
+    re.IGNORECASE
+)
+
+_CURRENCY = r"(?:rs\.?|inr|₹)"
+_AMOUNT = re.compile(
+    rf"(?P<currency>{_CURRENCY})?\s*(?P<num>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>crores?|cr\b\.?|lakhs?|lacs?|lakh|thousand)?",
+    re.IGNORECASE
+)
+_UNITS = {"cr": 1e7, "crore": 1e7, "lakh": 1e5, "lac": 1e5, "thousand": 1e3}
+# Years and fiscal years ("2024", "2024-25", "2023/2024") are never bare amounts
+_YEAR = re.compile(r"\b(?:19|20)\d{2}(?:\s*[-–/]\s*\d{2,4})?\b")
+BARE_AMOUNT_CONFIDENCE = 0.6
+
+def _label(*names: str) -> re.Pattern:
+    """'<label> [no./number/id] : value' up to the end of the line"""
+    labels = "|".join(names)
+    return re.compile(
+        rf"^[ \t*\-•]*(?:{labels})(?:\s*(?:no\.?|number|id))?\s*[:\-–=]\s*(?P<value>[^\n]+)",
+        re.IGNORECASE | re.MULTILINE
+    )
+
+_LABELS = {
+    "tender_id": _label(r"tender\s*(?:id|ref(?:erence)?)?", r"bid\s*(?:number|no\.?|id)", r"nit", r"tender\s*reference", r"reference"),
+    "title": _label(r"title(?:\s*of\s*(?:work|tender))?", r"name\s*of\s*work", r"tender\s*title", r"subject", r"work\s*description", r"item\s*(?:category|description)?"),
+    "department": _label(r"department(?:\s*name)?", r"organi[sz]ation(?:\s*name)?", r"ministry", r"office", r"procuring\s*entity", r"buyer"),
+    "estimated_value": _label(r"estimated\s*(?:cost|value|bid\s*value|contract\s*value)", r"tender\s*value", r"ecv", r"project\s*cost", r"approximate\s*value"),
+    "procurement_method": _label(r"tender\s*type", r"type\s*of\s*tender", r"procurement\s*method", r"mode\s*of\s*(?:procurement|tender)", r"tender\s*category"),
+    "publication_date": _label(r"publish(?:ed|ing)?\s*date", r"publication\s*date", r"date\s*of\s*publication", r"bid\s*start\s*date", r"tender\s*date", r"date\s*of\s*issue"),
+    "bid_opening_date": _label(r"(?:technical\s*)?bid\s*opening\s*date", r"date\s*of\s*(?:bid\s*)?opening", r"opening\s*date", r"tender\s*opening\s*date"),
+    "selected_vendor": _label(r"selected\s*(?:vendor|bidder|supplier|firm)", r"successful\s*bidder", r"l1\s*bidder", r"awarded\s*to", r"contract\s*awarded\s*to", r"vendor\s*selected"),
+    "selection_reason": _label(r"(?:selection\s*)?reason(?:\s*for\s*selection)?", r"justification", r"basis\s*of\s*selection", r"remarks"),
+    "documents_available": _label(r"documents(?:\s*(?:available|attached|enclosed|submitted))?", r"enclosures", r"attachments")
+}
+
+# Unlabelled but unambiguous phrasing: "Estimated value Rs 45,00,000", "bids open 2024-03-05"
+_NEAR = {
+    "tender_id": re.compile(r"\b(?:tender|nit|bid)\s*(?:no|number|id|ref)\.?\s*[:\-]?\s*(?P<value>[A-Z0-9][A-Z0-9/_\-.]*\d[A-Z0-9/_\-]*)", re.IGNORECASE),
+    "estimated_value": re.compile(r"\b(?:estimated\s*(?:cost|value)|tender\s*value)\b(?P<value>[^\n]{0,30})", re.IGNORECASE),
+    "publication_date": re.compile(r"\b(?:published|publication|issued)\b(?:\s*(?:on|date))?(?P<value>[^\n]{0,25})", re.IGNORECASE),
+    "bid_opening_date": re.compile(r"\b(?:bids?\s*(?:will\s*)?open(?:s|ed|ing)?|opening\s*of\s*bids)\b(?:\s*(?:on|date))?(?P<value>[^\n]{0,25})", re.IGNORECASE),
+    "procurement_method": re.compile(r"\b(?:procurement\s*method|tender\s*type|type\s*of\s*tender|mode\s*of\s*(?:procurement|tender))\s*[:\-–]\s*(?P<value>[^\n.;]{1,40})", re.IGNORECASE)
+}
+
+_METHOD_VALUES = [
+    ("single_source", re.compile(r"single[\s\-]*(?:source|tender|vendor|bid)|proprietary|nomination|\bPAC\b|sole\s*supplier", re.IGNORECASE)),
+    ("limited_tender", re.compile(r"limited[\s\-]*tender|\bLTE\b|restricted\s*tender", re.IGNORECASE)),
+    ("open_tender", re.compile(r"open[\s\-]*tender|advertised\s*tender|\bOTE\b|open\s*bid|GeM\s*bid|e[\s\-]*tender|global\s*tender|public\s*tender", re.IGNORECASE))
+]
+# Bare words inside a labelled method value ("Tender Type: Limited"); "single stage" is a bid system, not a method
+_METHOD_WORDS = [
+    ("single_source", re.compile(r"\b(?:single(?![\s\-]*(?:stage|packet|cover|bid))|sole|nomination)\b", re.IGNORECASE)),
+    ("limited_tender", re.compile(r"\b(?:limited|restricted)\b", re.IGNORECASE)),
+    ("open_tender", re.compile(r"\b(?:open|advertised|public|global)\b", re.IGNORECASE))
+]
+# A method only mentioned somewhere in the text ("open tender was not used due to
+# urgency") is a guess: kept below TENDER_FASTPATH_CONFIDENCE so the LLM decides
+SCANNED_METHOD_CONFIDENCE = 0.7
+_PORTAL_HINT = re.compile(r"\bGeM\b|GEM/\d{4}/|\bCPPP\b|eprocure\.gov\.in|gem\.gov\.in", re.IGNORECASE)
+_GEM_BID = re.compile(r"\bGEM/\d{4}/[A-Z]/\d+\b")
+_DEPARTMENT_PHRASE = re.compile(r"\b((?:Department|Ministry|Directorate)\s+of\s+[A-Z][\w&,.\- ]{2,80}?)(?=[,.\n;]|$)")
+
+_KNOWN_DOCUMENTS = [
+    "Tender Notice", "NIT", "Bill of Quantities", "BOQ", "Technical Specifications",
+    "Technical Evaluation Report", "Financial Evaluation", "Comparative Statement",
+    "Purchase Order", "Work Order", "Letter of Award", "Integrity Pact",
+    "Emergency Declaration", "Sole Supplier Certificate", "Proprietary Article Certificate",
+    "Justification", "Competent Authority Approval", "Bid Security", "EMD",
+    "Performance Security", "Corrigendum", "Minutes of Pre-bid Meeting"
+]
+_DOCUMENT_SCAN = re.compile(r"\b(" + "|".join(re.escape(d) for d in _KNOWN_DOCUMENTS) + r")\b", re.IGNORECASE)
+
+# "MedEquip Pvt Ltd (Rs 42,00,000, MSME, technical 82)" or "1. MedEquip Pvt Ltd - ₹42 Lakhs - MSE"
+_BID = re.compile(
+    rf"(?P<name>[A-Z][A-Za-z0-9&.'/\- ]{{1,60}}?)\s*(?:\(|[-–:|]\s*)\s*(?P<amount>{_CURRENCY}\s*\d[\d,]*(?:\.\d+)?\s*(?:crores?|cr\b\.?|lakhs?|lacs?|lakh)?)(?P<rest>[^()\n;]*)",
+    re.IGNORECASE | re.MULTILINE
+)
+# Fee and security lines look like "Label: Rs N" bids but never are
+_NOT_BIDDER = re.compile(
+    r"^(?:emd|earnest\s*money(?:\s*deposit)?|bid\s*security|performance\s*(?:security|guarantee|bank\s*guarantee)"
+    r"|security\s*deposit|tender\s*(?:fee|cost|document\s*fee)|(?:document|processing|application)\s*fee)\b",
+    re.IGNORECASE
+)
+_BLANK_LINE = re.compile(r"\n[ \t]*\n")
+_BIDS_SECTION = re.compile(r"bid(?:der)?s?\s*(?:received|participated|list)?\s*[:\-]|participating\s*(?:bidders|firms)|l1\s*/\s*l2", re.IGNORECASE)
+_MSME_FLAG = re.compile(r"\b(?:msme|mse|micro|small\s*enterprise|udyam)\b", re.IGNORECASE)
+_NON_MSME_FLAG = re.compile(r"\bnon[\s\-]*(?:msme|mse)\b", re.IGNORECASE)
+_TECH_SCORE = re.compile(r"tech(?:nical)?\s*(?:score|marks)?\s*[:=]?\s*(\d{1,3}(?:\.\d+)?)", re.IGNORECASE)
+_NAME_PREFIX = re.compile(r"^(?:\d+[.)]\s*|bidders?\s*[:\-]\s*|(?:and|&)\s+)+", re.IGNORECASE)
+
+def parse_date(text: str) -> Optional[str]:
+    """First date in `text` as YYYY-MM-DD (numeric dates are read day-first)"""
+    for m in _DATE.finditer(text):
+        try:
+            if m.group("iso"):
+                y, mo, d = int(m.group("y1")), int(m.group("m1")), int(m.group("d1"))
+            elif m.group("dmy"):
+                y, mo, d = int(m.group("y2")), int(m.group("m2")), int(m.group("d2"))
+            elif m.group("dmon"):
+                y, mo, d = int(m.group("y3")), _MONTHS[m.group("m3").lower()[:3] if m.group("m3").lower()[:4] != "sept" else "sep"], int(m.group("d3"))
+            else:
+                y, mo, d = int(m.group("y4")), _MONTHS[m.group("m4").lower()[:3]], int(m.group("d4"))
+            return date(y, mo, d).isoformat()
+        except (ValueError, KeyError):
+            continue
+    return None
+
+def _parse_amount(text: str) -> Optional[Tuple[float, bool]]:
+    """(rupees, explicit?) for the best amount in `text`
+
+    The first amount with a currency sign or unit wins; failing that, the
+    first bare number of at least 1000 that is not a year (explicit=False).
+    """
+    years = [m.span() for m in _YEAR.finditer(text)]
+    bare = None
+    for m in _AMOUNT.finditer(text):
+        try:
+            value = float(m.group("num").replace(",", ""))
+        except ValueError:
+            continue
+        unit = (m.group("unit") or "").lower().rstrip(".")
+        for prefix, multiplier in _UNITS.items():
+            if unit.startswith(prefix):
+                value *= multiplier
+                break
+        if m.group("currency") or unit:
+            return round(value, 2), True
+        start = m.start("num")
+        # Bare small numbers are clause numbers; bare years are dates
+        if bare is None and value >= 1000 and not any(a <= start < b for a, b in years):
+            bare = round(value, 2)
+    return (bare, False) if bare is not None else None
+
+def parse_amount(text: str) -> Optional[float]:
+    """Amount in rupees: '₹1.2 Cr', 'Rs. 45,00,000', '50 Lakhs', 'INR 2.5 crore'"""
+    found = _parse_amount(text)
+    return found[0] if found else None
+
+def _clean(value: str) -> str:
+    return value.strip().strip(".;,").strip()
+
+def _labelled(field: str, text: str) -> Optional[str]:
+    m = _LABELS[field].search(text)
+    if not m:
+        return None
+    value = _clean(m.group("value"))
+    return value or None
+
+def _near(field: str, text: str, parse) -> Optional[object]:
+    for m in _NEAR[field].finditer(text):
+        value = parse(m.group("value"))
+        if value is not None:
+            return value
+    return None
+
+def _method_value(value: str) -> Optional[Tuple[str, float]]:
+    """Method named in a labelled value: full phrases, then one unambiguous bare word"""
+    for method, pattern in _METHOD_VALUES:
+        if pattern.search(value):
+            return method, 0.95
+    words = {method for method, pattern in _METHOD_WORDS if pattern.search(value)}
+    if len(words) == 1:
+        return words.pop(), 0.9
+    return None
+
+def _method(text: str) -> Tuple[Optional[str], float]:
+    labelled = _labelled("procurement_method", text)
+    found = _method_value(labelled) if labelled else None
+    if found is None:
+        found = _near("procurement_method", text, _method_value)
+    if found is not None:
+        return found
+    hits = [method for method, pattern in _METHOD_VALUES if pattern.search(text)]
+    if len(hits) == 1:
+        return hits[0], SCANNED_METHOD_CONFIDENCE
+    if hits:
+        # Mentions of several methods (e.g. "limited tender is not permitted"): a guess
+        return hits[0], 0.5
+    if _PORTAL_HINT.search(text):
+        return "open_tender", SCANNED_METHOD_CONFIDENCE
+    return None, 0.0
+
+def _bids_section(text: str) -> Optional[str]:
+    """From the bids heading to the next blank line or labelled field"""
+    section = _BIDS_SECTION.search(text)
+    if section is None:
+        return None
+    end = len(text)
+    blank = _BLANK_LINE.search(text, section.end())
+    if blank:
+        end = blank.start()
+    line_end = text.find("\n", section.end(), end)
+    if line_end != -1:
+        for pattern in _LABELS.values():
+            m = pattern.search(text, line_end + 1, end)
+            if m:
+                end = m.start()
+    return text[section.start():end]
+
+def _bids(text: str) -> Tuple[List[dict], float]:
+    section = _bids_section(text)
+    scope = section if section is not None else text
+    bids: Dict[str, dict] = {}
+    for m in _BID.finditer(scope):
+        name = _NAME_PREFIX.sub("", m.group("name")).strip(" -–:,")
+        amount = parse_amount(m.group("amount"))
+        if not name or amount is None or _LABELS["estimated_value"].match(name + ":") or _NOT_BIDDER.match(name):
+            continue
+        rest = m.group("rest") or ""
+        score = _TECH_SCORE.search(rest)
+        bids.setdefault(name.lower(), {
+            "vendor_name": name,
+            "bid_amount": amount,
+            "is_msme": bool(_MSME_FLAG.search(rest)) and not _NON_MSME_FLAG.search(rest),
+            "technical_score": float(score.group(1)) if score else None
+        })
+    if not bids:
+        return [], 0.0
+    return list(bids.values()), 0.85 if section is not None else 0.6
+
+def _field(value, confidence: float) -> dict:
+    return {"value": value, "confidence": confidence if value not in (None, "", []) else 0.0}
+
+def extract_fields(text: str) -> Dict[str, dict]:
+    """{field: {"value": ..., "confidence": 0..1}} for every ProcurementCase field"""
+    fields: Dict[str, dict] = {}
+
+    tender_id = _labelled("tender_id", text)
+    gem = _GEM_BID.search(text)
+    if tender_id:
+        fields["tender_id"] = _field(tender_id.split()[0] if len(tender_id.split()) > 1 and re.search(r"\d", tender_id.split()[0]) else tender_id, 0.95)
+    elif gem:
+        fields["tender_id"] = _field(gem.group(0), 0.9)
+    else:
+        fields["tender_id"] = _field(_near("tender_id", text, lambda v: _clean(v) or None), 0.85)
+
+    fields["title"] = _field(_labelled("title", text), 0.9)
+
+    department = _labelled("department", text)
+    phrase = _DEPARTMENT_PHRASE.search(text)
+    if department:
+        fields["department"] = _field(department, 0.9)
+    else:
+        fields["department"] = _field(_clean(phrase.group(1)) if phrase else None, 0.7)
+
+    labelled_value = _labelled("estimated_value", text)
+    found = _parse_amount(labelled_value) if labelled_value else None
+    confidence = 0.95
+    if found is None:
+        found = _near("estimated_value", text, _parse_amount)
+        confidence = 0.85
+    value, explicit = found or (None, False)
+    # A bare number goes to the LLM: it is too easily a year or a clause number
+    fields["estimated_value"] = _field(value, confidence if explicit else BARE_AMOUNT_CONFIDENCE)
+
+    method, confidence = _method(text)
+    fields["procurement_method"] = _field(method, confidence)
+
+    for name in ("publication_date", "bid_opening_date"):
+        labelled = _labelled(name, text)
+        value = parse_date(labelled) if labelled else None
+        if value is not None:
+            fields[name] = _field(value, 0.95)
+        else:
+            fields[name] = _field(_near(name, text, parse_date), 0.85)
+
+    bids, confidence = _bids(text)
+    fields["bids"] = _field(bids, confidence)
+
+    selected = _labelled("selected_vendor", text)
+    if selected:
+        # Strip a trailing amount/remark: "MedEquip Pvt Ltd at Rs 42,00,000"
+        selected = _clean(re.split(rf"\s+(?:at|for|@|with)\s+|\s*\(|\s+{_CURRENCY}", selected, maxsplit=1, flags=re.IGNORECASE)[0])
+    fields["selected_vendor"] = _field(selected, 0.9)
+
+    fields["selection_reason"] = _field(_labelled("selection_reason", text), 0.85)
+
+    labelled_docs = _labelled("documents_available", text)
+    if labelled_docs:
+        docs = [_clean(d) for d in re.split(r"[,;]|\band\b", labelled_docs) if _clean(d)]
+        fields["documents_available"] = _field(docs, 0.9)
+    else:
+        seen: Dict[str, str] = {}
+        for m in _DOCUMENT_SCAN.finditer(text):
+            seen.setdefault(m.group(1).lower(), m.group(1))
+        fields["documents_available"] = _field(list(seen.values()), 0.7)
+
+    return fields
+
+def unresolved_fields(fields: Dict[str, dict], threshold: float, required_only: bool = False) -> List[str]:
+    """Fields below the threshold; with required_only, just the ones that block the fast path"""
+    names = REQUIRED_FIELDS if required_only else fields.keys()
+    return [k for k in names if fields[k]["confidence"] < threshold]
+
+def fill_case(fields: Dict[str, dict], threshold: float, partial: Optional[dict] = None) -> dict:
+    """PartialProcurementCase dict: confident fast-path values, then the LLM's, then low-confidence guesses"""
+    partial = partial or {}
+    merged = {}
+    for name, field in fields.items():
+        if field["confidence"] >= threshold or partial.get(name) in (None, "", []):
+            merged[name] = field["value"]
+        else:
+            merged[name] = partial[name]
+    return merged
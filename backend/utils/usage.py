@@ -0,0 +1,58 @@
+"""Prefill vs decode accounting from Ollama's response counters
+
+Ollama reports `prompt_eval_count` as the prompt tokens it actually had to
+evaluate; tokens served from its prefix (KV) cache are not counted. The
+prompt's full token count is not reported, so it is estimated from the
+prompt length using the densest chars-per-token ratio seen for that tag
+(a call with no cache hit evaluates the whole prompt).
+"""
+
+from typing import Optional
+
+usage_stats: dict = {}
+
+def record_usage(tag: str, prompt_chars: int, data: dict) -> None:
+    """Record the counters from a final (done) Ollama chat response"""
+    evaluated = data.get("prompt_eval_count")
+    if evaluated is None:
+        return
+    bucket = usage_stats.setdefault(tag or "untagged", {
+        "calls": 0,
+        "prompt_chars": 0,
+        "prompt_eval_count": 0,
+        "eval_count": 0,
+        "prompt_eval_duration_ms": 0.0,
+        "eval_duration_ms": 0.0,
+        "chars_per_token": None
+    })
+    bucket["calls"] += 1
+    bucket["prompt_chars"] += prompt_chars
+    bucket["prompt_eval_count"] += evaluated
+    bucket["eval_count"] += data.get("eval_count", 0)
+    bucket["prompt_eval_duration_ms"] += data.get("prompt_eval_duration", 0) / 1e6
+    bucket["eval_duration_ms"] += data.get("eval_duration", 0) / 1e6
+    if evaluated > 0:
+        ratio = prompt_chars / evaluated
+        current: Optional[float] = bucket["chars_per_token"]
+        bucket["chars_per_token"] = ratio if current is None else min(current, ratio)
+
+def usage_report() -> dict:
+    """Per tag: evaluated vs estimated cached prompt tokens and prefill share of time"""
+    report = {}
+    for tag, b in usage_stats.items():
+        cpt = b["chars_per_token"] or 4.0
+        est_prompt_tokens = int(b["prompt_chars"] / cpt)
+        cached = max(0, est_prompt_tokens - b["prompt_eval_count"])
+        total_ms = b["prompt_eval_duration_ms"] + b["eval_duration_ms"]
+        report[tag] = {
+            "calls": b["calls"],
+            "prompt_eval_count": b["prompt_eval_count"],
+            "est_prompt_tokens": est_prompt_tokens,
+            "est_cached_tokens": cached,
+            "est_cache_hit_ratio": round(cached / est_prompt_tokens, 4) if est_prompt_tokens else 0.0,
+            "eval_count": b["eval_count"],
+            "prompt_eval_duration_ms": round(b["prompt_eval_duration_ms"], 1),
+            "eval_duration_ms": round(b["eval_duration_ms"], 1),
+            "prefill_share": round(b["prompt_eval_duration_ms"] / total_ms, 4) if total_ms else 0.0
+        }
+    return report
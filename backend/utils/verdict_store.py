@@ -0,0 +1,303 @@
+"""Persistent review history: every analysis result, in SQLite (WAL mode)
+
+One row per returned analysis (including cached replays and rule
+short-circuits, distinguished by `outcome`) holding the columns the audit
+dashboards filter on, each indexed together with created_at so filtered,
+newest-first listings are index range scans. The case, agent opinions,
+verdict, rule findings and timing breakdown are kept as JSON in
+review_details, read only when one review is opened.
+
+Listing uses keyset pagination: next_cursor encodes the last row's sort
+value and id, so page N costs the same as page 1 however deep it is.
+
+Inserts go through one writer connection under a lock (add_async runs them
+in a worker thread, off the event loop). Reads use a connection per
+thread; WAL lets them run alongside the writer, so a slow listing or
+summary never holds up the analyses recording their reviews.
+"""
+
+import asyncio
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL,
+    title TEXT,
+    department TEXT COLLATE NOCASE,
+    selected_vendor TEXT COLLATE NOCASE,
+    procurement_method TEXT,
+    estimated_value REAL,
+    publication_date TEXT,
+    verdict TEXT,
+    score REAL,
+    path TEXT,
+    outcome TEXT,
+    total_ms REAL,
+    created_at REAL NOT NULL
+);
+-- Bulky JSON lives apart so scans and aggregates over reviews stay narrow
+CREATE TABLE IF NOT EXISTS review_details (
+    review_id INTEGER PRIMARY KEY REFERENCES reviews (id),
+    case_json TEXT NOT NULL,
+    opinions_json TEXT NOT NULL,
+    verdict_json TEXT NOT NULL,
+    findings_json TEXT NOT NULL,
+    timings_json TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_created ON reviews (created_at);
+-- verdict and score ride along so per-group summaries are answered from the index
+CREATE INDEX IF NOT EXISTS reviews_department ON reviews (department, created_at, verdict, score);
+CREATE INDEX IF NOT EXISTS reviews_vendor ON reviews (selected_vendor, created_at, verdict, score);
+CREATE INDEX IF NOT EXISTS reviews_verdict ON reviews (verdict, created_at, score);
+CREATE INDEX IF NOT EXISTS reviews_score ON reviews (score);
+CREATE INDEX IF NOT EXISTS reviews_published ON reviews (publication_date);
+CREATE INDEX IF NOT EXISTS reviews_case ON reviews (case_id, created_at);
+"""
+
+SUMMARY_COLUMNS = (
+    "id", "case_id", "title", "department", "selected_vendor", "procurement_method",
+    "estimated_value", "publication_date", "verdict", "score", "path", "outcome", "total_ms", "created_at"
+)
+SORTS = ("created_at", "score", "estimated_value")
+GROUPS = ("department", "selected_vendor", "verdict", "procurement_method", "outcome")
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+def parse_time(value: str) -> float:
+    """ISO date or datetime (UTC unless it carries an offset) as a unix timestamp"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _encode_cursor(value, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[object, int]:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+class VerdictStore:
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # One writer connection; inserts are single-row, so a lock is cheaper than a pool
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        # Read connections, one per thread that queries (threadpool handlers)
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._lock:
+            self._conn.close()
+
+    def add(self, case: dict, result: dict, path: str, outcome: str, timings: Optional[dict] = None) -> int:
+        verdict = result.get("verdict") or {}
+        row = (
+            result.get("case_id") or case.get("tender_id", ""),
+            case.get("title"),
+            case.get("department"),
+            case.get("selected_vendor"),
+            case.get("procurement_method"),
+            case.get("estimated_value"),
+            case.get("publication_date"),
+            verdict.get("verdict"),
+            verdict.get("constitutional_score"),
+            path,
+            outcome,
+            (timings or {}).get("total_ms"),
+            time.time()
+        )
+        details = (
+            json.dumps(case, ensure_ascii=False),
+            json.dumps(result.get("agent_opinions", {}), ensure_ascii=False),
+            json.dumps(verdict, ensure_ascii=False),
+            json.dumps(result.get("rule_findings", []), ensure_ascii=False),
+            json.dumps(timings, ensure_ascii=False) if timings else None
+        )
+        with self._lock:
+            with self._conn:  # both rows or neither
+                self._conn.execute("BEGIN")
+                review_id = self._conn.execute(
+                    "INSERT INTO reviews (case_id, title, department, selected_vendor, procurement_method, "
+                    "estimated_value, publication_date, verdict, score, path, outcome, total_ms, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                ).lastrowid
+                self._conn.execute(
+                    "INSERT INTO review_details (review_id, case_json, opinions_json, verdict_json, findings_json, timings_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (review_id, *details)
+                )
+            return review_id
+
+    async def add_async(self, case: dict, result: dict, path: str, outcome: str, timings: Optional[dict] = None) -> int:
+        """add() in a worker thread, for callers on the event loop"""
+        return await asyncio.to_thread(self.add, case, result, path, outcome, timings)
+
+    @staticmethod
+    def _where(filters: dict) -> Tuple[List[str], list]:
+        clauses, params = [], []
+        for column in ("case_id", "department", "selected_vendor", "verdict", "procurement_method", "outcome", "path"):
+            if filters.get(column):
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        for key, clause in (
+            ("min_score", "score >= ?"),
+            ("max_score", "score <= ?"),
+            ("since", "created_at >= ?"),
+            ("until", "created_at < ?"),
+            ("published_from", "publication_date >= ?"),
+            ("published_to", "publication_date <= ?")
+        ):
+            if filters.get(key) is not None:
+                clauses.append(clause)
+                params.append(filters[key])
+        return clauses, params
+
+    def _summary(self, row: sqlite3.Row) -> dict:
+        item = {column: row[column] for column in SUMMARY_COLUMNS}
+        item["created_at"] = _iso(row["created_at"])
+        return item
+
+    def query(self, filters: dict, sort: str = "created_at", descending: bool = True,
+              limit: int = 50, cursor: Optional[str] = None, with_total: bool = False) -> dict:
+        """One page of review summaries, newest (or highest) first by default"""
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        clauses, params = self._where(filters)
+        count_clauses, count_params = list(clauses), list(params)
+        if sort != "created_at":
+            clauses.append(f"{sort} IS NOT NULL")
+        if cursor:
+            value, row_id = _decode_cursor(cursor)
+            clauses.append(f"({sort}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([value, row_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM reviews {where} "
+            f"ORDER BY {sort} {direction}, id {direction} LIMIT ?"
+        )
+        conn = self._reader()
+        rows = conn.execute(sql, params + [limit + 1]).fetchall()
+        total = None
+        if with_total:
+            count_where = f"WHERE {' AND '.join(count_clauses)}" if count_clauses else ""
+            total = conn.execute(f"SELECT COUNT(*) FROM reviews {count_where}", count_params).fetchone()[0]
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = _encode_cursor(last[sort], last["id"])
+        return {
+            "items": [self._summary(r) for r in page],
+            "next_cursor": next_cursor,
+            "total": total
+        }
+
+    def get(self, review_id: int) -> Optional[dict]:
+        row = self._reader().execute(
+            "SELECT * FROM reviews JOIN review_details ON review_details.review_id = reviews.id WHERE id = ?",
+            (review_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            **self._summary(row),
+            "case": json.loads(row["case_json"]),
+            "agent_opinions": json.loads(row["opinions_json"]),
+            "verdict_detail": json.loads(row["verdict_json"]),
+            "rule_findings": json.loads(row["findings_json"]),
+            "timings": json.loads(row["timings_json"]) if row["timings_json"] else None
+        }
+
+    def summary(self, group_by: str, filters: dict, limit: int = 50) -> List[dict]:
+        """Review counts, mean score and verdict split per group, largest groups first"""
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+        clauses, params = self._where(filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT {group_by} AS key, COUNT(*) AS reviews, ROUND(AVG(score), 2) AS avg_score, "
+            "SUM(verdict = 'REJECT') AS rejected, SUM(verdict = 'REVIEW') AS review, "
+            "SUM(verdict = 'CONDITIONAL') AS conditional, SUM(verdict = 'APPROVE') AS approved, "
+            "MAX(created_at) AS last_review "
+            f"FROM reviews {where} GROUP BY {group_by} ORDER BY reviews DESC LIMIT ?"
+        )
+        rows = self._reader().execute(sql, params + [limit]).fetchall()
+        return [{**dict(r), "last_review": _iso(r["last_review"])} for r in rows]
+
+    def latest_cases(self) -> Iterator[dict]:
+        """The most recently reviewed version of every case, oldest first (for analytics)
+
+        Reads on its own connection: WAL lets it run in a background thread
+        without holding up inserts.
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT case_json FROM review_details WHERE review_id IN "
+                "(SELECT MAX(id) FROM reviews GROUP BY case_id) ORDER BY review_id"
+            )
+            for (case_json,) in rows:
+                yield json.loads(case_json)
+        finally:
+            conn.close()
+
+    def info(self) -> dict:
+        count = self._reader().execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        return {"path": self.path, "reviews": count}
+
+_store: Optional[VerdictStore] = None
+
+def get_verdict_store() -> Optional[VerdictStore]:
+    """The process-wide store, opened on first use; None when VERDICT_STORE_PATH is empty"""
+    global _store
+    if _store is None and settings.VERDICT_STORE_PATH:
+        _store = VerdictStore(settings.VERDICT_STORE_PATH)
+    return _store
+
+def close_verdict_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -105,9 +105,19 @@ export default function Home() {
           ...prev,
           [data.agent]: data.message
         }))
+      } else if (data.status === 'token') {
+        // Live model output: keep the tail of the stream in the thought bubble
+        setAgentMessages((prev: any) => ({
+          ...prev,
+          [data.agent]: ((prev[data.agent] || '') + data.token).slice(-160)
+        }))
       } else if (data.status === 'complete') {
         setResults(data.result)
         setAnalyzing(false)
+        // Verdict is final; keep listening only for the model-written summary
+        if (!data.prose_pending) ws.close()
+      } else if (data.status === 'verdict_prose') {
+        setResults((prev: any) => prev ? { ...prev, verdict: data.verdict } : prev)
         ws.close()
       } else if (data.status === 'error') {
         
@@ -273,6 +283,7 @@ export default function Home() {
                   <div className={`rounded-xl p-6 text-white shadow-lg ${
                     results.verdict.verdict === 'APPROVE' ? 'bg-gradient-to-r from-green-600 to-emerald-600' :
                     results.verdict.verdict === 'REJECT' ? 'bg-gradient-to-r from-red-600 to-rose-600' :
+                    results.verdict.verdict === 'REVIEW' ? 'bg-gradient-to-r from-orange-600 to-red-500' :
                     'bg-gradient-to-r from-amber-500 to-orange-500'
                   }`}>
                     <div className="flex items-start justify-between">
@@ -25,6 +25,37 @@ export default function CrossExamine({ caseData, results }: CrossExamineProps) {
     }
   }, [messages])
 
+  const sessionRef = useRef<string | null>(null)
+
+  // Case and verdict are sent once; follow-ups send only the question
+  const openSession = async (): Promise<string> => {
+    const res = await fetch('http://localhost:8000/bench/sessions', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ case_data: caseData, verdict_data: results })
+    })
+    if (!res.ok) throw new Error('Failed to reach the bench')
+    const data = await res.json()
+    sessionRef.current = data.session_id
+    return data.session_id
+  }
+
+  const askStream = async (sessionId: string, question: string) => fetch(
+    `http://localhost:8000/bench/sessions/${sessionId}/ask/stream`,
+    {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ question })
+    }
+  )
+
+  const appendToAnswer = (token: string) => {
+    setMessages(prev => {
+      const last = prev[prev.length - 1]
+      return [...prev.slice(0, -1), { ...last, content: last.content + token }]
+    })
+  }
+
   const handleSend = async () => {
     if (!input.trim()) return
 
@@ -34,20 +65,33 @@ export default function CrossExamine({ caseData, results }: CrossExamineProps) {
     setLoading(true)
 
     try {
-      const res = await fetch('http://localhost:8000/ask_bench', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          case_data: caseData,
-          verdict_data: results,
-          question: userMsg
-        })
-      })
-
-      if (!res.ok) throw new Error('Failed to reach the bench')
-
-      const data = await res.json()
-      setMessages(prev => [...prev, { role: 'bench', content: data.answer }])
+      let res = await askStream(sessionRef.current ?? await openSession(), userMsg)
+      if (res.status === 404) {
+        // Session expired server-side: start a new one
+        res = await askStream(await openSession(), userMsg)
+      }
+      if (!res.ok || !res.body) throw new Error('Failed to reach the bench')
+
+      setMessages(prev => [...prev, { role: 'bench', content: '' }])
+      setLoading(false)
+
+      // NDJSON: {"status": "token"} lines, then "complete" or "error"
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() ?? ''
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.status === 'token') appendToAnswer(event.token)
+          if (event.status === 'error') throw new Error(event.message)
+        }
+      }
     } catch (e) {
       setMessages(prev => [...prev, { role: 'bench', content: "The Constitutional Bench is currently in recess. Please try again later." }])
     } finally {